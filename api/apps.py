@@ -10,6 +10,10 @@ class ApiConfig(AppConfig):
         # Ejecutar el seeder al finalizar la migración de la app
         post_migrate.connect(self.run_seed, sender=self)
 
+        # El estado compartido entre procesos necesita una caché compartida
+        from django_rest_role_jwt.shared_cache import warn_if_local_cache
+        warn_if_local_cache()
+
     def run_seed(self, **kwargs):
         # Importar y ejecutar el seeder después de que las apps estén listas
         from .seeder.users import seed_users
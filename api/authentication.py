@@ -0,0 +1,84 @@
+import uuid
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import DEFERRED
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+from .revocation import is_token_revoked
+from .tokens import EMAIL_CLAIM, UID_CLAIM, get_token_roles
+
+
+class RevocableJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication que rechaza los tokens de la lista de revocación
+
+    Es la autenticación por defecto: carga el usuario de la base de datos en
+    cada petición.
+    """
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if is_token_revoked(token):
+            raise AuthenticationFailed(_("El token ha sido revocado"), code='token_revoked')
+        return token
+
+
+class StatelessJWTAuthentication(RevocableJWTAuthentication):
+    """
+    Autenticación JWT sin consultar el usuario en cada petición (opcional)
+
+    El usuario se construye a partir de los claims del token (id, uid, email
+    y roles) como una instancia de User con el resto de campos diferidos: el
+    primer acceso a cualquiera de ellos carga la fila completa una sola vez.
+    Se puede seguir usando en filtros y claves foráneas (owner=request.user),
+    pero no se puede guardar: sus claims pueden estar desactualizados.
+
+    Al no leer la fila, los usuarios desactivados se rechazan por la lista de
+    revocación (ver api.revocation), no por is_active.
+
+    Uso en una vista:
+        authentication_classes = [StatelessJWTAuthentication]
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        return build_token_user(validated_token)
+
+
+def build_token_user(token):
+    """
+    Instancia de User con los datos del token y el resto de campos diferidos
+
+    Args:
+        token: Token validado
+
+    Returns:
+        User: Usuario que carga los campos ausentes al acceder a ellos
+    """
+    values = {
+        api_settings.USER_ID_FIELD: token[api_settings.USER_ID_CLAIM],
+        # Un token válido y no revocado implica un usuario activo
+        'is_active': True,
+    }
+    if token.get(UID_CLAIM):
+        values['uid'] = uuid.UUID(token[UID_CLAIM])
+    if token.get(EMAIL_CLAIM):
+        values['email'] = token[EMAIL_CLAIM]
+
+    fields = User._meta.concrete_fields
+    user = User.from_db(
+        DEFAULT_DB_ALIAS,
+        [field.attname for field in fields if field.attname in values],
+        [values.get(field.attname, DEFERRED) for field in fields]
+    )
+    user._load_deferred_together = True
+
+    roles = get_token_roles(token)
+    if roles is not None:
+        user._role_names = roles
+    return user
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.models import Role, User
+from api.tokens import RoleRefreshToken
+
+
+class Command(BaseCommand):
+    help = (
+        'Cuenta las consultas SQL de /api/test/premium con un token sin roles '
+        '(comprobación en la base de datos) y con el claim de roles'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=10,
+                            help='Peticiones por variante')
+
+    def handle(self, *args, **options):
+        # Los datos de prueba se crean dentro de una transacción que se deshace al final
+        with transaction.atomic():
+            user = User.objects.create_user(email='bench-roles@example.com', password='benchmark')
+            premium, _ = Role.objects.get_or_create(name='Premium')
+            user.roles.add(premium)
+
+            results = {
+                'sin claim': self._measure(RefreshToken.for_user(user), options['requests']),
+                'con claim': self._measure(RoleRefreshToken.for_user(user), options['requests']),
+            }
+            transaction.set_rollback(True)
+
+        for label, (total, role_queries) in results.items():
+            self.stdout.write(
+                f"{label:>10}: {total / options['requests']:.1f} consultas/petición, "
+                f"{role_queries / options['requests']:.1f} de roles"
+            )
+
+        if results['con claim'][1]:
+            raise CommandError('Los permisos consultan los roles aunque estén en el token')
+        self.stdout.write(self.style.SUCCESS('Los permisos leen los roles del token'))
+
+    def _measure(self, refresh, count):
+        """(consultas totales, consultas a la tabla de roles) en count peticiones"""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+        url = reverse('test_premium')
+
+        with CaptureQueriesContext(connection) as context:
+            for _ in range(count):
+                response = client.get(url)
+                if response.status_code != 200:
+                    raise CommandError(f"GET {url} devolvió {response.status_code}")
+
+        role_table = Role._meta.db_table
+        role_queries = sum(1 for query in context.captured_queries if role_table in query['sql'])
+        return len(context.captured_queries), role_queries
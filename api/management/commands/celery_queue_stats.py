@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+
+from django_rest_role_jwt.celery import app
+from django_rest_role_jwt.task_metrics import get_task_latency_stats
+from documents.cache import get_extraction_cache_metrics
+from ia.cache import get_response_cache_metrics
+
+
+class Command(BaseCommand):
+    help = (
+        'Muestra la profundidad de cada cola de Celery, los percentiles de latencia '
+        'por tarea y la tasa de acierto de las cachés de extracciones y de respuestas del modelo'
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.MIGRATE_HEADING('Colas'))
+        with app.connection_for_read() as connection:
+            channel = connection.default_channel
+            for queue in app.conf.task_queues:
+                try:
+                    _, depth, consumers = channel.queue_declare(queue=queue.name, passive=True)
+                    self.stdout.write(f"  {queue.name:<12} mensajes: {depth:<8} consumidores: {consumers}")
+                except Exception as e:
+                    self.stdout.write(self.style.WARNING(f"  {queue.name:<12} no disponible: {e}"))
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Latencia por tarea (segundos)'))
+        stats = get_task_latency_stats()
+        if not stats:
+            self.stdout.write('  Sin muestras registradas')
+        for task_name, data in stats.items():
+            runtime = '  '.join(f"p{p}={value:.3f}" for p, value in data['runtime'].items())
+            wait = '  '.join(f"p{p}={value:.3f}" for p, value in data['wait'].items()) or '-'
+            self.stdout.write(f"  {task_name} (n={data['count']})")
+            self.stdout.write(f"    ejecución: {runtime}")
+            self.stdout.write(f"    en cola:   {wait}")
+            if data.get('process_memory_high_water_kb'):
+                # Pico de los procesos que ejecutaron la tarea, no de la tarea en sí
+                self.stdout.write(
+                    f"    pico de memoria del worker: {data['process_memory_high_water_kb']} KB"
+                )
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Caché de respuestas del modelo'))
+        metrics = get_response_cache_metrics()
+        self.stdout.write(
+            f"  aciertos: {metrics['hits']}  aproximados: {metrics['near_hits']}  "
+            f"fallos: {metrics['misses']}  tasa de acierto: {metrics['hit_rate']:.1%}"
+        )
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Caché de extracciones de documentos'))
+        metrics = get_extraction_cache_metrics()
+        self.stdout.write(
+            f"  aciertos: {metrics['hits']}  compartidos: {metrics['shared_hits']}  "
+            f"fallos: {metrics['misses']}  tasa de acierto: {metrics['hit_rate']:.1%}"
+        )
@@ -1,11 +1,14 @@
 import uuid
 
 from django.db import models
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
 from django.contrib.auth.models import PermissionsMixin
 from django.contrib.auth.base_user import AbstractBaseUser
 from django.utils import timezone
 
 from .managers import CustomUserManager
+from .revocation import revoke_user_tokens
 
 class Role(models.Model):
     name = models.CharField(max_length=30, unique=True)
@@ -44,6 +47,84 @@ class User(AbstractBaseUser, PermissionsMixin):
     def get_full_name(self):
         return f"{self.first_name} {self.last_name}".strip()
     
+    def get_role_names(self):
+        """
+        Nombres de los roles del usuario
+
+        Se consultan una sola vez por instancia (es decir, una vez por
+        petición) y se reutilizan en las siguientes comprobaciones.
+        """
+        if not hasattr(self, '_role_names'):
+            prefetched = getattr(self, '_prefetched_objects_cache', {}).get('roles')
+            if prefetched is not None:
+                self._role_names = frozenset(role.name for role in prefetched)
+            else:
+                self._role_names = frozenset(self.roles.values_list('name', flat=True))
+        return self._role_names
+
     def has_role(self, role_name):
-        return self.roles.filter(name=role_name).exists()
+        return role_name in self.get_role_names()
+
+    def refresh_from_db(self, using=None, fields=None):
+        # Los usuarios construidos a partir del token (api.authentication)
+        # cargan todos los campos diferidos en la primera consulta
+        if fields is not None and getattr(self, '_load_deferred_together', False):
+            fields = set(fields) | self.get_deferred_fields()
+        super().refresh_from_db(using=using, fields=fields)
+
+    def save(self, *args, **kwargs):
+        # Los usuarios construidos a partir del token llevan email e is_active
+        # tal como estaban al emitirlo: guardarlos pisaría la fila con ellos
+        if getattr(self, '_load_deferred_together', False):
+            raise ValueError(
+                "El usuario construido a partir del token es de solo lectura; "
+                "carga la fila (User.objects.get(pk=...)) para modificarla"
+            )
+        super().save(*args, **kwargs)
+
+
+@receiver(m2m_changed, sender=User.roles.through)
+def clear_role_names(sender, instance, action, pk_set, **kwargs):
+    # Los roles memorizados dejan de ser válidos al modificar la relación
+    if isinstance(instance, User):
+        instance.__dict__.pop('_role_names', None)
+        # Los tokens emitidos llevan los roles anteriores
+        if action in ('post_remove', 'post_clear'):
+            revoke_user_tokens(instance.pk)
+        return
+
+    # Desde el rol (role.users.remove/clear): pk_set son los usuarios, y en
+    # clear hay que recordarlos antes de borrar la relación
+    if action == 'pre_clear':
+        instance._cleared_user_ids = list(instance.users.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        for user_id in instance.__dict__.pop('_cleared_user_ids', []):
+            revoke_user_tokens(user_id)
+    elif action == 'post_remove':
+        for user_id in pk_set or ():
+            revoke_user_tokens(user_id)
+
+
+@receiver(pre_delete, sender=Role)
+def remember_role_users(sender, instance, **kwargs):
+    # Al borrar el rol sus filas de la relación se borran sin m2m_changed
+    instance._deleted_user_ids = list(instance.users.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Role)
+def revoke_deleted_role_tokens(sender, instance, **kwargs):
+    for user_id in instance.__dict__.pop('_deleted_user_ids', []):
+        revoke_user_tokens(user_id)
+
+
+@receiver(post_save, sender=User)
+def revoke_disabled_user_tokens(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        return
+    if update_fields is not None and not {'is_active', 'is_deleted'} & set(update_fields):
+        return
+    if instance.get_deferred_fields() & {'is_active', 'is_deleted'}:
+        return
+    if not instance.is_active or instance.is_deleted:
+        revoke_user_tokens(instance.pk)
 
@@ -1,15 +1,36 @@
 from rest_framework.permissions import BasePermission
 
-class IsAdmin(BasePermission):
-    def has_permission(self, request, view):
-        return request.user and request.user.is_authenticated and request.user.has_role("Admin")
+from .tokens import get_token_roles
 
 
-class IsPremium(BasePermission):
-    def has_permission(self, request, view):
-        return request.user and request.user.is_authenticated and request.user.has_role("Premium")
+def get_request_roles(request):
+    """
+    Roles del usuario de la petición
+
+    Se leen del claim del token JWT validado si lo incluye; en otro caso
+    (sesión, tokens antiguos) del usuario, que los consulta una sola vez.
+    """
+    roles = get_token_roles(request.auth)
+    if roles is None:
+        roles = request.user.get_role_names()
+    return roles
 
 
-class IsCliente(BasePermission):
+class RolePermission(BasePermission):
+    role = None
+
     def has_permission(self, request, view):
-        return request.user and request.user.is_authenticated and request.user.has_role("Cliente")
+        return bool(request.user and request.user.is_authenticated
+                    and self.role in get_request_roles(request))
+
+
+class IsAdmin(RolePermission):
+    role = "Admin"
+
+
+class IsPremium(RolePermission):
+    role = "Premium"
+
+
+class IsCliente(RolePermission):
+    role = "Cliente"
@@ -0,0 +1,61 @@
+"""
+Lista de revocación de tokens JWT en la caché compartida
+
+Se puede revocar un token concreto (por su jti, p. ej. al cerrar sesión) o
+todos los tokens de un usuario emitidos antes de un instante (al
+desactivarlo o quitarle roles). Las entradas solo tienen que durar lo que
+dura un token, así que la lista se mantiene pequeña.
+
+La lista tiene que verla cada proceso que autentica peticiones: con una caché
+local (LocMemCache) una revocación solo vale en el proceso que la registra,
+así que con varios workers hace falta una caché compartida (ver
+django_rest_role_jwt.shared_cache).
+"""
+import time
+
+from django.core.cache import cache
+from rest_framework_simplejwt.settings import api_settings
+
+
+def _token_key(jti):
+    return f"auth:revoked:token:{jti}"
+
+
+def _user_key(user_id):
+    return f"auth:revoked:user:{user_id}"
+
+
+def _max_lifetime():
+    lifetime = max(api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME)
+    return int(lifetime.total_seconds()) + 60
+
+
+def revoke_token(token):
+    """Revoca un token validado hasta que caduque"""
+    jti = token.get(api_settings.JTI_CLAIM)
+    if jti is None:
+        return
+    remaining = int(token.get('exp', 0) - time.time())
+    if remaining > 0:
+        cache.set(_token_key(jti), True, remaining + 60)
+
+
+def revoke_user_tokens(user_id):
+    """Revoca todos los tokens del usuario emitidos hasta ahora"""
+    cache.set(_user_key(user_id), time.time(), _max_lifetime())
+
+
+def is_token_revoked(token):
+    """
+    Indica si un token validado está en la lista de revocación
+
+    Una sola lectura de la caché para las dos comprobaciones.
+    """
+    jti = token.get(api_settings.JTI_CLAIM)
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    keys = [_token_key(jti), _user_key(user_id)]
+    revoked = cache.get_many(keys)
+    if revoked.get(keys[0]):
+        return True
+    revoked_at = revoked.get(keys[1])
+    return revoked_at is not None and token.get('iat', 0) < revoked_at
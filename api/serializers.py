@@ -2,9 +2,12 @@ from django.contrib.auth import authenticate
 from django.contrib.auth.models import update_last_login
 
 from rest_framework import serializers
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
 
 from .models import User, Role
+from .revocation import is_token_revoked
+from .tokens import ROLES_CLAIM, RoleRefreshToken
 '''
 class AuthUserRegistrationSerializer(serializers.ModelSerializer):
     class Meta:
@@ -104,7 +107,7 @@ class AuthUserLoginSerializer(serializers.Serializer):
             raise serializers.ValidationError("Invalid login credentials")
 
         try:
-            refresh = RefreshToken.for_user(user)
+            refresh = RoleRefreshToken.for_user(user)
             refresh_token = str(refresh)
             access_token = str(refresh.access_token)
 
@@ -115,10 +118,24 @@ class AuthUserLoginSerializer(serializers.Serializer):
                 'refresh': refresh_token,
                 'email': user.email,
                 'full_name': user.get_full_name(),
-                'roles': [role.name for role in user.roles.all()],
+                'roles': refresh[ROLES_CLAIM],
 
             }
 
             return validation
         except User.DoesNotExist:
-            raise serializers.ValidationError("Invalid login credentials")
\ No newline at end of file
+            raise serializers.ValidationError("Invalid login credentials")
+
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Serializer de /token/obtain/ que incluye los roles en los tokens"""
+    token_class = RoleRefreshToken
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    """Serializer de /token/refresh/ que rechaza los tokens revocados"""
+
+    def validate(self, attrs):
+        if is_token_revoked(self.token_class(attrs['refresh'])):
+            raise InvalidToken('El token ha sido revocado')
+        return super().validate(attrs)
@@ -1,9 +1,20 @@
 import json
+from django.core.cache import cache
+from django.test import override_settings
 from django.urls import include, path, reverse
 from rest_framework import status
-from rest_framework.test import APITestCase, APIClient, URLPatternsTestCase
+from rest_framework.test import APITestCase, APIClient, APIRequestFactory, URLPatternsTestCase
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .authentication import StatelessJWTAuthentication
+from .models import Role, User
+from .tokens import RoleRefreshToken
+
+# Las pruebas que cuentan consultas usan una caché en memoria para que las
+# lecturas de la caché (si se configura DatabaseCache) no cuenten como consultas
+LOCAL_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
 
-from .models import User
 
 # Create your tests here.
 class UserTest(APITestCase, URLPatternsTestCase):
@@ -84,3 +95,155 @@ class UserTest(APITestCase, URLPatternsTestCase):
         response_data = json.loads(response.content)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
         self.assertFalse(response_data['success'])
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class RoleClaimTest(APITestCase, URLPatternsTestCase):
+    """ Test module for role claims in JWT tokens """
+
+    urlpatterns = [
+        path('api/', include('api.urls')),
+    ]
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='premium@test.com',
+            password='test',
+        )
+        premium, _ = Role.objects.get_or_create(name='Premium')
+        self.user.roles.add(premium)
+
+    def _client_with_token(self, refresh):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+        return client
+
+    def test_access_token_includes_roles(self):
+        """ Test that the access token carries the user's role names """
+        refresh = RoleRefreshToken.for_user(self.user)
+        self.assertEqual(refresh.access_token['roles'], ['Premium'])
+
+    def test_permission_reads_roles_from_token(self):
+        """ Test that role permissions do not query roles when the token has them """
+        client = self._client_with_token(RoleRefreshToken.for_user(self.user))
+        # Solo la consulta del usuario autenticado
+        with self.assertNumQueries(1):
+            response = client.get(reverse('test_premium'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = client.get(reverse('test_cliente'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_permission_without_claim_uses_database(self):
+        """ Test that tokens without the claim still work """
+        client = self._client_with_token(RefreshToken.for_user(self.user))
+        response = client.get(reverse('test_premium'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_role_names_are_memoized(self):
+        """ Test that has_role only queries the roles once per instance """
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(user.has_role('Premium'))
+            self.assertFalse(user.has_role('Admin'))
+
+        admin, _ = Role.objects.get_or_create(name='Admin')
+        user.roles.add(admin)
+        self.assertTrue(user.has_role('Admin'))
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class StatelessAuthenticationTest(APITestCase, URLPatternsTestCase):
+    """ Test module for token-user authentication and token revocation """
+
+    urlpatterns = [
+        path('api/', include('api.urls')),
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='stateless@test.com',
+            password='test',
+            first_name='Ana',
+        )
+        premium, _ = Role.objects.get_or_create(name='Premium')
+        self.user.roles.add(premium)
+        self.refresh = RoleRefreshToken.for_user(self.user)
+
+    def _authenticate(self, refresh=None):
+        token = (refresh or self.refresh).access_token
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION='Bearer ' + str(token))
+        return StatelessJWTAuthentication().authenticate(request)
+
+    def test_user_is_built_from_claims(self):
+        """ Test that authentication does not query the database """
+        with self.assertNumQueries(0):
+            user, _ = self._authenticate()
+            self.assertEqual(user.pk, self.user.pk)
+            self.assertEqual(user.email, 'stateless@test.com')
+            self.assertEqual(user.uid, self.user.uid)
+            self.assertTrue(user.is_authenticated)
+            self.assertTrue(user.has_role('Premium'))
+
+    def test_missing_fields_are_loaded_once(self):
+        """ Test that fields not in the token are loaded lazily in one query """
+        user, _ = self._authenticate()
+        with self.assertNumQueries(1):
+            self.assertEqual(user.first_name, 'Ana')
+            self.assertEqual(user.get_full_name(), 'Ana')
+            self.assertFalse(user.is_deleted)
+
+    def test_token_user_in_queries(self):
+        """ Test that the token user can be used in ORM filters """
+        user, _ = self._authenticate()
+        self.assertTrue(User.objects.filter(pk=user.pk, roles__users=user).exists())
+
+    def test_logout_revokes_access_token(self):
+        """ Test that a token cannot be used after signing out """
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(self.refresh.access_token))
+        self.assertEqual(client.get(reverse('test_premium')).status_code, status.HTTP_200_OK)
+
+        response = client.post(reverse('signout'), {'refresh': str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(client.get(reverse('test_premium')).status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+
+        response = self.client.post(reverse('token_refresh'), {'refresh': str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_tokens_are_revoked(self):
+        """ Test that deactivating a user revokes its tokens """
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self._authenticate()
+
+    def test_token_user_is_read_only(self):
+        """ Test that the token user cannot write its claims back """
+        user, _ = self._authenticate()
+        user.first_name = 'Otra'
+        with self.assertRaises(ValueError):
+            user.save()
+        self.assertEqual(User.objects.get(pk=self.user.pk).first_name, 'Ana')
+
+    def test_removing_users_from_role_revokes_tokens(self):
+        """ Test that reverse-side removal and clear revoke the user tokens """
+        premium = Role.objects.get(name='Premium')
+        premium.users.remove(self.user)
+        with self.assertRaises(AuthenticationFailed):
+            self._authenticate()
+
+        cache.clear()
+        premium.users.add(self.user)
+        refresh = RoleRefreshToken.for_user(self.user)
+        premium.users.clear()
+        with self.assertRaises(AuthenticationFailed):
+            self._authenticate(refresh)
+
+    def test_deleting_role_revokes_tokens(self):
+        """ Test that deleting a role revokes the tokens of its users """
+        Role.objects.get(name='Premium').delete()
+        with self.assertRaises(AuthenticationFailed):
+            self._authenticate()
@@ -0,0 +1,41 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Claim con los nombres de los roles del usuario en el momento de emitir el token
+ROLES_CLAIM = 'roles'
+
+# Claims que permiten servir la petición sin cargar el usuario (ver api.authentication)
+UID_CLAIM = 'uid'
+EMAIL_CLAIM = 'email'
+
+
+class RoleRefreshToken(RefreshToken):
+    """
+    Token de refresco que incluye los roles, el uid y el email del usuario
+
+    El access token generado a partir de él copia los claims, de modo que los
+    permisos pueden comprobar los roles sin consultar la base de datos. Los
+    access tokens obtenidos con /token/refresh/ conservan los roles de cuando
+    se emitió el token de refresco.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[ROLES_CLAIM] = sorted(user.get_role_names())
+        token[UID_CLAIM] = str(user.uid)
+        token[EMAIL_CLAIM] = user.email
+        return token
+
+
+def get_token_roles(token):
+    """
+    Roles incluidos en un token validado
+
+    Returns:
+        frozenset o None: None si el token no tiene el claim (emitido antes
+            de que existiera)
+    """
+    if token is None or not hasattr(token, 'get'):
+        return None
+    roles = token.get(ROLES_CLAIM)
+    return frozenset(roles) if roles is not None else None
@@ -5,6 +5,9 @@ from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from .permissions import IsAdmin, IsPremium, IsCliente
 from rest_framework.viewsets import ModelViewSet
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import RefreshToken
+from .revocation import revoke_token
 
 from .serializers import (
     AuthUserRegistrationSerializer,
@@ -60,6 +63,15 @@ class LogoutView(APIView):
 
     def post(self, request):
         #print("LogoutView ejecutado - Se recibió una solicitud de logout del usuario:", request.user.email)
+        # Revocar el access token usado y, si se envía, el de refresco
+        if request.auth is not None:
+            revoke_token(request.auth)
+        refresh = request.data.get('refresh')
+        if refresh:
+            try:
+                revoke_token(RefreshToken(refresh))
+            except TokenError:
+                pass
         return Response({"detail": "Successfully logged out."}, status=status.HTTP_200_OK)
 
 class AllAccessView(APIView):
@@ -1,5 +1,8 @@
 import os
+import time
 from celery import Celery
+from celery.signals import before_task_publish, celeryd_init, task_postrun, task_prerun
+from kombu import Exchange, Queue
 
 # Establecer el módulo de configuración de Django para Celery
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_rest_role_jwt.settings')
@@ -12,6 +15,94 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 # Descubrir tareas de forma automática en todas las apps registradas
 app.autodiscover_tasks()
 
+
+def _build_queues():
+    """Declara una cola con prioridades por cada familia de tareas configurada"""
+    from django.conf import settings
+
+    queue_config = getattr(settings, 'CELERY_QUEUE_CONFIG', {})
+    return [
+        Queue(
+            name,
+            Exchange(name, type='direct'),
+            routing_key=name,
+            queue_arguments={'x-max-priority': config.get('max_priority', 10)}
+        )
+        for name, config in queue_config.items()
+    ]
+
+
+app.conf.task_queues = _build_queues()
+
+
+def task_options_for_user(user):
+    """
+    Opciones de encolado según el usuario que origina la tarea
+
+    Los usuarios Premium (api.permissions.IsPremium) usan el carril prioritario.
+    """
+    from django.conf import settings
+
+    priority = getattr(settings, 'CELERY_TASK_DEFAULT_PRIORITY', 5)
+    if user is not None and user.is_authenticated and user.has_role('Premium'):
+        priority = getattr(settings, 'CELERY_PREMIUM_TASK_PRIORITY', 9)
+    return {'priority': priority}
+
+
+def enqueue_for_user(task, user, *args, **kwargs):
+    """Encola una tarea con la prioridad que corresponde al usuario"""
+    return task.apply_async(args=args, kwargs=kwargs, **task_options_for_user(user))
+
+
+@celeryd_init.connect
+def configure_worker_for_queue(sender=None, conf=None, options=None, **kwargs):
+    """
+    Aplica la concurrencia y el prefetch de la cola si el worker consume solo una
+
+    Por ejemplo: celery -A django_rest_role_jwt worker -Q documents
+    Los valores pasados explícitamente por línea de comandos tienen prioridad.
+    """
+    from django.conf import settings
+
+    queues = (options or {}).get('queues') or []
+    if isinstance(queues, str):
+        queues = queues.split(',')
+    if len(queues) != 1:
+        return
+
+    config = getattr(settings, 'CELERY_QUEUE_CONFIG', {}).get(queues[0])
+    if not config:
+        return
+    if 'concurrency' in config:
+        conf.worker_concurrency = config['concurrency']
+    if 'prefetch_multiplier' in config:
+        conf.worker_prefetch_multiplier = config['prefetch_multiplier']
+
+
+@before_task_publish.connect
+def stamp_enqueued_at(headers=None, **kwargs):
+    """Marca el momento de publicación para medir la espera en cola"""
+    if headers is not None:
+        headers.setdefault('enqueued_at', time.time())
+
+
+@task_prerun.connect
+def start_task_timer(task=None, **kwargs):
+    task.request.started_at = time.time()
+
+
+@task_postrun.connect
+def record_task_timer(task=None, **kwargs):
+    from .task_metrics import process_memory_high_water_kb, record_task_latency
+
+    started_at = getattr(task.request, 'started_at', None)
+    if started_at is None:
+        return
+    enqueued_at = getattr(task.request, 'enqueued_at', None)
+    wait = started_at - enqueued_at if enqueued_at else None
+    record_task_latency(task.name, time.time() - started_at, wait, process_memory_high_water_kb())
+
+
 @app.task(bind=True)
 def debug_task(self):
-    print(f'Request: {self.request!r}')
\ No newline at end of file
+    print(f'Request: {self.request!r}')
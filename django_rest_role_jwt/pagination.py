@@ -0,0 +1,204 @@
+"""
+Paginación por cursor (keyset) para listados grandes
+
+En lugar de OFFSET, cada página se pide a partir de los valores de ordenación
+de la última fila de la anterior, de modo que el coste de una página no
+depende de su profundidad. La ordenación debe ser única y estar cubierta por
+un índice, p. ej. (updated_at, id):
+
+    class Meta:
+        indexes = [models.Index(fields=['owner', '-updated_at', '-id'])]
+
+Las peticiones con ?page= se siguen atendiendo con PageNumberPagination para
+no romper a los clientes existentes.
+"""
+import base64
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación keyset sobre una ordenación estable
+
+    Parámetros de la petición:
+        cursor: Cursor opaco devuelto en 'next' o 'previous'
+        page_size: Tamaño de página (hasta max_page_size)
+        count: 'false' para omitir el COUNT(*) del total
+    """
+    ordering = ('-updated_at', '-id')
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    page_query_param = 'page'
+    invalid_cursor_message = 'Cursor no válido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.fallback = None
+
+        # Compatibilidad con los clientes que siguen paginando por número
+        if self.page_query_param in request.query_params:
+            self.fallback = PageNumberPagination()
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        self.page_size = self.get_page_size(request)
+        self.ordering = getattr(view, 'keyset_ordering', self.ordering)
+        self.model = queryset.model
+
+        self.count = None
+        if self._wants_count(request):
+            self.count = queryset.count()
+
+        values, reverse = self.decode_cursor(request)
+        ordering = self._reverse_ordering() if reverse else self.ordering
+
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._after(ordering, values))
+
+        # Una fila extra indica si hay más resultados en esa dirección
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.page = rows
+        self.has_next = has_more if not reverse else values is not None
+        self.has_previous = (values is not None) if not reverse else has_more
+        return rows
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+
+        payload = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data
+        }
+        if self.count is not None:
+            payload = {'count': self.count, **payload}
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'count': {'type': 'integer', 'nullable': True},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self._link(self.page[0], reverse=True)
+
+    def encode_cursor(self, values, reverse=False):
+        """Codifica los valores de ordenación de una fila en un cursor opaco"""
+        payload = {'v': [self._serialize(value) for value in values]}
+        if reverse:
+            payload['r'] = 1
+        raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request):
+        """
+        Devuelve (valores, reverse) del cursor de la petición
+
+        Raises:
+            NotFound: Si el cursor no es válido para esta ordenación
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            raw_values = payload['v']
+            if len(raw_values) != len(self.ordering):
+                raise ValueError('Número de valores incorrecto')
+            values = [
+                self.model._meta.get_field(name.lstrip('-')).to_python(value)
+                for name, value in zip(self.ordering, raw_values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+        return values, bool(payload.get('r'))
+
+    def row_values(self, row):
+        """Valores de ordenación de una instancia"""
+        return [getattr(row, name.lstrip('-')) for name in self.ordering]
+
+    def _link(self, row, reverse):
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        cursor = self.encode_cursor(self.row_values(row), reverse=reverse)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def _wants_count(self, request):
+        value = request.query_params.get(self.count_query_param, 'true')
+        return value.lower() not in ('0', 'false', 'no')
+
+    def _reverse_ordering(self):
+        return tuple(name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering)
+
+    def _after(self, ordering, values):
+        """
+        Condición "fila posterior al cursor" en orden lexicográfico
+
+        Para (-updated_at, -id) equivale a
+        updated_at < v0 OR (updated_at = v0 AND id < v1).
+        """
+        condition = Q()
+        equal = {}
+        for name, value in zip(ordering, values):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{field}__{lookup}': value})
+            equal[field] = value
+        return condition
+
+    @staticmethod
+    def _serialize(value):
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        if isinstance(value, (int, float, str)) or value is None:
+            return value
+        return str(value)
+
+
+class UpdatedAtKeysetPagination(KeysetPagination):
+    """Presentaciones y documentos: los modificados recientemente primero"""
+    ordering = ('-updated_at', '-id')
+
+
+class CreatedAtKeysetPagination(KeysetPagination):
+    """Prompts y solicitudes de generación: los más recientes primero"""
+    ordering = ('-created_at', '-id')
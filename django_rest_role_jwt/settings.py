@@ -106,8 +106,10 @@ DATABASES = {
 }
 
 REST_FRAMEWORK = {
+    # Las vistas de solo lectura pueden usar
+    # api.authentication.StatelessJWTAuthentication para no cargar el usuario
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.RevocableJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -170,6 +172,9 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': False,
     'AUTH_HEADER_TYPES': ('Bearer',),
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
+    # Los tokens incluyen los roles del usuario (claim "roles")
+    'TOKEN_OBTAIN_SERIALIZER': 'api.serializers.RoleTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'api.serializers.RevocableTokenRefreshSerializer',
 }
 
 # Configuración para archivos media
@@ -179,5 +184,138 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # Tamaño máximo de subida de archivos (10MB)
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024
 
+# Extracción de PDF en paralelo por rangos de páginas. PDF_PARSER_WORKERS se
+# limita a las CPUs entre la concurrencia de la cola documents (None: ese límite)
+PDF_PARSER_PARALLEL = True
+PDF_PARSER_WORKERS = None
+PDF_PARSER_MAX_PAGES = 1000
+PDF_PARSER_TIMEOUT = 120  # segundos por documento
+
+# Caché de extracciones por hash de contenido: LRU por proceso worker y, para
+# las entradas de hasta DOCUMENT_CACHE_SHARED_MAX_BYTES, la caché compartida
+DOCUMENT_CACHE_MAX_ENTRIES = 256
+DOCUMENT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+DOCUMENT_CACHE_SHARED_MAX_BYTES = 1024 * 1024
+DOCUMENT_CACHE_SHARED_TIMEOUT = 7 * 24 * 60 * 60
+
+# Límites de recursos por documento; al alcanzarlos la extracción se corta
+# y se guarda el resultado parcial (None desactiva un límite)
+DOCUMENT_EXTRACTION_LIMITS = {
+    'max_decompressed_bytes': 200 * 1024 * 1024,
+    'max_compression_ratio': 100,
+    'max_pages': 1000,
+    'max_rows': 200_000,
+    'max_cells': 5_000_000,
+    'max_seconds': 120,
+}
+
+# Extracción incremental (DOCX, TXT): texto y párrafos que se guardan del documento;
+# de lo que pase de ahí solo se guardan los recuentos
+DOCUMENT_STREAM_MAX_TEXT_CHARS = 5_000_000
+DOCUMENT_STREAM_MAX_PARAGRAPHS = 5000
+
+# Documentos por bloque en process_documents_batch y segundos que se conserva
+# el progreso de cada lote en la caché compartida
+DOCUMENT_BATCH_CHUNK_SIZE = 50
+DOCUMENT_BATCH_PROGRESS_TIMEOUT = 24 * 60 * 60
+
+# Series de gráficos extraídas de hojas de cálculo
+CHART_MAX_POINTS = 500
+CHART_DOWNSAMPLING_METHOD = 'lttb'  # 'lttb' o 'minmax'
+CHART_FULL_RESOLUTION = False
+
+# Caché de Django (métricas de tareas, progreso, tokens revocados...). Por
+# defecto es local al proceso; con varios workers hay que apuntarla a una
+# caché compartida, p. ej. DJANGO_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# y DJANGO_CACHE_LOCATION=redis://... (con una caché local el arranque lo avisa)
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', ''),
+    }
+}
+
+# Representación serializada del detalle de presentaciones (segundos)
+PRESENTATION_CACHE_TIMEOUT = 60 * 60
+
+# Segundos que se conserva el progreso de una aplicación de tema en bloque
+THEME_PROGRESS_TIMEOUT = 24 * 60 * 60
+
+# Miniaturas de presentaciones: tamaño en px y ventana para agrupar ediciones
+THUMBNAIL_SIZE = (320, 180)
+THUMBNAIL_DEBOUNCE_SECONDS = 10
+
+# Celery: una cola por familia de tareas para que los análisis largos de
+# documentos y la generación con IA no bloqueen las transcripciones cortas
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'amqp://guest@localhost//')
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_QUEUE_CONFIG = {
+    'default': {'concurrency': 2, 'prefetch_multiplier': 4, 'max_priority': 10},
+    'documents': {'concurrency': 2, 'prefetch_multiplier': 1, 'max_priority': 10},
+    'ai': {'concurrency': 4, 'prefetch_multiplier': 1, 'max_priority': 10},
+    'voice': {'concurrency': 4, 'prefetch_multiplier': 4, 'max_priority': 10},
+}
+CELERY_TASK_ROUTES = {
+    'documents.tasks.*': {'queue': 'documents'},
+    'ia.tasks.generate_presentation_from_prompt': {'queue': 'ai'},
+    'ia.tasks.process_voice_input': {'queue': 'voice'},
+}
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_DEFAULT_PRIORITY = 5
+CELERY_PREMIUM_TASK_PRIORITY = 9
+# Prioridades con el transporte Redis (en RabbitMQ se usa x-max-priority)
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'priority_steps': list(range(10)),
+    'queue_order_strategy': 'priority',
+}
+
+# Generación de presentaciones con IA
+# Proveedor real, p. ej.:
+#   AI_PROVIDER = 'ia.adapters.http_provider.ChatCompletionsProvider'
+#   AI_PROVIDER_OPTIONS = {'model': 'gpt-4o-mini', 'max_concurrency': 8, 'rate_per_second': 5}
+AI_PROVIDER = os.environ.get('AI_PROVIDER', 'ia.adapters.llm_provider.StubProvider')
+AI_PROVIDER_OPTIONS = {}
+AI_MAX_SLIDES = 10
+AI_MAX_CONCURRENCY = 4  # llamadas simultáneas al modelo por solicitud
+AI_CONTEXT_MAX_CHARS = 12000  # texto del documento adjunto incluido en el prompt
+AI_CHECKPOINT_TIMEOUT = 24 * 60 * 60
+
+# Caché de respuestas del modelo (por proceso worker, por usuario).
+# AI_RESPONSE_CACHE_SIMILARITY es la similitud mínima para reutilizar prompts
+# casi idénticos, p. ej. 0.9 (None la desactiva: solo coincidencias exactas)
+AI_RESPONSE_CACHE_MAX_ENTRIES = 1024
+AI_RESPONSE_CACHE_TTL = 24 * 60 * 60
+AI_RESPONSE_CACHE_SIMILARITY = None
+
+# Transcripción de voz por fragmentos. Backend real, p. ej.:
+#   VOICE_TRANSCRIPTION_BACKEND = 'ia.adapters.transcription.WhisperAPIBackend'
+VOICE_STREAMING_TRANSCRIPTION = True
+VOICE_TRANSCRIPTION_BACKEND = os.environ.get(
+    'VOICE_TRANSCRIPTION_BACKEND', 'ia.adapters.transcription.StubTranscriptionBackend')
+VOICE_TRANSCRIPTION_OPTIONS = {}
+VOICE_CHUNK_SECONDS = 30
+VOICE_CHUNK_OVERLAP_SECONDS = 1.0
+VOICE_SILENCE_SEARCH_SECONDS = 2.0  # margen para alinear cada corte a un silencio
+VOICE_MAX_CONCURRENCY = 4
+
+# Ingesta de audio: todo se normaliza a WAV mono 16 kHz antes de transcribir.
+# Los formatos comprimidos necesitan ffmpeg (en el PATH o VOICE_FFMPEG_BINARY);
+# sin él se transcriben de una vez. VOICE_DURATION_POLICY: 'reject' o 'trim'
+VOICE_TARGET_SAMPLE_RATE = 16000
+VOICE_MAX_DURATION_SECONDS = 15 * 60
+VOICE_DURATION_POLICY = 'reject'
+VOICE_FFMPEG_BINARY = os.environ.get('VOICE_FFMPEG_BINARY')
+VOICE_UPLOAD_MAX_BYTES = 100 * 1024 * 1024
+
+# Canal de estado de las entradas de voz (caché compartida + long-poll).
+# Cada long-poll ocupa un hilo de Gunicorn mientras espera, así que
+# VOICE_STATUS_MAX_WAIT debe ser corto frente al número de hilos disponibles.
+# VOICE_PROCESSING_LEASE: segundos sin progreso tras los que una entrada en
+# PROCESSING se considera abandonada; su reentrega espera a ese vencimiento
+VOICE_STATUS_TIMEOUT = 60 * 60
+VOICE_STATUS_MAX_WAIT = 10  # segundos como máximo que espera una petición
+VOICE_PROCESSING_LEASE = 10 * 60
+
 # Configuración para integración con servicios de IA
 # OPENAI_API_KEY = 'tu-clave-api'
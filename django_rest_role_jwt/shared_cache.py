@@ -0,0 +1,40 @@
+"""
+Comprobación de la caché compartida
+
+Varias funciones guardan estado en la caché por defecto y lo leen desde otros
+procesos (workers de Gunicorn y de Celery): versiones de las presentaciones,
+lista de tokens revocados, canal de estado de voz, progreso de tareas,
+checkpoints de generación y métricas de tareas. Con una caché local a cada
+proceso (LocMemCache, la de por defecto) cada worker ve su propia copia, lo
+que solo es correcto con un único proceso; el arranque de cada proceso
+(ApiConfig.ready) lo avisa en el log.
+"""
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Backends cuyo contenido no ven los demás procesos
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_shared_cache(alias='default'):
+    """Indica si la caché alias la comparten todos los procesos"""
+    backend = settings.CACHES.get(alias, {}).get('BACKEND', '')
+    return backend not in LOCAL_CACHE_BACKENDS
+
+
+def warn_if_local_cache():
+    """Avisa si la caché por defecto es local al proceso"""
+    if is_shared_cache():
+        return
+    logger.warning(
+        f"La caché por defecto ({settings.CACHES['default']['BACKEND']}) es local a cada "
+        f"proceso: con varios workers, la revocación de tokens, el estado de voz, el "
+        f"progreso de tareas y los checkpoints no se ven entre procesos. Configura un "
+        f"backend compartido (RedisCache, Memcached, DatabaseCache) con DJANGO_CACHE_BACKEND"
+    )
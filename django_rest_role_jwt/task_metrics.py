@@ -0,0 +1,190 @@
+"""
+Muestras de latencia de las tareas de Celery en la caché compartida
+
+Cada proceso worker escribe sus muestras en una clave propia
+(celery:metrics:<tarea>:<host>:<pid>), de modo que el get/append/set de la
+lista no compite con otros procesos y no se pierden muestras con ningún
+backend de caché. Los registros de tareas y de escritores son conjuntos que
+cada proceso vuelve a completar si falta su entrada, así que una escritura
+concurrente perdida se corrige en la siguiente muestra.
+
+ProcessCounters aplica el mismo esquema a contadores de eventos frecuentes
+(aciertos y fallos de las cachés).
+"""
+import math
+import os
+import socket
+import threading
+import time
+
+from django.core.cache import cache
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Número de muestras que se conservan por tarea y proceso
+MAX_SAMPLES = 500
+SAMPLES_TTL = 24 * 60 * 60
+
+TASK_NAMES_KEY = 'celery:metrics:tasks'
+
+# Segundos entre publicaciones de los contadores de cada proceso
+COUNTERS_FLUSH_INTERVAL = 30
+
+# Serializa las escrituras de los hilos de un mismo proceso
+_lock = threading.Lock()
+
+
+def _samples_key(task_name):
+    return f"celery:metrics:{task_name}"
+
+
+def _writer_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _register(key, member):
+    """Añade member al conjunto guardado en key si no está ya"""
+    members = cache.get(key, set())
+    if member not in members:
+        members.add(member)
+        cache.set(key, members, SAMPLES_TTL)
+
+
+def process_memory_high_water_kb():
+    """
+    Pico de memoria residente del proceso en KB (None si no está disponible)
+
+    Es ru_maxrss: el máximo desde que arrancó el proceso, no el de la tarea o
+    extracción en curso. En un worker que ya procesó un documento grande el
+    valor se queda en ese pico aunque las tareas siguientes usen menos.
+    """
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def record_task_latency(task_name, runtime, wait=None, memory_kb=None):
+    """
+    Guarda una muestra de latencia de una tarea en la caché compartida
+
+    Args:
+        task_name: Nombre de la tarea
+        runtime: Tiempo de ejecución en segundos
+        wait: Tiempo en cola (desde la publicación hasta el inicio) en segundos
+        memory_kb: Pico de memoria residente del proceso worker desde que
+            arrancó (no es un pico por tarea)
+    """
+    writer = _writer_id()
+    key = f"{_samples_key(task_name)}:{writer}"
+    with _lock:
+        samples = cache.get(key, [])
+        samples.append((round(runtime, 4), round(wait, 4) if wait is not None else None))
+        cache.set(key, samples[-MAX_SAMPLES:], SAMPLES_TTL)
+
+        if memory_kb is not None:
+            memory_key = f"{key}:memory"
+            if memory_kb > cache.get(memory_key, 0):
+                cache.set(memory_key, memory_kb, SAMPLES_TTL)
+
+        _register(f"{_samples_key(task_name)}:writers", writer)
+        _register(TASK_NAMES_KEY, task_name)
+
+
+def get_task_latency_stats(percentiles=(50, 95, 99)):
+    """
+    Calcula percentiles de tiempo de ejecución y de espera en cola por tarea
+
+    Returns:
+        dict: {nombre_tarea: {'count', 'runtime': {p: s}, 'wait': {p: s},
+        'process_memory_high_water_kb'}}
+    """
+    stats = {}
+    for task_name in sorted(cache.get(TASK_NAMES_KEY, set())):
+        keys = [
+            f"{_samples_key(task_name)}:{writer}"
+            for writer in sorted(cache.get(f"{_samples_key(task_name)}:writers", set()))
+        ]
+        stored = cache.get_many(keys + [f"{key}:memory" for key in keys])
+        samples = [sample for key in keys for sample in stored.get(key, [])]
+        if not samples:
+            continue
+        memory = [stored[f"{key}:memory"] for key in keys if f"{key}:memory" in stored]
+        runtimes = [runtime for runtime, _ in samples]
+        waits = [wait for _, wait in samples if wait is not None]
+        stats[task_name] = {
+            'count': len(samples),
+            'runtime': {p: _percentile(runtimes, p) for p in percentiles},
+            'wait': {p: _percentile(waits, p) for p in percentiles} if waits else {},
+            'process_memory_high_water_kb': max(memory) if memory else None
+        }
+    return stats
+
+
+class ProcessCounters:
+    """
+    Contadores por proceso publicados periódicamente en la caché compartida
+
+    incr() solo suma en memoria; como mucho cada flush_interval segundos el
+    proceso escribe sus totales acumulados en una clave propia
+    (<prefix>:<host>:<pid>). Así una búsqueda en caché no cuesta ninguna
+    escritura y no hay incr concurrentes sobre la misma clave (que algunos
+    backends, como DatabaseCache, no hacen de forma atómica). totals() suma
+    lo publicado por todos los procesos.
+
+    Args:
+        prefix: Prefijo de las claves en la caché
+        events: Nombres de los contadores
+        flush_interval: Segundos entre publicaciones
+    """
+
+    def __init__(self, prefix, events, flush_interval=COUNTERS_FLUSH_INTERVAL):
+        self.prefix = prefix
+        self.events = tuple(events)
+        self.flush_interval = flush_interval
+        self._counts = dict.fromkeys(self.events, 0)
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def incr(self, event):
+        """Suma uno al contador y publica los totales si toca"""
+        with self._lock:
+            self._counts[event] += 1
+            now = time.monotonic()
+            due = now - self._flushed_at >= self.flush_interval
+            if due:
+                self._flushed_at = now
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Publica los totales de este proceso en su clave"""
+        writer = _writer_id()
+        with self._lock:
+            counts = dict(self._counts)
+        cache.set(f"{self.prefix}:{writer}", counts, SAMPLES_TTL)
+        _register(f"{self.prefix}:writers", writer)
+
+    def totals(self):
+        """
+        Totales publicados por todos los procesos
+
+        Returns:
+            dict: {evento: total}
+        """
+        writers = sorted(cache.get(f"{self.prefix}:writers", set()))
+        stored = cache.get_many([f"{self.prefix}:{writer}" for writer in writers])
+        totals = dict.fromkeys(self.events, 0)
+        for counts in stored.values():
+            for event in self.events:
+                totals[event] += counts.get(event, 0)
+        return totals
+
+
+def _percentile(values, percentile):
+    """Percentil por el método del rango más cercano"""
+    ordered = sorted(values)
+    index = max(0, math.ceil(percentile / 100 * len(ordered)) - 1)
+    return ordered[index]
@@ -0,0 +1,56 @@
+from django.http import Http404
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from api.permissions import IsAdmin
+
+
+class DocumentBatchView(APIView):
+    """
+    Lanza el procesamiento de un lote de documentos
+
+    POST /documents/batches/
+        {"document_ids": [...], "chunk_size": 50}
+
+    Responde 202 con el id del lote, cuyo progreso se consulta en
+    /documents/batches/<batch_id>/. Los usuarios que no son Admin solo pueden
+    incluir sus propios documentos; los demás se ignoran.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        from .models import Document
+        from .serializers import DocumentBatchSerializer
+        from .tasks import start_documents_batch
+
+        serializer = DocumentBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        documents = Document.objects.filter(id__in=data['document_ids'])
+        if not IsAdmin().has_permission(request, self):
+            documents = documents.filter(user=request.user)
+        document_ids = list(documents.values_list('id', flat=True))
+
+        batch_id = start_documents_batch(document_ids, request.user, data.get('chunk_size'))
+        return Response({'batch_id': batch_id, 'documents': len(document_ids), 'status': 'queued'},
+                        status=status.HTTP_202_ACCEPTED)
+
+
+class DocumentBatchProgressView(APIView):
+    """Progreso de un lote de documentos (solo para quien lo lanzó o un Admin)"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, batch_id):
+        from .tasks import get_batch_progress
+
+        progress = get_batch_progress(batch_id)
+        if progress is None or not self._can_view(request, progress):
+            raise Http404
+
+        progress.pop('user_id', None)
+        return Response(progress)
+
+    def _can_view(self, request, progress):
+        return progress['user_id'] == request.user.pk or IsAdmin().has_permission(request, self)
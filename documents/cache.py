@@ -0,0 +1,256 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from django_rest_role_jwt.task_metrics import ProcessCounters
+from .parsers.registry import get_parser_version
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+SHARED_KEY = 'documents:extraction:{key}'
+GENERATION_KEY = 'documents:extraction:generation:{file_type}'
+METRICS_KEY = 'documents:extraction:metrics'
+METRIC_EVENTS = ('hits', 'shared_hits', 'misses')
+
+# Aciertos y fallos de todos los procesos (se publican cada pocos segundos)
+_metrics = ProcessCounters(METRICS_KEY, METRIC_EVENTS)
+
+
+def hash_file(file):
+    """
+    Calcula el SHA-256 del contenido de un archivo leyéndolo por bloques
+
+    Args:
+        file: FieldFile, objeto tipo archivo o bytes
+
+    Returns:
+        str: Digest hexadecimal
+    """
+    digest = hashlib.sha256()
+
+    if isinstance(file, (bytes, bytearray, memoryview)):
+        digest.update(file)
+        return digest.hexdigest()
+
+    if hasattr(file, 'chunks'):
+        for chunk in file.chunks(chunk_size=HASH_CHUNK_SIZE):
+            digest.update(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+    else:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            if not chunk:
+                break
+            digest.update(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+
+    # Dejar el archivo listo para que el parser lo lea desde el principio
+    if hasattr(file, 'seek'):
+        file.seek(0)
+
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """
+    Caché de resultados de extracción en dos niveles, direccionada por contenido
+
+    El primer nivel es un LRU en el proceso; el segundo, la caché compartida
+    de Django, para que un documento extraído en un worker no se vuelva a
+    extraer en otro. Las claves combinan el tipo de archivo, la versión del
+    parser, una generación compartida (que invalidate() incrementa) y el
+    SHA-256 del archivo. Los resultados se guardan serializados en JSON, de
+    modo que el tamaño de cada entrada es conocido y quien lee no puede
+    modificar la copia almacenada.
+
+    Args:
+        max_entries: Entradas como máximo en el LRU del proceso
+        max_bytes: Bytes como máximo en el LRU del proceso
+        shared_max_bytes: Tamaño máximo de una entrada en la caché compartida
+            (0 desactiva el segundo nivel)
+        shared_timeout: Segundos de validez en la caché compartida
+        generation_ttl: Segundos que el proceso reutiliza las generaciones
+            leídas; una invalidación en otro proceso se nota tras ese tiempo
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024,
+                 shared_max_bytes=1024 * 1024, shared_timeout=7 * 24 * 60 * 60,
+                 generation_ttl=5):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.shared_max_bytes = shared_max_bytes
+        self.shared_timeout = shared_timeout
+        self.generation_ttl = generation_ttl
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def make_key(self, file_type, digest):
+        """
+        Construye la clave a partir del tipo de archivo y el hash del contenido
+
+        Incluye la versión del parser registrada en documents.parsers.registry
+        y la generación compartida del tipo de archivo: al cambiar cualquiera
+        de las dos, las entradas antiguas dejan de coincidir en todos los
+        procesos y se descartan por LRU o por caducidad.
+        """
+        version = get_parser_version(file_type)
+        return f"{file_type}:{version}:{self._generation(file_type)}:{digest}"
+
+    def _generation(self, file_type):
+        """Generación global y del tipo, leída como mucho cada generation_ttl segundos"""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._generations.get(file_type)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+
+        keys = [GENERATION_KEY.format(file_type='*'), GENERATION_KEY.format(file_type=file_type)]
+        generations = cache.get_many(keys)
+        generation = '.'.join(str(generations.get(key, 0)) for key in keys)
+        with self._lock:
+            self._generations[file_type] = (generation, now + self.generation_ttl)
+        return generation
+
+    def get(self, key):
+        """
+        Devuelve el resultado almacenado o None
+
+        Se busca primero en el proceso y después en la caché compartida; un
+        acierto compartido se copia al LRU del proceso.
+        """
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if payload is not None:
+            _record_metric('hits')
+            return json.loads(payload)
+
+        payload = cache.get(SHARED_KEY.format(key=key)) if self.shared_max_bytes else None
+        if payload is None:
+            with self._lock:
+                self.misses += 1
+            _record_metric('misses')
+            return None
+
+        with self._lock:
+            self.shared_hits += 1
+            self._store(key, payload)
+        _record_metric('shared_hits')
+        return json.loads(payload)
+
+    def set(self, key, content_data):
+        """Almacena un resultado en los dos niveles, expulsando las entradas menos usadas"""
+        payload = json.dumps(content_data, default=str)
+        size = len(payload)
+        if size <= self.shared_max_bytes:
+            cache.set(SHARED_KEY.format(key=key), payload, self.shared_timeout)
+        if size > self.max_bytes:
+            logger.info(f"Resultado de extracción demasiado grande para la caché ({size} bytes)")
+            return
+
+        with self._lock:
+            self._store(key, payload)
+
+    def invalidate(self, file_type=None):
+        """
+        Invalida entradas de la caché en todos los procesos
+
+        Incrementa la generación compartida (de file_type o global), con lo
+        que las claves cambian en todos los workers (en este proceso al
+        momento, en los demás tras generation_ttl), y vacía el LRU local.
+
+        Args:
+            file_type: Si se indica, solo se invalidan las entradas de ese parser
+
+        Returns:
+            int: Número de entradas eliminadas del LRU de este proceso
+        """
+        generation_key = GENERATION_KEY.format(file_type=file_type or '*')
+        try:
+            cache.incr(generation_key)
+        except ValueError:
+            cache.set(generation_key, 1, None)
+
+        with self._lock:
+            self._generations.clear()
+            if file_type is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                self._size = 0
+                return removed
+
+            prefix = f"{file_type}:"
+            keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in keys:
+                self._size -= len(self._entries.pop(key))
+            return len(keys)
+
+    def stats(self):
+        """Devuelve los contadores de uso de la caché en este proceso"""
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits + self.shared_hits) / lookups if lookups else 0.0
+            }
+
+    def _store(self, key, payload):
+        """Guarda en el LRU del proceso (con el lock adquirido)"""
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= len(previous)
+
+        self._entries[key] = payload
+        self._size += len(payload)
+
+        while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+            self.evictions += 1
+
+
+def _record_metric(event):
+    """Cuenta el evento en el proceso (se publica periódicamente)"""
+    _metrics.incr(event)
+
+
+def get_extraction_cache_metrics():
+    """
+    Aciertos (locales y compartidos) y fallos acumulados por todos los procesos
+
+    Cada proceso publica sus contadores cada pocos segundos, así que los
+    eventos más recientes pueden no estar incluidos todavía.
+
+    Returns:
+        dict: Contadores y tasa de acierto
+    """
+    counters = _metrics.totals()
+    lookups = sum(counters.values())
+    counters['hit_rate'] = (counters['hits'] + counters['shared_hits']) / lookups if lookups else 0.0
+    return counters
+
+
+extraction_cache = ExtractionCache(
+    max_entries=getattr(settings, 'DOCUMENT_CACHE_MAX_ENTRIES', 256),
+    max_bytes=getattr(settings, 'DOCUMENT_CACHE_MAX_BYTES', 64 * 1024 * 1024),
+    shared_max_bytes=getattr(settings, 'DOCUMENT_CACHE_SHARED_MAX_BYTES', 1024 * 1024),
+    shared_timeout=getattr(settings, 'DOCUMENT_CACHE_SHARED_TIMEOUT', 7 * 24 * 60 * 60)
+)
@@ -0,0 +1,58 @@
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+EAGER_IMPORTS = (
+    'import documents.parsers.pdf_parser, documents.parsers.word_parser, '
+    'documents.parsers.excel_parser'
+)
+LAZY_IMPORTS = 'import documents.parsers.registry'
+
+SETUP = (
+    "import django, os; "
+    "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_rest_role_jwt.settings'); "
+    "django.setup(); "
+    "import time; start = time.perf_counter(); "
+)
+
+
+class Command(BaseCommand):
+    help = 'Compara el tiempo de arranque importando los parsers de forma eager o lazy'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=10,
+                            help='Número de intérpretes lanzados por modo')
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        results = {
+            'eager': self._measure(EAGER_IMPORTS, repeat),
+            'lazy': self._measure(LAZY_IMPORTS, repeat),
+        }
+
+        for mode, samples in results.items():
+            self.stdout.write(
+                f"{mode:>5}: mediana {statistics.median(samples):8.1f} ms  "
+                f"mín {min(samples):8.1f} ms  máx {max(samples):8.1f} ms"
+            )
+
+        saved = statistics.median(results['eager']) - statistics.median(results['lazy'])
+        self.stdout.write(self.style.SUCCESS(f"Ahorro por proceso: {saved:.1f} ms"))
+
+    def _measure(self, statement, repeat):
+        """Lanza un intérprete nuevo por muestra y mide solo las importaciones"""
+        code = SETUP + statement + "; print((time.perf_counter() - start) * 1000)"
+        samples = []
+        for _ in range(repeat):
+            output = subprocess.run(
+                [sys.executable, '-c', code],
+                cwd=settings.BASE_DIR,
+                capture_output=True,
+                text=True,
+                check=True
+            ).stdout
+            samples.append(float(output.strip().splitlines()[-1]))
+        return samples
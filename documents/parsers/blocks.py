@@ -0,0 +1,114 @@
+"""
+Construcción de resultados acotados a partir de parsers incrementales
+
+Los parsers incrementales (stream_docx, stream_txt) producen bloques según
+van leyendo el archivo. collect_blocks() los consume uno a uno y solo guarda
+el texto hasta max_text_chars y una muestra de max_paragraphs párrafos y
+encabezados, más los recuentos totales, de modo que la memoria no depende
+del tamaño del documento.
+
+Bloques admitidos:
+    {'type': 'metadata', 'metadata': {...}}
+    {'type': 'paragraph' | 'heading', 'text': str, 'level': int, 'position': int}
+    {'type': 'table', 'data': [[...]], 'position': int, 'block_index': int}
+
+Los bloques de texto pueden indicar 'separator' (por defecto un salto de
+línea), que se añade tras su texto al componer el texto completo.
+"""
+import logging
+
+from .limits import ExtractionBudget, LimitExceeded
+
+logger = logging.getLogger(__name__)
+
+# Valores por defecto de settings.DOCUMENT_STREAM_MAX_TEXT_CHARS y
+# settings.DOCUMENT_STREAM_MAX_PARAGRAPHS
+MAX_TEXT_CHARS = 5_000_000
+MAX_PARAGRAPHS = 5000
+
+
+def collect_blocks(blocks, max_text_chars=MAX_TEXT_CHARS, max_paragraphs=MAX_PARAGRAPHS):
+    """
+    Consume los bloques de un parser incremental en un resultado acotado
+
+    Args:
+        blocks: Iterable de bloques (ver el docstring del módulo)
+        max_text_chars: Caracteres de texto que se conservan (None: todos)
+        max_paragraphs: Párrafos y encabezados que se conservan (None: todos)
+
+    Returns:
+        dict: Resultado con el mismo formato que los parsers completos. En
+        metadata se añaden 'paragraph_count', 'heading_count', 'table_count'
+        y 'char_count' totales y 'text_sampled' si el texto o los párrafos
+        se han recortado.
+    """
+    result = {
+        'text': '',
+        'metadata': {},
+        'paragraphs': [],
+        'headings': [],
+        'tables': []
+    }
+
+    # El budget solo registra los límites que alcance el parser y las métricas
+    budget = ExtractionBudget()
+    counts = {'paragraph_count': 0, 'heading_count': 0, 'table_count': 0, 'char_count': 0}
+    text_parts = []
+    text_chars = 0
+
+    try:
+        for block in blocks:
+            kind = block['type']
+            if kind == 'metadata':
+                result['metadata'].update(block['metadata'])
+                continue
+
+            if kind == 'table':
+                counts['table_count'] += 1
+                result['tables'].append({
+                    'position': block['position'],
+                    'block_index': block['block_index'],
+                    'data': block['data']
+                })
+                continue
+
+            text = block['text'] + block.get('separator', '\n')
+            counts['paragraph_count'] += 1
+            counts['char_count'] += len(text)
+            if max_text_chars is None or text_chars < max_text_chars:
+                if max_text_chars is not None:
+                    text = text[:max_text_chars - text_chars]
+                text_parts.append(text)
+                text_chars += len(text)
+
+            is_heading = kind == 'heading'
+            if is_heading:
+                counts['heading_count'] += 1
+                if max_paragraphs is None or len(result['headings']) < max_paragraphs:
+                    result['headings'].append({
+                        'level': block['level'],
+                        'text': block['text'],
+                        'position': block['position']
+                    })
+
+            if max_paragraphs is None or len(result['paragraphs']) < max_paragraphs:
+                result['paragraphs'].append({
+                    'text': block['text'],
+                    'is_heading': is_heading
+                })
+
+    except LimitExceeded as e:
+        budget.mark_hit(result, e)
+
+    except Exception as e:
+        logger.error(f"Error extracting blocks: {str(e)}")
+        result['error'] = str(e)
+        return result
+
+    result['text'] = ''.join(text_parts)
+    result['metadata'].update(counts)
+    result['metadata']['text_sampled'] = (
+        text_chars < counts['char_count']
+        or len(result['paragraphs']) < counts['paragraph_count']
+    )
+    return budget.finish(result)
@@ -1,105 +1,337 @@
 import pandas as pd
-from io import BytesIO
 import logging
-import json
 import numpy as np
+from .limits import ExtractionBudget, LimitExceeded, check_zip_archive, open_binary
 
 logger = logging.getLogger(__name__)
 
 
-# Helper para serializar tipos de NumPy a tipos Python nativos
-class NpEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, np.integer):
-            return int(obj)
-        if isinstance(obj, np.floating):
-            return float(obj)
-        if isinstance(obj, np.ndarray):
-            return obj.tolist()
-        return super(NpEncoder, self).default(obj)
-
-
-def extract_data_from_xlsx(file):
+def extract_data_from_xlsx(file, columnar=False, chart_max_points=500,
+                           chart_method='lttb', full_resolution_charts=False, limits=None):
     """
     Extrae datos y estructura de un archivo Excel
 
+    Cada hoja se lee una sola vez y se convierte columna a columna desde los
+    arrays de NumPy a tipos JSON nativos. 'sheets' y 'tables' comparten la
+    misma lista de datos en lugar de guardar copias.
+
     Args:
         file: Objeto archivo Excel
+        columnar: Si es True, 'data' contiene una lista por columna en lugar
+            de una lista por fila (evita la transposición)
+        chart_max_points: Número máximo de puntos por serie de gráfico
+        chart_method: Método de reducción de series ('lttb' o 'minmax')
+        full_resolution_charts: Si es True, las series se guardan completas
+        limits: ExtractionLimits opcional (tamaño descomprimido, filas,
+            celdas y tiempo); al alcanzarlos se devuelve el resultado parcial
 
     Returns:
-        dict: Diccionario con hojas, tablas y datos para gráficos
+        dict: Diccionario con hojas, tablas, datos para gráficos y los ejes X
+        compartidos por las series completas ('chart_axes')
     """
     result = {
         'sheets': [],
         'tables': [],
-        'chart_data': []
+        'chart_data': [],
+        'chart_axes': []
     }
 
+    budget = ExtractionBudget(limits)
+
     try:
-        # Manejar diferentes tipos de entrada
-        if hasattr(file, 'read'):
-            file_content = file.read()
-            excel_file = BytesIO(file_content)
-        else:
-            excel_file = BytesIO(file)
+        # Manejar diferentes tipos de entrada sin copiar el contenido
+        excel_file = open_binary(file)
+        check_zip_archive(excel_file, budget)
 
-        # Leer todas las hojas
         excel = pd.ExcelFile(excel_file)
-        sheet_names = excel.sheet_names
-
-        for sheet_name in sheet_names:
-            df = pd.read_excel(excel, sheet_name=sheet_name)
-
-            # Convertir DataFrame a formato para tablas
-            headers = df.columns.tolist()
-            data = df.values.tolist()
-
-            # Detectar posibles datos para gráficos (columnas numéricas)
-            numeric_columns = df.select_dtypes(include=['number']).columns.tolist()
-            if len(numeric_columns) > 0 and len(df) > 0:
-                # Primera columna como potencial eje X
-                x_column = df.columns[0]
-
-                for y_column in numeric_columns:
-                    # Skip if it's the same as x_column
-                    if y_column == x_column:
-                        continue
-
-                    chart_data = {
-                        'sheet': sheet_name,
-                        'title': f"{y_column} vs {x_column}",
-                        'type': 'line',  # Default chart type
-                        'x_axis': {
-                            'label': x_column,
-                            'data': df[x_column].tolist()
-                        },
-                        'y_axis': {
-                            'label': y_column,
-                            'data': df[y_column].tolist()
-                        }
-                    }
-
-                    result['chart_data'].append(chart_data)
+        cells_used = 0
+
+        for sheet_name in excel.sheet_names:
+            budget.check_time()
+
+            # Leer una fila de más para detectar si la hoja supera el límite
+            max_rows = budget.limits.max_rows
+            df = pd.read_excel(
+                excel, sheet_name=sheet_name,
+                nrows=max_rows + 1 if max_rows is not None else None
+            )
+            if max_rows is not None and len(df) > max_rows:
+                budget.mark_hit(result, LimitExceeded('max_rows', len(df), max_rows))
+                df = df.iloc[:max_rows]
+
+            remaining_cells = budget.remaining('max_cells', cells_used)
+            cells_exhausted = remaining_cells is not None and df.size > remaining_cells
+            if cells_exhausted:
+                budget.mark_hit(result, LimitExceeded('max_cells', cells_used + df.size, budget.limits.max_cells))
+                df = df.iloc[:remaining_cells // max(1, df.shape[1])]
+            cells_used += df.size
+
+            headers = _values_to_json(df.columns.to_numpy())
+
+            # Convertir cada columna a tipos nativos de forma vectorizada
+            columns = [_values_to_json(df.iloc[:, i].to_numpy()) for i in range(df.shape[1])]
+            if columnar:
+                data = columns
+            else:
+                data = [list(row) for row in zip(*columns)]
+
+            # Series para gráficos (columnas numéricas), reducidas al presupuesto de puntos
+            result['chart_data'].extend(build_chart_series(
+                df, sheet_name,
+                max_points=chart_max_points,
+                method=chart_method,
+                full_resolution=full_resolution_charts,
+                x_values=columns[0] if columns else None,
+                axes=result['chart_axes']
+            ))
 
             # Agregar información de la hoja
             result['sheets'].append({
                 'name': sheet_name,
                 'headers': headers,
                 'data': data,
+                'layout': 'columns' if columnar else 'rows',
                 'row_count': len(df),
                 'column_count': len(headers)
             })
 
-            # Agregar la hoja como una tabla
+            # Agregar la hoja como una tabla (comparte los datos de la hoja)
             result['tables'].append({
                 'sheet': sheet_name,
                 'headers': headers,
-                'data': json.loads(json.dumps(data, cls=NpEncoder))
+                'data': data,
+                'layout': 'columns' if columnar else 'rows'
             })
 
-        return result
+            if cells_exhausted:
+                break
+
+        return budget.finish(result)
+
+    except LimitExceeded as e:
+        budget.mark_hit(result, e)
+        return budget.finish(result)
 
     except Exception as e:
         logger.error(f"Error extracting data from Excel: {str(e)}")
         result['error'] = str(e)
-        return result
\ No newline at end of file
+        return result
+
+
+def build_chart_series(df, sheet_name, max_points=500, method='lttb',
+                       full_resolution=False, x_values=None, axes=None):
+    """
+    Construye las series de gráfico de una hoja a partir de sus columnas numéricas
+
+    La primera columna actúa como eje X y se convierte una sola vez por hoja.
+    Cada serie Y se reduce a como máximo max_points puntos conservando su
+    forma, salvo que se pidan explícitamente las series completas.
+
+    Las series completas comparten el mismo eje X: si se pasa axes, el eje se
+    añade una sola vez a esa lista y cada serie lo referencia por su posición
+    ('x_axis': {'label', 'axis'}) en lugar de repetirlo. Las series reducidas
+    eligen puntos distintos cada una y llevan sus propios valores de X (como
+    mucho max_points).
+
+    Args:
+        df: DataFrame de la hoja
+        sheet_name: Nombre de la hoja
+        max_points: Presupuesto de puntos por serie
+        method: 'lttb' (Largest-Triangle-Three-Buckets) o 'minmax' (mínimo y
+            máximo por intervalo)
+        full_resolution: Si es True, no se reduce ninguna serie
+        x_values: Eje X ya convertido a JSON (se calcula si no se indica)
+        axes: Lista de ejes compartidos ('chart_axes') donde añadir el de la hoja
+
+    Returns:
+        list: Lista de series con el formato de 'chart_data'
+    """
+    series = []
+    numeric_columns = df.select_dtypes(include=['number']).columns.tolist()
+    if len(numeric_columns) == 0 or len(df) == 0:
+        return series
+
+    # Primera columna como potencial eje X
+    x_column = df.columns[0]
+    x_raw = df.iloc[:, 0].to_numpy()
+    if x_values is None:
+        x_values = _values_to_json(x_raw)
+    x_positions = _axis_positions(x_raw)
+    axis_index = None
+
+    for y_column in numeric_columns:
+        # Skip if it's the same as x_column
+        if y_column == x_column:
+            continue
+
+        y_raw = df[y_column].to_numpy()
+
+        if full_resolution:
+            if axes is not None and axis_index is None:
+                axis_index = len(axes)
+                axes.append({'sheet': sheet_name, 'label': x_column, 'data': x_values})
+            x_axis = {'label': x_column, 'axis': axis_index} if axes is not None \
+                else {'label': x_column, 'data': x_values}
+            y_data = _values_to_json(y_raw)
+            point_count = len(y_raw)
+        else:
+            y_positions = df[y_column].to_numpy(dtype=float, na_value=np.nan)
+            indices = downsample_indices(x_positions, y_positions, max_points, method=method)
+            x_axis = {'label': x_column, 'data': [x_values[i] for i in indices.tolist()]}
+            y_data = _values_to_json(y_raw[indices])
+            point_count = len(indices)
+
+        series.append({
+            'sheet': sheet_name,
+            'title': f"{y_column} vs {x_column}",
+            'type': 'line',  # Default chart type
+            'x_axis': x_axis,
+            'y_axis': {
+                'label': y_column,
+                'data': y_data
+            },
+            'sampling': {
+                'method': None if full_resolution else method,
+                'points': point_count,
+                'original_points': len(y_raw)
+            }
+        })
+
+    return series
+
+
+def downsample_indices(x, y, max_points, method='lttb'):
+    """
+    Selecciona los índices de los puntos que representan la serie (x, y)
+
+    Los puntos con X o Y nulos se descartan. Si la serie ya cabe en el
+    presupuesto se devuelven todos los índices válidos.
+
+    Returns:
+        numpy.ndarray: Índices ordenados sobre la serie original
+    """
+    valid = np.flatnonzero(~(np.isnan(x) | np.isnan(y)))
+    if len(valid) <= max_points:
+        return valid
+
+    xv, yv = x[valid], y[valid]
+    if method == 'minmax':
+        selected = _minmax_indices(yv, max_points)
+    elif method == 'lttb':
+        selected = _lttb_indices(xv, yv, max_points)
+    else:
+        raise ValueError(f"Método de reducción no soportado: {method}")
+    return valid[selected]
+
+
+def _lttb_indices(x, y, threshold):
+    """Largest-Triangle-Three-Buckets; cada intervalo se evalúa de forma vectorizada"""
+    n = len(y)
+    if threshold < 3 or threshold >= n:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        areas = np.abs(
+            (x[a] - avg_x) * (bucket_y - y[a]) - (x[a] - bucket_x) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        indices[i + 1] = a
+
+    return indices
+
+
+def _minmax_indices(y, max_points):
+    """Conserva el mínimo y el máximo de cada intervalo (totalmente vectorizado)"""
+    n = len(y)
+    buckets = max(1, max_points // 2)
+    size = int(np.ceil(n / buckets))
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    grid = padded.reshape(buckets, size)
+
+    # Las filas totalmente vacías solo pueden aparecer al final del relleno
+    filled = ~np.all(np.isnan(grid), axis=1)
+    grid = grid[filled]
+    offsets = np.flatnonzero(filled) * size
+
+    mins = np.nanargmin(grid, axis=1) + offsets
+    maxs = np.nanargmax(grid, axis=1) + offsets
+    return np.unique(np.concatenate([mins, maxs]))
+
+
+def _axis_positions(values):
+    """Posiciones numéricas del eje X (índice de fila si no es numérico)"""
+    kind = values.dtype.kind
+    if kind in 'biuf':
+        return values.astype(float)
+    if kind in 'Mm':
+        positions = values.astype('int64').astype(float)
+        positions[np.isnat(values)] = np.nan
+        return positions
+    return np.arange(len(values), dtype=float)
+
+
+def _values_to_json(values):
+    """
+    Convierte un array de NumPy en una lista de valores serializables a JSON
+
+    Los tipos numéricos, booleanos y de fecha se convierten de forma
+    vectorizada; solo las columnas de tipo objeto se recorren celda a celda.
+    Los valores nulos (NaN, NaT, None) se convierten en None.
+    """
+    kind = values.dtype.kind
+
+    if kind in 'biu':
+        return values.tolist()
+
+    if kind == 'f':
+        missing = np.isnan(values)
+        if not missing.any():
+            return values.tolist()
+        converted = values.astype(object)
+        converted[missing] = None
+        return converted.tolist()
+
+    if kind == 'M':
+        missing = np.isnat(values)
+        converted = np.datetime_as_string(values, unit='s').astype(object)
+        converted[missing] = None
+        return converted.tolist()
+
+    if kind == 'm':
+        missing = np.isnat(values)
+        converted = (values / np.timedelta64(1, 's')).astype(object)
+        converted[missing] = None
+        return converted.tolist()
+
+    missing = pd.isna(values)
+    converted = _to_json_scalar_ufunc(values).astype(object)
+    converted[missing] = None
+    return converted.tolist()
+
+
+def _to_json_scalar(value):
+    """Convierte una celda de una columna de tipo objeto a un tipo JSON nativo"""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+_to_json_scalar_ufunc = np.frompyfunc(_to_json_scalar, 1, 1)
@@ -0,0 +1,149 @@
+import logging
+import shutil
+import tempfile
+import time
+import zipfile
+from io import BytesIO
+
+from django_rest_role_jwt.task_metrics import process_memory_high_water_kb
+
+logger = logging.getLogger(__name__)
+
+# Bloque usado al volcar archivos no posicionables a un temporal
+SPOOL_CHUNK_SIZE = 1024 * 1024
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+
+class LimitExceeded(Exception):
+    """Se ha alcanzado uno de los límites de extracción"""
+
+    def __init__(self, limit, value, maximum):
+        self.limit = limit
+        self.value = value
+        self.maximum = maximum
+        super().__init__(f"Límite '{limit}' alcanzado: {value} > {maximum}")
+
+    def as_dict(self):
+        return {'limit': self.limit, 'value': self.value, 'maximum': self.maximum}
+
+
+class ExtractionLimits:
+    """
+    Límites de recursos para una extracción
+
+    Un valor None desactiva el límite correspondiente.
+
+    Args:
+        max_decompressed_bytes: Bytes descomprimidos (ZIP de DOCX/XLSX/PPTX, TXT)
+        max_compression_ratio: Relación máxima descomprimido/comprimido en ZIP
+        max_pages: Páginas (PDF) o diapositivas (PPTX)
+        max_rows: Filas por hoja de cálculo
+        max_cells: Celdas totales (hojas de cálculo y tablas)
+        max_seconds: Tiempo de reloj por documento
+    """
+
+    def __init__(self, max_decompressed_bytes=None, max_compression_ratio=None,
+                 max_pages=None, max_rows=None, max_cells=None, max_seconds=None):
+        self.max_decompressed_bytes = max_decompressed_bytes
+        self.max_compression_ratio = max_compression_ratio
+        self.max_pages = max_pages
+        self.max_rows = max_rows
+        self.max_cells = max_cells
+        self.max_seconds = max_seconds
+
+    @classmethod
+    def from_dict(cls, values):
+        return cls(**(values or {}))
+
+
+class ExtractionBudget:
+    """
+    Lleva la cuenta de los recursos consumidos por una extracción
+
+    Los parsers llaman a check() o check_time() durante la extracción y, si
+    se lanza LimitExceeded, devuelven el resultado parcial marcándolo con
+    mark_hit().
+    """
+
+    def __init__(self, limits=None):
+        self.limits = limits or ExtractionLimits()
+        self.started_at = time.monotonic()
+        self.hits = []
+
+    def check(self, limit, value):
+        """Lanza LimitExceeded si value supera el límite de nombre limit"""
+        maximum = getattr(self.limits, limit)
+        if maximum is not None and value > maximum:
+            raise LimitExceeded(limit, value, maximum)
+
+    def check_time(self):
+        self.check('max_seconds', round(time.monotonic() - self.started_at, 3))
+
+    def remaining(self, limit, used=0):
+        """Cantidad que aún se puede consumir de un límite (None si no hay límite)"""
+        maximum = getattr(self.limits, limit)
+        return None if maximum is None else max(0, maximum - used)
+
+    def mark_hit(self, result, exc):
+        """Registra un límite alcanzado en el resultado parcial"""
+        logger.warning(f"Extracción cortada: {exc}")
+        self.hits.append(exc.as_dict())
+        result['truncated'] = True
+        result['limits_hit'] = self.hits
+        return result
+
+    def finish(self, result):
+        """Añade al resultado las métricas de la extracción"""
+        result['metrics'] = {
+            'elapsed_seconds': round(time.monotonic() - self.started_at, 3),
+            'process_memory_high_water_kb': process_memory_high_water_kb()
+        }
+        return result
+
+
+def open_binary(file):
+    """
+    Devuelve un objeto binario posicionable sin copiar el contenido si es posible
+
+    Los FieldFile y archivos ya abiertos se reutilizan tal cual; los bytes se
+    envuelven en BytesIO (que comparte el buffer) y los flujos no
+    posicionables se vuelcan a un SpooledTemporaryFile.
+    """
+    if isinstance(file, (bytes, bytearray, memoryview)):
+        return BytesIO(file)
+
+    if hasattr(file, 'open') and getattr(file, 'closed', False):
+        file.open('rb')
+
+    try:
+        if file.seekable():
+            file.seek(0)
+            return file
+    except (AttributeError, ValueError):
+        pass
+
+    spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    shutil.copyfileobj(file, spooled, SPOOL_CHUNK_SIZE)
+    spooled.seek(0)
+    return spooled
+
+
+def check_zip_archive(file, budget):
+    """
+    Comprueba el tamaño descomprimido de un paquete ZIP sin descomprimirlo
+
+    Usa los tamaños declarados en el directorio central del ZIP, de modo que
+    un archivo con una relación de compresión anómala (zip bomb) se rechaza
+    antes de que el parser lo expanda en memoria.
+
+    Raises:
+        LimitExceeded: Si se supera el tamaño o la relación de compresión
+    """
+    with zipfile.ZipFile(file) as archive:
+        infos = archive.infolist()
+    file.seek(0)
+
+    uncompressed = sum(info.file_size for info in infos)
+    compressed = sum(info.compress_size for info in infos) or 1
+    budget.check('max_decompressed_bytes', uncompressed)
+    budget.check('max_compression_ratio', round(uncompressed / compressed, 1))
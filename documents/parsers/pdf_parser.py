@@ -2,10 +2,23 @@ import PyPDF2
 from io import BytesIO
 import logging
 import base64
+import mmap
+import os
+import tempfile
+import time
+
+import billiard
 from PIL import Image
+from .limits import ExtractionBudget, LimitExceeded
 
 logger = logging.getLogger(__name__)
 
+# Tamaño de bloque usado al volcar el archivo a disco
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+# Por debajo de este número de páginas no compensa arrancar procesos
+PARALLEL_MIN_PAGES = 16
+
 
 def extract_text_from_pdf(file):
     """
@@ -38,30 +51,109 @@ def extract_text_from_pdf(file):
         pdf_reader = PyPDF2.PdfReader(pdf_file)
 
         # Extraer metadatos
-        if pdf_reader.metadata:
-            for key, value in pdf_reader.metadata.items():
-                if key.startswith('/'):
-                    key = key[1:]
-                result['metadata'][key.lower()] = value
+        result['metadata'] = _extract_metadata(pdf_reader)
 
         # Extraer texto página por página
-        full_text = ""
+        page_texts = []
         for i, page in enumerate(pdf_reader.pages):
             text = page.extract_text()
-            full_text += text + "\n\n"
+            page_texts.append(text)
             result['pages'].append({
                 'page_number': i + 1,
                 'text': text
             })
 
-        result['text'] = full_text
+        result['text'] = _join_pages(page_texts)
+        return result
+
+    except Exception as e:
+        logger.error(f"Error extracting text from PDF: {str(e)}")
+        result['error'] = str(e)
         return result
 
+
+def extract_text_from_pdf_parallel(file, workers=None, max_pages=None, timeout=None, limits=None):
+    """
+    Extrae texto de un PDF repartiendo rangos de páginas entre un pool de procesos
+
+    El archivo se vuelca una sola vez a un temporal (o se usa su ruta en disco
+    si existe) y cada proceso lo abre mediante mmap, sin copiar los bytes.
+    Los resultados se recogen en orden y el texto se une una única vez.
+
+    Args:
+        file: Objeto archivo PDF, ruta o bytes
+        workers: Número de procesos (por defecto, número de CPUs)
+        max_pages: Número máximo de páginas a extraer por documento
+        timeout: Tiempo máximo en segundos para la extracción del documento
+        limits: ExtractionLimits opcional; sus max_pages y max_seconds se
+            combinan con los anteriores y los límites alcanzados se anotan
+            en 'limits_hit'
+
+    Returns:
+        dict: Mismo formato que extract_text_from_pdf, con 'page_count' y
+        'truncated' si se alcanzó el límite de páginas o de tiempo
+    """
+    result = {
+        'text': '',
+        'metadata': {},
+        'pages': [],
+        'images': [],
+        'page_count': 0,
+        'truncated': False
+    }
+
+    budget = ExtractionBudget(limits)
+    max_pages = _min_limit(max_pages, budget.limits.max_pages)
+    timeout = _min_limit(timeout, budget.limits.max_seconds)
+
+    pdf_path, is_temp = None, False
+    try:
+        pdf_path, is_temp = _spool_to_disk(file)
+
+        with open(pdf_path, 'rb') as fh, \
+                mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            pdf_reader = PyPDF2.PdfReader(mapped)
+            result['metadata'] = _extract_metadata(pdf_reader)
+            total_pages = len(pdf_reader.pages)
+
+        result['page_count'] = total_pages
+        page_limit = min(total_pages, max_pages) if max_pages else total_pages
+        if page_limit < total_pages:
+            budget.mark_hit(result, LimitExceeded('max_pages', total_pages, page_limit))
+
+        workers = workers or os.cpu_count() or 1
+        deadline = time.monotonic() + timeout if timeout else None
+
+        if workers <= 1 or page_limit < PARALLEL_MIN_PAGES:
+            page_texts, timed_out = _extract_sequential(pdf_path, page_limit, deadline)
+        else:
+            page_texts, timed_out = _extract_with_pool(pdf_path, page_limit, workers, deadline)
+
+        if timed_out:
+            logger.warning(
+                f"Extracción de PDF cortada por tiempo tras {len(page_texts)} de {page_limit} páginas"
+            )
+            result['timed_out'] = True
+            budget.mark_hit(result, LimitExceeded(
+                'max_seconds', round(time.monotonic() - budget.started_at, 3), timeout
+            ))
+
+        result['pages'] = [
+            {'page_number': i + 1, 'text': text}
+            for i, text in enumerate(page_texts)
+        ]
+        result['text'] = _join_pages(page_texts)
+        return budget.finish(result)
+
     except Exception as e:
         logger.error(f"Error extracting text from PDF: {str(e)}")
         result['error'] = str(e)
         return result
 
+    finally:
+        if is_temp and pdf_path and os.path.exists(pdf_path):
+            os.remove(pdf_path)
+
 
 def extract_images_from_pdf(file):
     """
@@ -75,4 +167,128 @@ def extract_images_from_pdf(file):
     """
     # Esta función podría implementarse utilizando bibliotecas como PyMuPDF (fitz)
     # Por simplicidad, devolvemos una lista vacía en este ejemplo
-    return []
\ No newline at end of file
+    return []
+
+
+def _extract_metadata(pdf_reader):
+    """Normaliza los metadatos del PDF a un diccionario con claves en minúscula"""
+    metadata = {}
+    if pdf_reader.metadata:
+        for key, value in pdf_reader.metadata.items():
+            if key.startswith('/'):
+                key = key[1:]
+            metadata[key.lower()] = value
+    return metadata
+
+
+def _min_limit(*values):
+    """El menor de los límites indicados (None si ninguno está definido)"""
+    values = [value for value in values if value is not None]
+    return min(values) if values else None
+
+
+def _join_pages(page_texts):
+    """Une el texto de las páginas en una sola operación"""
+    if not page_texts:
+        return ''
+    return "\n\n".join(page_texts) + "\n\n"
+
+
+def _spool_to_disk(file):
+    """
+    Devuelve una ruta en disco con el contenido del PDF
+
+    Si el archivo ya vive en el sistema de ficheros local se reutiliza su ruta;
+    en caso contrario se vuelca por bloques a un archivo temporal.
+
+    Returns:
+        tuple: (ruta, True si la ruta es un temporal que hay que borrar)
+    """
+    if isinstance(file, (str, os.PathLike)):
+        return os.fspath(file), False
+
+    try:
+        path = getattr(file, 'path', None)
+        if path and os.path.exists(path):
+            return path, False
+    except NotImplementedError:
+        # Storages remotos (S3) no exponen una ruta local
+        pass
+
+    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
+        if isinstance(file, (bytes, bytearray, memoryview)):
+            temp_file.write(file)
+        elif hasattr(file, 'chunks'):
+            for chunk in file.chunks(chunk_size=SPOOL_CHUNK_SIZE):
+                temp_file.write(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+        else:
+            for chunk in iter(lambda: file.read(SPOOL_CHUNK_SIZE), b''):
+                if not chunk:
+                    break
+                temp_file.write(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+        return temp_file.name, True
+
+
+def _split_page_range(page_count, workers):
+    """Divide [0, page_count) en rangos contiguos de tamaño similar"""
+    workers = max(1, min(workers, page_count))
+    size, remainder = divmod(page_count, workers)
+    ranges = []
+    start = 0
+    for i in range(workers):
+        end = start + size + (1 if i < remainder else 0)
+        if end > start:
+            ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _extract_page_range(pdf_path, start, end):
+    """Extrae el texto de las páginas [start, end) (se ejecuta en un proceso del pool)"""
+    with open(pdf_path, 'rb') as fh, \
+            mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        pdf_reader = PyPDF2.PdfReader(mapped)
+        return [pdf_reader.pages[i].extract_text() for i in range(start, end)]
+
+
+def _extract_sequential(pdf_path, page_limit, deadline):
+    """Extracción en el proceso actual respetando el límite de tiempo"""
+    page_texts = []
+    with open(pdf_path, 'rb') as fh, \
+            mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        pdf_reader = PyPDF2.PdfReader(mapped)
+        for i in range(page_limit):
+            if deadline is not None and time.monotonic() >= deadline:
+                return page_texts, True
+            page_texts.append(pdf_reader.pages[i].extract_text())
+    return page_texts, False
+
+
+def _extract_with_pool(pdf_path, page_limit, workers, deadline):
+    """
+    Reparte los rangos de páginas en un pool de procesos y los recoge en orden
+
+    Se usa el pool de billiard (el de Celery) porque los workers prefork son
+    procesos daemon y multiprocessing no les deja crear hijos. Al terminar (o
+    al vencer el plazo) se matan los procesos del pool, para que un rango
+    atascado en una página problemática no siga consumiendo CPU.
+    """
+    page_texts = []
+    pool = billiard.Pool(processes=workers)
+    try:
+        results = [
+            pool.apply_async(_extract_page_range, (pdf_path, start, end))
+            for start, end in _split_page_range(page_limit, workers)
+        ]
+        for result in results:
+            remaining = None
+            if deadline is not None:
+                remaining = max(0, deadline - time.monotonic())
+            try:
+                page_texts.extend(result.get(timeout=remaining))
+            except billiard.TimeoutError:
+                return page_texts, True
+        return page_texts, False
+    finally:
+        pool.terminate()
+        pool.join()
@@ -0,0 +1,182 @@
+import logging
+import posixpath
+import re
+import zipfile
+from xml.etree import ElementTree
+from .limits import ExtractionBudget, LimitExceeded, check_zip_archive, open_binary
+
+logger = logging.getLogger(__name__)
+
+NAMESPACES = {
+    'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
+    'p': 'http://schemas.openxmlformats.org/presentationml/2006/main',
+    'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
+    'rel': 'http://schemas.openxmlformats.org/package/2006/relationships',
+    'cp': 'http://schemas.openxmlformats.org/package/2006/metadata/core-properties',
+    'dc': 'http://purl.org/dc/elements/1.1/',
+    'dcterms': 'http://purl.org/dc/terms/',
+}
+
+TITLE_PLACEHOLDERS = ('title', 'ctrTitle')
+SLIDE_PATTERN = re.compile(r'^ppt/slides/slide(\d+)\.xml$')
+
+
+def extract_text_from_pptx(file, limits=None):
+    """
+    Extrae texto y estructura de un archivo PPTX
+
+    Lee directamente el XML del paquete OOXML, sin dependencias externas.
+
+    Args:
+        file: Objeto archivo PPTX
+        limits: ExtractionLimits opcional (tamaño descomprimido, diapositivas,
+            celdas y tiempo); al alcanzarlos se devuelve el resultado parcial
+
+    Returns:
+        dict: Diccionario con texto, diapositivas (como 'pages'), títulos y tablas
+    """
+    result = {
+        'text': '',
+        'metadata': {},
+        'pages': [],
+        'paragraphs': [],
+        'headings': [],
+        'tables': []
+    }
+
+    budget = ExtractionBudget(limits)
+    text_parts = []
+
+    try:
+        # Manejar diferentes tipos de entrada sin copiar el contenido
+        pptx_file = open_binary(file)
+        check_zip_archive(pptx_file, budget)
+
+        with zipfile.ZipFile(pptx_file) as package:
+            result['metadata'] = _extract_metadata(package)
+
+            cell_count = 0
+            for number, slide_path in enumerate(_slide_paths(package), start=1):
+                budget.check('max_pages', number)
+                budget.check_time()
+
+                root = ElementTree.fromstring(package.read(slide_path))
+                title, paragraphs = _extract_slide_text(root)
+
+                if title:
+                    result['headings'].append({
+                        'level': 1,
+                        'text': title,
+                        'position': number - 1
+                    })
+
+                for table in root.iter(f"{{{NAMESPACES['a']}}}tbl"):
+                    data = _extract_table(table)
+                    cell_count += sum(len(row) for row in data)
+                    budget.check('max_cells', cell_count)
+                    result['tables'].append({
+                        'position': len(result['tables']),
+                        'slide': number,
+                        'data': data
+                    })
+
+                slide_text = "\n".join(text for text, _ in paragraphs)
+                text_parts.append(slide_text)
+                result['paragraphs'].extend(
+                    {'text': text, 'is_heading': is_title}
+                    for text, is_title in paragraphs
+                )
+                result['pages'].append({
+                    'page_number': number,
+                    'title': title,
+                    'text': slide_text
+                })
+
+        result['text'] = "\n\n".join(text_parts)
+        return budget.finish(result)
+
+    except LimitExceeded as e:
+        budget.mark_hit(result, e)
+        result['text'] = "\n\n".join(text_parts)
+        return budget.finish(result)
+
+    except Exception as e:
+        logger.error(f"Error extracting text from PPTX: {str(e)}")
+        result['error'] = str(e)
+        return result
+
+
+def _slide_paths(package):
+    """Rutas de las diapositivas en el orden definido por ppt/presentation.xml"""
+    names = set(package.namelist())
+    try:
+        presentation = ElementTree.fromstring(package.read('ppt/presentation.xml'))
+        rels = ElementTree.fromstring(package.read('ppt/_rels/presentation.xml.rels'))
+        targets = {
+            rel.get('Id'): posixpath.normpath(posixpath.join('ppt', rel.get('Target')))
+            for rel in rels.findall('rel:Relationship', NAMESPACES)
+        }
+        paths = [
+            targets.get(slide_id.get(f"{{{NAMESPACES['r']}}}id"))
+            for slide_id in presentation.iterfind('p:sldIdLst/p:sldId', NAMESPACES)
+        ]
+        paths = [path for path in paths if path in names]
+        if paths:
+            return paths
+    except KeyError:
+        pass
+
+    # Sin presentation.xml válido: ordenar por número de diapositiva
+    numbered = [(int(m.group(1)), name) for name in names for m in [SLIDE_PATTERN.match(name)] if m]
+    return [name for _, name in sorted(numbered)]
+
+
+def _extract_slide_text(root):
+    """Devuelve el título y los párrafos (texto, es_título) de una diapositiva"""
+    title = ''
+    paragraphs = []
+    for shape in root.iter(f"{{{NAMESPACES['p']}}}sp"):
+        placeholder = shape.find('p:nvSpPr/p:nvPr/p:ph', NAMESPACES)
+        is_title = placeholder is not None and placeholder.get('type') in TITLE_PLACEHOLDERS
+
+        for paragraph in shape.iterfind('p:txBody/a:p', NAMESPACES):
+            text = ''.join(node.text or '' for node in paragraph.iter(f"{{{NAMESPACES['a']}}}t"))
+            if not text.strip():
+                continue
+            if is_title and not title:
+                title = text
+            paragraphs.append((text, is_title))
+    return title, paragraphs
+
+
+def _extract_table(table):
+    """Convierte una tabla DrawingML en una lista de filas de texto"""
+    rows = []
+    for row in table.iterfind('a:tr', NAMESPACES):
+        rows.append([
+            '\n'.join(
+                ''.join(node.text or '' for node in paragraph.iter(f"{{{NAMESPACES['a']}}}t"))
+                for paragraph in cell.iter(f"{{{NAMESPACES['a']}}}p")
+            )
+            for cell in row.iterfind('a:tc', NAMESPACES)
+        ])
+    return rows
+
+
+def _extract_metadata(package):
+    """Extrae los metadatos de docProps/core.xml si existen"""
+    try:
+        core = ElementTree.fromstring(package.read('docProps/core.xml'))
+    except KeyError:
+        return {}
+
+    def text_of(path):
+        node = core.find(path, NAMESPACES)
+        return node.text if node is not None else None
+
+    return {
+        'author': text_of('dc:creator'),
+        'title': text_of('dc:title'),
+        'created': text_of('dcterms:created'),
+        'modified': text_of('dcterms:modified')
+    }
@@ -0,0 +1,238 @@
+"""
+Registro de parsers de documentos indexado por Document.file_type
+
+Los módulos de los parsers (PyPDF2, python-docx, pandas/NumPy...) solo se
+importan la primera vez que se necesita un parser de ese tipo, de modo que
+los procesos que importan las tareas no pagan el coste de todas las
+dependencias al arrancar.
+
+Para añadir un formato basta con llamar a register_parser() o declararlo en
+settings.DOCUMENT_PARSERS:
+
+    DOCUMENT_PARSERS = {
+        'ODT': 'myapp.parsers.odt_parser:extract_text_from_odt',
+    }
+
+Un parser puede declarar además una versión incremental (stream) que produce
+bloques en lugar de un resultado completo; stream_document() la prefiere y
+acumula solo una muestra acotada (ver documents.parsers.blocks).
+"""
+import logging
+import os
+import threading
+from importlib import import_module
+
+from django.conf import settings
+
+from .limits import ExtractionLimits
+
+logger = logging.getLogger(__name__)
+
+
+class ParserSpec:
+    """
+    Descripción de un parser registrado
+
+    Args:
+        file_type: Tipo de archivo (clave de Document.file_type)
+        path: Ruta 'modulo:funcion' del parser
+        version: Versión del parser; cambiarla invalida las extracciones en caché
+        options: Callable opcional que devuelve los kwargs para el parser
+        stream: Ruta 'modulo:funcion' opcional de la versión incremental, que
+            recibe los mismos kwargs y produce bloques
+    """
+
+    def __init__(self, file_type, path, version='1', options=None, stream=None):
+        self.file_type = file_type
+        self.path = path
+        self.version = str(version)
+        self.options = options
+        self.stream = stream
+        self._func = None
+        self._stream_func = None
+
+    def load(self):
+        """Importa el módulo del parser (solo la primera vez) y devuelve la función"""
+        if self._func is None:
+            self._func = _import_path(self.path)
+        return self._func
+
+    def load_stream(self):
+        """Devuelve la función incremental del parser o None si no tiene"""
+        if self._stream_func is None and self.stream:
+            self._stream_func = _import_path(self.stream)
+        return self._stream_func
+
+    @property
+    def loaded(self):
+        return self._func is not None
+
+
+_registry = {}
+_lock = threading.Lock()
+_settings_loaded = False
+
+
+def register_parser(file_type, path, version='1', options=None, stream=None):
+    """
+    Registra (o reemplaza) el parser de un tipo de archivo
+
+    Args:
+        file_type: Tipo de archivo, p. ej. 'PDF'
+        path: Ruta 'modulo:funcion' del parser; no se importa hasta usarlo
+        version: Versión del parser
+        options: Callable opcional que devuelve los kwargs para el parser
+        stream: Ruta 'modulo:funcion' opcional de la versión incremental
+
+    Returns:
+        ParserSpec: Especificación registrada
+    """
+    spec = ParserSpec(file_type, path, version=version, options=options, stream=stream)
+    with _lock:
+        _registry[file_type] = spec
+    return spec
+
+
+def get_parser_spec(file_type):
+    """Devuelve la especificación registrada para el tipo de archivo o None"""
+    _load_settings_parsers()
+    return _registry.get(file_type)
+
+
+def get_parser(file_type):
+    """
+    Devuelve la función parser de un tipo de archivo, importándola si hace falta
+
+    Raises:
+        ValueError: Si no hay ningún parser registrado para el tipo
+    """
+    spec = get_parser_spec(file_type)
+    if spec is None:
+        raise ValueError(f"No hay parser registrado para el tipo de archivo: {file_type}")
+    return spec.load()
+
+
+def get_parser_version(file_type):
+    """Devuelve la versión del parser de un tipo de archivo ('0' si no existe)"""
+    spec = get_parser_spec(file_type)
+    return spec.version if spec else '0'
+
+
+def registered_types():
+    """Devuelve los tipos de archivo con parser registrado"""
+    _load_settings_parsers()
+    return sorted(_registry)
+
+
+def parse_document(file_type, file):
+    """
+    Extrae el contenido de un archivo con el parser de su tipo
+
+    Args:
+        file_type: Tipo de archivo
+        file: Objeto archivo
+
+    Returns:
+        dict: Datos extraídos por el parser
+    """
+    spec = get_parser_spec(file_type)
+    if spec is None:
+        raise ValueError(f"No hay parser registrado para el tipo de archivo: {file_type}")
+    options = spec.options() if spec.options else {}
+    return spec.load()(file, **options)
+
+
+def stream_document(file_type, file):
+    """
+    Inicia la extracción incremental de un archivo si su parser la admite
+
+    Args:
+        file_type: Tipo de archivo
+        file: Objeto archivo
+
+    Returns:
+        Iterador de bloques o None si el parser no tiene versión incremental
+    """
+    spec = get_parser_spec(file_type)
+    if spec is None:
+        raise ValueError(f"No hay parser registrado para el tipo de archivo: {file_type}")
+    stream = spec.load_stream()
+    if stream is None:
+        return None
+    options = spec.options() if spec.options else {}
+    return stream(file, **options)
+
+
+def _import_path(path):
+    """Importa 'modulo:funcion' y devuelve la función"""
+    module_path, _, func_name = path.partition(':')
+    return getattr(import_module(module_path), func_name)
+
+
+def _load_settings_parsers():
+    """Registra los parsers declarados en settings.DOCUMENT_PARSERS (una sola vez)"""
+    global _settings_loaded
+    if _settings_loaded:
+        return
+    with _lock:
+        if _settings_loaded:
+            return
+        for file_type, entry in getattr(settings, 'DOCUMENT_PARSERS', {}).items():
+            if isinstance(entry, dict):
+                _registry[file_type] = ParserSpec(file_type, **entry)
+            else:
+                _registry[file_type] = ParserSpec(file_type, entry)
+        _settings_loaded = True
+
+
+def _default_options():
+    return {
+        'limits': ExtractionLimits.from_dict(getattr(settings, 'DOCUMENT_EXTRACTION_LIMITS', None))
+    }
+
+
+def _pdf_workers():
+    """
+    Procesos por extracción de PDF
+
+    Las CPUs se reparten entre las tareas concurrentes de la cola documents,
+    de modo que PDF_PARSER_WORKERS (None: todas las disponibles) se limita a
+    la parte de cada tarea.
+    """
+    queue = getattr(settings, 'CELERY_QUEUE_CONFIG', {}).get('documents', {})
+    share = max(1, (os.cpu_count() or 1) // max(1, queue.get('concurrency') or 1))
+    return min(getattr(settings, 'PDF_PARSER_WORKERS', None) or share, share)
+
+
+def _pdf_options():
+    parallel = getattr(settings, 'PDF_PARSER_PARALLEL', False)
+    return {
+        **_default_options(),
+        'workers': _pdf_workers() if parallel else 1,
+        'max_pages': getattr(settings, 'PDF_PARSER_MAX_PAGES', None),
+        'timeout': getattr(settings, 'PDF_PARSER_TIMEOUT', None)
+    }
+
+
+def _xlsx_options():
+    return {
+        **_default_options(),
+        'chart_max_points': getattr(settings, 'CHART_MAX_POINTS', 500),
+        'chart_method': getattr(settings, 'CHART_DOWNSAMPLING_METHOD', 'lttb'),
+        'full_resolution_charts': getattr(settings, 'CHART_FULL_RESOLUTION', False)
+    }
+
+
+# Parsers incluidos. Al modificar un parser hay que incrementar su versión.
+register_parser('PDF', 'documents.parsers.pdf_parser:extract_text_from_pdf_parallel',
+                version='3', options=_pdf_options)
+register_parser('DOCX', 'documents.parsers.word_parser:extract_text_from_docx',
+                version='4', options=_default_options,
+                stream='documents.parsers.word_parser:stream_docx')
+register_parser('XLSX', 'documents.parsers.excel_parser:extract_data_from_xlsx',
+                version='5', options=_xlsx_options)
+register_parser('PPTX', 'documents.parsers.pptx_parser:extract_text_from_pptx',
+                version='2', options=_default_options)
+register_parser('TXT', 'documents.parsers.text_parser:extract_text_from_txt',
+                version='4', options=_default_options,
+                stream='documents.parsers.text_parser:stream_txt')
@@ -0,0 +1,283 @@
+import codecs
+import logging
+from .limits import ExtractionBudget, LimitExceeded
+
+logger = logging.getLogger(__name__)
+
+# Tamaño de bloque por defecto al leer el archivo
+CHUNK_SIZE = 64 * 1024
+
+# Caracteres máximos de un párrafo en la extracción incremental; un texto sin
+# líneas en blanco se parte en párrafos de este tamaño
+PARAGRAPH_MAX_CHARS = 64 * 1024
+
+# Marcas de orden de bytes, de más larga a más corta
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+
+def extract_text_from_txt(file, chunk_size=CHUNK_SIZE, limits=None):
+    """
+    Extrae el texto y los párrafos de un archivo de texto plano por bloques
+
+    El archivo se lee una sola vez; la codificación se detecta con el primer
+    bloque y se revisa si un bloque posterior no es válido en ella. El texto
+    y los párrafos completos se guardan en memoria, por lo que el tamaño
+    leído se limita con max_decompressed_bytes; para archivos grandes
+    stream_txt() produce los párrafos sin acumularlos.
+
+    Args:
+        file: FieldFile, objeto tipo archivo o bytes
+        chunk_size: Tamaño de cada bloque leído
+        limits: ExtractionLimits opcional (bytes leídos y tiempo); al
+            alcanzarlos se devuelve el resultado parcial
+
+    Returns:
+        dict: Diccionario con texto, párrafos y metadatos (codificación,
+        número de bytes y de líneas)
+    """
+    result = {
+        'text': '',
+        'metadata': {},
+        'paragraphs': []
+    }
+
+    budget = ExtractionBudget(limits)
+    stats = {}
+    splitter = ParagraphSplitter()
+    text_parts = []
+
+    try:
+        try:
+            for text in iter_decoded_chunks(file, chunk_size=chunk_size, stats=stats):
+                budget.check('max_decompressed_bytes', stats['byte_count'])
+                budget.check_time()
+                text_parts.append(text)
+                result['paragraphs'].extend(splitter.feed(text))
+        except LimitExceeded as e:
+            budget.mark_hit(result, e)
+        result['paragraphs'].extend(splitter.close())
+
+        stats['line_count'] = splitter.line_count
+        stats['paragraph_count'] = len(result['paragraphs'])
+        result['metadata'] = stats
+        result['text'] = ''.join(text_parts)
+        return budget.finish(result)
+
+    except Exception as e:
+        logger.error(f"Error extracting text from TXT: {str(e)}")
+        result['error'] = str(e)
+        return result
+
+
+def stream_txt(file, chunk_size=CHUNK_SIZE, limits=None):
+    """
+    Extrae un archivo de texto plano de forma incremental
+
+    Solo se aplica el límite de tiempo: la memoria no depende del tamaño del
+    archivo, así que max_decompressed_bytes no corta las transcripciones
+    largas. Quien consume los bloques (documents.parsers.blocks.collect_blocks)
+    decide qué conservar.
+
+    Args:
+        file: FieldFile, objeto tipo archivo o bytes
+        chunk_size: Tamaño de cada bloque leído
+        limits: ExtractionLimits opcional; al superar max_seconds se lanza
+            LimitExceeded
+
+    Yields:
+        dict: Un bloque 'paragraph' por párrafo y, al final, un bloque
+        'metadata' con la codificación y el número de bytes y de líneas
+    """
+    budget = ExtractionBudget(limits)
+    stats = {}
+    paragraphs = iter_txt_paragraphs(file, chunk_size, stats, max_chars=PARAGRAPH_MAX_CHARS)
+    for position, paragraph in enumerate(paragraphs):
+        budget.check_time()
+        yield {
+            'type': 'paragraph',
+            'text': paragraph,
+            'position': position,
+            'separator': '\n\n'
+        }
+    yield {'type': 'metadata', 'metadata': stats}
+
+
+def iter_txt_paragraphs(file, chunk_size=CHUNK_SIZE, stats=None, max_chars=None):
+    """
+    Produce los párrafos de un archivo de texto sin cargarlo completo en memoria
+
+    Args:
+        file: FieldFile, objeto tipo archivo o bytes
+        chunk_size: Tamaño de cada bloque leído
+        stats: Diccionario opcional donde se acumulan bytes, líneas y codificación
+        max_chars: Tamaño máximo de cada párrafo (None: sin límite)
+
+    Yields:
+        str: Cada párrafo (bloques de líneas separados por líneas en blanco)
+    """
+    stats = stats if stats is not None else {}
+    splitter = ParagraphSplitter(max_chars=max_chars)
+    for text in iter_decoded_chunks(file, chunk_size=chunk_size, stats=stats):
+        yield from splitter.feed(text)
+        stats['line_count'] = splitter.line_count
+    yield from splitter.close()
+    stats['line_count'] = splitter.line_count
+
+
+def iter_decoded_chunks(file, chunk_size=CHUNK_SIZE, stats=None):
+    """
+    Lee el archivo por bloques y los decodifica de forma incremental
+
+    Args:
+        file: FieldFile, objeto tipo archivo o bytes
+        chunk_size: Tamaño de cada bloque leído
+        stats: Diccionario opcional donde se registran 'byte_count' y 'encoding'
+
+    Yields:
+        str: Texto decodificado de cada bloque
+    """
+    stats = stats if stats is not None else {}
+    stats['byte_count'] = 0
+    decoder = None
+
+    for chunk in _iter_raw_chunks(file, chunk_size):
+        stats['byte_count'] += len(chunk)
+
+        if decoder is None:
+            encoding = detect_encoding(chunk)
+            decoder = codecs.getincrementaldecoder(encoding)(errors='strict')
+            stats['encoding'] = encoding
+
+        try:
+            text = decoder.decode(chunk)
+        except UnicodeDecodeError:
+            # La codificación detectada no sirve para este bloque: volver a
+            # detectar y continuar reemplazando lo que no se pueda decodificar
+            encoding = detect_encoding(chunk, allow_utf8=False)
+            logger.info(f"Cambio de codificación a {encoding} tras {stats['byte_count']} bytes")
+            decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+            stats['encoding'] = encoding
+            text = decoder.decode(chunk)
+
+        if text:
+            yield text
+
+    if decoder is not None:
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+    else:
+        stats['encoding'] = 'utf-8'
+
+
+def detect_encoding(sample, allow_utf8=True):
+    """
+    Detecta la codificación a partir de una muestra de bytes
+
+    Se comprueban primero las marcas BOM, después UTF-8 y por último se
+    recurre a charset_normalizer (si está disponible) o a latin-1.
+    """
+    for bom, encoding in BOMS:
+        if sample.startswith(bom):
+            return encoding
+
+    if allow_utf8:
+        try:
+            codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+            return 'utf-8'
+        except UnicodeDecodeError:
+            pass
+
+    try:
+        from charset_normalizer import from_bytes
+        best = from_bytes(sample).best()
+        if best is not None and best.encoding:
+            return best.encoding
+    except ImportError:
+        pass
+
+    return 'latin-1'
+
+
+class ParagraphSplitter:
+    """
+    Divide texto recibido por fragmentos en párrafos separados por líneas en blanco
+
+    Solo mantiene en memoria la línea incompleta y las líneas del párrafo
+    actual. Con max_chars, los párrafos (y las líneas) más largos se parten
+    para que esa memoria quede acotada.
+    """
+
+    def __init__(self, max_chars=None):
+        self.line_count = 0
+        self.max_chars = max_chars
+        self._remainder = ''
+        self._lines = []
+        self._chars = 0
+        self._continued = False
+
+    def feed(self, text):
+        """Añade texto y devuelve los párrafos que quedan completos"""
+        paragraphs = []
+        lines = (self._remainder + text).split('\n')
+        self._remainder = lines.pop()
+        for line in lines:
+            self._push_line(line, paragraphs)
+        if self.max_chars is not None and len(self._remainder) >= self.max_chars:
+            # Línea sin terminar demasiado larga: se cierra en su propio párrafo
+            self._push_line(self._remainder, paragraphs, continues=True)
+            self._remainder = ''
+        return paragraphs
+
+    def close(self):
+        """Procesa el texto pendiente y devuelve los últimos párrafos"""
+        paragraphs = []
+        if self._remainder:
+            self._push_line(self._remainder, paragraphs)
+            self._remainder = ''
+        if self._lines:
+            self._flush(paragraphs)
+        return paragraphs
+
+    def _push_line(self, line, paragraphs, continues=False):
+        if not self._continued:
+            self.line_count += 1
+        self._continued = continues
+        line = line.rstrip('\r')
+        if line.strip():
+            self._lines.append(line)
+            self._chars += len(line)
+            if self.max_chars is not None and (continues or self._chars >= self.max_chars):
+                self._flush(paragraphs)
+        elif self._lines:
+            self._flush(paragraphs)
+
+    def _flush(self, paragraphs):
+        paragraphs.append('\n'.join(self._lines))
+        self._lines = []
+        self._chars = 0
+
+
+def _iter_raw_chunks(file, chunk_size):
+    """Itera el contenido en bloques de bytes sea cual sea el tipo de entrada"""
+    if isinstance(file, (bytes, bytearray, memoryview)):
+        view = memoryview(file)
+        for start in range(0, len(view), chunk_size):
+            yield bytes(view[start:start + chunk_size])
+        return
+
+    if hasattr(file, 'chunks'):
+        chunks = file.chunks(chunk_size=chunk_size)
+    else:
+        chunks = iter(lambda: file.read(chunk_size), b'')
+
+    for chunk in chunks:
+        if not chunk:
+            break
+        yield chunk.encode('utf-8') if isinstance(chunk, str) else chunk
@@ -1,16 +1,24 @@
 import docx
-from io import BytesIO
+from docx.oxml.ns import qn
+from docx.table import Table
+from docx.text.paragraph import Paragraph
 import logging
+from .limits import ExtractionBudget, LimitExceeded, check_zip_archive, open_binary
 
 logger = logging.getLogger(__name__)
 
+PARAGRAPH_TAG = qn('w:p')
+TABLE_TAG = qn('w:tbl')
 
-def extract_text_from_docx(file):
+
+def extract_text_from_docx(file, limits=None):
     """
     Extrae texto y estructura de un archivo DOCX
 
     Args:
         file: Objeto archivo DOCX
+        limits: ExtractionLimits opcional (tamaño descomprimido, celdas y
+            tiempo); al alcanzarlos se devuelve el resultado parcial
 
     Returns:
         dict: Diccionario con texto extraído y estructura
@@ -23,61 +31,169 @@ def extract_text_from_docx(file):
         'tables': []
     }
 
+    budget = ExtractionBudget(limits)
+    text_parts = []
+
     try:
-        # Manejar diferentes tipos de entrada
-        if hasattr(file, 'read'):
-            file_content = file.read()
-            docx_file = BytesIO(file_content)
-        else:
-            docx_file = BytesIO(file)
-
-        doc = docx.Document(docx_file)
-
-        # Extraer metadatos
-        core_properties = doc.core_properties
-        result['metadata'] = {
-            'author': core_properties.author,
-            'title': core_properties.title,
-            'created': str(core_properties.created) if core_properties.created else None,
-            'modified': str(core_properties.modified) if core_properties.modified else None
-        }
-
-        # Extraer texto completo y párrafos
-        full_text = ""
-        for i, para in enumerate(doc.paragraphs):
-            if para.text.strip():
-                full_text += para.text + "\n"
-                # Determinar si es un encabezado
-                is_heading = para.style.name.startswith('Heading')
-                if is_heading:
-                    level = int(para.style.name.replace('Heading', '')) if para.style.name != 'Heading' else 1
-                    result['headings'].append({
-                        'level': level,
-                        'text': para.text,
-                        'position': i
-                    })
-
-                result['paragraphs'].append({
-                    'text': para.text,
-                    'is_heading': is_heading
+        doc = _open_document(file, budget)
+        result['metadata'] = _extract_metadata(doc)
+
+        # Un único recorrido del cuerpo en orden de documento
+        for block in iter_docx_blocks(doc, budget):
+            if block['type'] == 'table':
+                result['tables'].append({
+                    'position': block['position'],
+                    'block_index': block['block_index'],
+                    'data': block['data']
                 })
+                continue
 
-        # Extraer tablas
-        for i, table in enumerate(doc.tables):
-            table_data = []
-            for row in table.rows:
-                row_data = [cell.text for cell in row.cells]
-                table_data.append(row_data)
+            text_parts.append(block['text'])
+            is_heading = block['type'] == 'heading'
+            if is_heading:
+                result['headings'].append({
+                    'level': block['level'],
+                    'text': block['text'],
+                    'position': block['position']
+                })
 
-            result['tables'].append({
-                'position': i,
-                'data': table_data
+            result['paragraphs'].append({
+                'text': block['text'],
+                'is_heading': is_heading
             })
 
-        result['text'] = full_text
-        return result
+        result['text'] = _join_text(text_parts)
+        return budget.finish(result)
+
+    except LimitExceeded as e:
+        budget.mark_hit(result, e)
+        result['text'] = _join_text(text_parts)
+        return budget.finish(result)
 
     except Exception as e:
         logger.error(f"Error extracting text from DOCX: {str(e)}")
         result['error'] = str(e)
-        return result
\ No newline at end of file
+        return result
+
+
+def stream_docx(file, limits=None):
+    """
+    Extrae un archivo DOCX de forma incremental
+
+    A diferencia de extract_text_from_docx no acumula el resultado: produce
+    los metadatos y después cada bloque del cuerpo según se recorre, para
+    que quien lo consume (documents.parsers.blocks.collect_blocks) decida
+    qué conservar.
+
+    Args:
+        file: Objeto archivo DOCX
+        limits: ExtractionLimits opcional; al alcanzarlos se lanza LimitExceeded
+
+    Yields:
+        dict: Un bloque 'metadata' y después los bloques de iter_docx_blocks
+    """
+    budget = ExtractionBudget(limits)
+    doc = _open_document(file, budget)
+    yield {'type': 'metadata', 'metadata': _extract_metadata(doc)}
+    yield from iter_docx_blocks(doc, budget)
+
+
+def iter_docx_blocks(doc, budget=None):
+    """
+    Recorre el cuerpo del documento en una sola pasada
+
+    Los estilos se resuelven una vez por identificador de estilo y se
+    reutilizan para el resto de párrafos. Los párrafos vacíos se omiten.
+
+    Args:
+        doc: Instancia de docx.Document
+        budget: ExtractionBudget opcional para controlar tiempo y celdas
+
+    Yields:
+        dict: Bloques 'paragraph', 'heading' o 'table' con su posición
+    """
+    style_cache = {}
+    body = doc.element.body
+    paragraph_index = 0
+    table_index = 0
+    cell_count = 0
+
+    for block_index, child in enumerate(body.iterchildren()):
+        if budget is not None:
+            budget.check_time()
+
+        if child.tag == PARAGRAPH_TAG:
+            para = Paragraph(child, doc._body)
+            text = para.text
+            position = paragraph_index
+            paragraph_index += 1
+            if not text.strip():
+                continue
+
+            style_id = child.style
+            if style_id not in style_cache:
+                style_cache[style_id] = _heading_level(para.style.name if para.style else '')
+            level = style_cache[style_id]
+
+            if level:
+                yield {
+                    'type': 'heading',
+                    'text': text,
+                    'level': level,
+                    'position': position,
+                    'block_index': block_index
+                }
+            else:
+                yield {
+                    'type': 'paragraph',
+                    'text': text,
+                    'position': position,
+                    'block_index': block_index
+                }
+
+        elif child.tag == TABLE_TAG:
+            table = Table(child, doc._body)
+            data = [[cell.text for cell in row.cells] for row in table.rows]
+            cell_count += sum(len(row) for row in data)
+            if budget is not None:
+                budget.check('max_cells', cell_count)
+            yield {
+                'type': 'table',
+                'data': data,
+                'position': table_index,
+                'block_index': block_index
+            }
+            table_index += 1
+
+
+def _open_document(file, budget):
+    """Abre el DOCX a partir de un archivo o de sus bytes tras validar el ZIP"""
+    docx_file = open_binary(file)
+    check_zip_archive(docx_file, budget)
+    return docx.Document(docx_file)
+
+
+def _join_text(text_parts):
+    """Une el texto de los párrafos en una sola operación"""
+    return "\n".join(text_parts) + "\n" if text_parts else ''
+
+
+def _extract_metadata(doc):
+    """Extrae los metadatos principales del documento"""
+    core_properties = doc.core_properties
+    return {
+        'author': core_properties.author,
+        'title': core_properties.title,
+        'created': str(core_properties.created) if core_properties.created else None,
+        'modified': str(core_properties.modified) if core_properties.modified else None
+    }
+
+
+def _heading_level(style_name):
+    """Devuelve el nivel de encabezado de un estilo o 0 si no es un encabezado"""
+    if not style_name.startswith('Heading'):
+        return 0
+    try:
+        return int(style_name.replace('Heading', ''))
+    except ValueError:
+        return 1
@@ -73,4 +73,11 @@ class DocumentAnalysisSerializer(serializers.ModelSerializer):
                   'content_structure', 'extracted_images', 'extracted_tables',
                   'extracted_charts', 'extraction_complete', 'extraction_date',
                   'processing_errors']
-        read_only_fields = ['id', 'document', 'extraction_date']
\ No newline at end of file
+        read_only_fields = ['id', 'document', 'extraction_date']
+
+class DocumentBatchSerializer(serializers.Serializer):
+    """Lote de documentos a procesar con start_documents_batch"""
+    document_ids = serializers.ListField(
+        child=serializers.UUIDField(), allow_empty=False, max_length=10000
+    )
+    chunk_size = serializers.IntegerField(required=False, min_value=1, max_value=500)
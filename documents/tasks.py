@@ -1,12 +1,28 @@
-from celery import shared_task
+from celery import group, shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
 import logging
+import uuid
 from .models import Document, DocumentAnalysis
-from .parsers.pdf_parser import extract_text_from_pdf, extract_images_from_pdf
-from .parsers.word_parser import extract_text_from_docx
-from .parsers.excel_parser import extract_data_from_xlsx
+from .cache import extraction_cache, hash_file
+from .parsers.blocks import MAX_PARAGRAPHS, MAX_TEXT_CHARS, collect_blocks
+from .parsers.registry import parse_document, stream_document
 
 logger = logging.getLogger(__name__)
 
+# Campos de DocumentAnalysis que escribe el procesamiento
+ANALYSIS_FIELDS = [
+    'content_text', 'content_structure', 'extracted_images', 'extracted_tables',
+    'extracted_charts', 'extraction_complete', 'processing_errors'
+]
+
+# Progreso de los lotes en la caché compartida: la descripción del lote y el
+# resultado de cada bloque en su propia clave (un único escritor por clave)
+BATCH_KEY = 'documents:batch:{batch_id}'
+BATCH_CHUNK_KEY = 'documents:batch:{batch_id}:chunk:{index}'
+
 
 @shared_task
 def process_document(document_id):
@@ -22,42 +38,12 @@ def process_document(document_id):
     try:
         document = Document.objects.get(id=document_id)
 
-        # Seleccionar el parser adecuado según el tipo de archivo
-        content_data = {}
-        if document.file_type == 'PDF':
-            content_data = extract_text_from_pdf(document.file)
-            images_data = extract_images_from_pdf(document.file)
-            content_data['images'] = images_data
-        elif document.file_type == 'DOCX':
-            content_data = extract_text_from_docx(document.file)
-        elif document.file_type == 'XLSX':
-            content_data = extract_data_from_xlsx(document.file)
-        elif document.file_type == 'TXT':
-            # Simple lectura de texto para archivos TXT
-            content_data = {
-                'text': document.file.read().decode('utf-8'),
-                'paragraphs': document.file.read().decode('utf-8').split('\n\n')
-            }
+        content_data, cache_hit = _extract_content_cached(document)
 
         # Crear o actualizar el análisis
-        content_text = content_data.get('text', '')
-        content_structure = {
-            'metadata': content_data.get('metadata', {}),
-            'pages': content_data.get('pages', []),
-            'paragraphs': content_data.get('paragraphs', []),
-            'headings': content_data.get('headings', [])
-        }
-
         analysis, created = DocumentAnalysis.objects.update_or_create(
             document=document,
-            defaults={
-                'content_text': content_text,
-                'content_structure': content_structure,
-                'extracted_images': content_data.get('images', []),
-                'extracted_tables': content_data.get('tables', []),
-                'extracted_charts': content_data.get('chart_data', []),
-                'extraction_complete': True
-            }
+            defaults=_analysis_fields(content_data)
         )
 
         # Marcar documento como procesado
@@ -67,6 +53,7 @@ def process_document(document_id):
         return {
             'status': 'success',
             'document_id': str(document.id),
+            'cache_hit': cache_hit,
             'message': 'Documento procesado con éxito'
         }
 
@@ -95,4 +82,276 @@ def process_document(document_id):
         return {
             'status': 'error',
             'message': f"Error procesando documento: {str(e)}"
-        }
\ No newline at end of file
+        }
+
+
+def start_documents_batch(document_ids, user=None, chunk_size=None):
+    """
+    Registra un lote de documentos y encola process_documents_batch
+
+    El lote queda registrado antes de encolarlo, de modo que su progreso se
+    puede consultar (get_batch_progress) desde el primer momento.
+
+    Args:
+        document_ids: IDs de los documentos a procesar
+        user: Usuario que lanza el lote (prioridad y permisos de consulta)
+        chunk_size: Documentos por bloque (DOCUMENT_BATCH_CHUNK_SIZE por defecto)
+
+    Returns:
+        str: ID del lote
+    """
+    from django_rest_role_jwt.celery import enqueue_for_user
+
+    batch_id = uuid.uuid4().hex
+    document_ids = [str(document_id) for document_id in document_ids]
+    user_id = user.pk if user is not None else None
+    _register_batch(batch_id, _split_chunks(document_ids, chunk_size), user_id)
+    enqueue_for_user(process_documents_batch, user, document_ids, chunk_size,
+                     batch_id=batch_id, user_id=user_id)
+    return batch_id
+
+
+@shared_task
+def process_documents_batch(document_ids, chunk_size=None, batch_id=None, user_id=None):
+    """
+    Procesa un lote grande de documentos repartiéndolo en bloques
+
+    Cada bloque se procesa en una tarea process_document_chunk que deja su
+    resultado en la caché compartida; get_batch_progress los agrega sin
+    necesidad de un backend de resultados de Celery.
+
+    Args:
+        document_ids: IDs de los documentos a procesar
+        chunk_size: Documentos por bloque (DOCUMENT_BATCH_CHUNK_SIZE por defecto)
+        batch_id: ID del lote (se genera si no se indica)
+        user_id: ID del usuario que lanza el lote
+
+    Returns:
+        dict: ID del lote y número de bloques y documentos encolados
+    """
+    document_ids = [str(document_id) for document_id in document_ids]
+    chunks = _split_chunks(document_ids, chunk_size)
+    if batch_id is None:
+        batch_id = uuid.uuid4().hex
+    if cache.get(BATCH_KEY.format(batch_id=batch_id)) is None:
+        _register_batch(batch_id, chunks, user_id)
+
+    group(
+        process_document_chunk.s(chunk, batch_id=batch_id, chunk_index=index)
+        for index, chunk in enumerate(chunks)
+    ).apply_async()
+
+    return {
+        'status': 'queued',
+        'batch_id': batch_id,
+        'chunks': len(chunks),
+        'documents': len(document_ids)
+    }
+
+
+@shared_task
+def process_document_chunk(document_ids, batch_id=None, chunk_index=None):
+    """
+    Procesa un bloque de documentos con escrituras en bloque
+
+    Los documentos se leen con una sola consulta, los análisis se escriben con
+    bulk_create/bulk_update y los documentos correctos se marcan como
+    procesados con un único UPDATE.
+
+    Args:
+        document_ids: IDs de los documentos del bloque
+        batch_id: ID del lote al que pertenece el bloque (para el progreso)
+        chunk_index: Posición del bloque dentro del lote
+
+    Returns:
+        dict: Recuento de documentos procesados, fallidos y no encontrados
+    """
+    documents = list(Document.objects.filter(id__in=document_ids))
+    found_ids = {str(document.id) for document in documents}
+    missing = [document_id for document_id in document_ids if str(document_id) not in found_ids]
+
+    results = {}
+    processed_ids = []
+    cache_hits = 0
+    for document in documents:
+        try:
+            content_data, cache_hit = _extract_content_cached(document)
+            results[document.id] = _analysis_fields(content_data)
+            processed_ids.append(document.id)
+            cache_hits += cache_hit
+        except Exception as e:
+            logger.error(f"Error procesando documento {document.id}: {str(e)}")
+            results[document.id] = {
+                'processing_errors': str(e),
+                'extraction_complete': False
+            }
+
+    existing = {
+        analysis.document_id: analysis
+        for analysis in DocumentAnalysis.objects.filter(document_id__in=results.keys())
+    }
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    for document_id, fields in results.items():
+        analysis = existing.get(document_id)
+        if analysis is None:
+            to_create.append(DocumentAnalysis(document_id=document_id, **fields))
+        else:
+            for field, value in fields.items():
+                setattr(analysis, field, value)
+            analysis.extraction_date = now
+            to_update.append(analysis)
+
+    with transaction.atomic():
+        DocumentAnalysis.objects.bulk_create(to_create)
+        if to_update:
+            DocumentAnalysis.objects.bulk_update(to_update, ANALYSIS_FIELDS + ['extraction_date'])
+        if processed_ids:
+            Document.objects.filter(id__in=processed_ids).update(processed=True, updated_at=now)
+
+    chunk_result = {
+        'processed': len(processed_ids),
+        'failed': len(results) - len(processed_ids),
+        'missing': missing,
+        'cache_hits': cache_hits
+    }
+    if batch_id is not None:
+        # Una reentrega del bloque (acks_late) sobrescribe su propia clave
+        cache.set(BATCH_CHUNK_KEY.format(batch_id=batch_id, index=chunk_index),
+                  chunk_result, _batch_timeout())
+    return chunk_result
+
+
+def get_batch_progress(batch_id):
+    """
+    Agrega el progreso de un lote lanzado con start_documents_batch
+
+    Args:
+        batch_id: ID del lote
+
+    Returns:
+        dict: Estado del lote (con el user_id de quien lo lanzó) o None si
+        el lote no existe o ha caducado
+    """
+    batch = cache.get(BATCH_KEY.format(batch_id=batch_id))
+    if batch is None:
+        return None
+
+    chunk_keys = [
+        BATCH_CHUNK_KEY.format(batch_id=batch_id, index=index)
+        for index in range(batch['chunks'])
+    ]
+    chunk_results = cache.get_many(chunk_keys).values()
+
+    progress = {
+        'batch_id': batch_id,
+        'user_id': batch['user_id'],
+        'documents': batch['documents'],
+        'chunks': batch['chunks'],
+        'chunks_completed': len(chunk_results),
+        'processed': 0,
+        'failed': 0,
+        'missing': 0
+    }
+    for result in chunk_results:
+        progress['processed'] += result.get('processed', 0)
+        progress['failed'] += result.get('failed', 0)
+        progress['missing'] += len(result.get('missing', []))
+
+    progress['finished'] = progress['chunks_completed'] == progress['chunks']
+    return progress
+
+
+def _split_chunks(document_ids, chunk_size=None):
+    chunk_size = chunk_size or getattr(settings, 'DOCUMENT_BATCH_CHUNK_SIZE', 50)
+    return [
+        document_ids[i:i + chunk_size]
+        for i in range(0, len(document_ids), chunk_size)
+    ]
+
+
+def _register_batch(batch_id, chunks, user_id):
+    """Guarda la descripción del lote en la caché compartida"""
+    cache.set(BATCH_KEY.format(batch_id=batch_id), {
+        'user_id': user_id,
+        'chunks': len(chunks),
+        'documents': sum(len(chunk) for chunk in chunks)
+    }, _batch_timeout())
+
+
+def _batch_timeout():
+    return getattr(settings, 'DOCUMENT_BATCH_PROGRESS_TIMEOUT', 24 * 60 * 60)
+
+
+def _analysis_fields(content_data):
+    """Convierte el resultado de un parser en los campos de DocumentAnalysis"""
+    processing_errors = content_data.get('error', '')
+    if content_data.get('limits_hit'):
+        # Extracción parcial: dejar constancia de los límites alcanzados
+        hits = ', '.join(
+            f"{hit['limit']} ({hit['value']} > {hit['maximum']})"
+            for hit in content_data['limits_hit']
+        )
+        processing_errors = f"Extracción parcial, límites alcanzados: {hits}"
+
+    return {
+        'content_text': content_data.get('text', ''),
+        'content_structure': {
+            'metadata': content_data.get('metadata', {}),
+            'pages': content_data.get('pages', []),
+            'paragraphs': content_data.get('paragraphs', []),
+            'headings': content_data.get('headings', []),
+            'chart_axes': content_data.get('chart_axes', []),
+            'metrics': content_data.get('metrics', {})
+        },
+        'extracted_images': content_data.get('images', []),
+        'extracted_tables': content_data.get('tables', []),
+        'extracted_charts': content_data.get('chart_data', []),
+        'extraction_complete': not processing_errors,
+        'processing_errors': processing_errors
+    }
+
+
+def _extract_content_cached(document):
+    """
+    Extrae el contenido reutilizando la caché por hash de contenido
+
+    Returns:
+        tuple: (datos extraídos, True si venían de la caché)
+    """
+    cache_key = extraction_cache.make_key(document.file_type, hash_file(document.file))
+    content_data = extraction_cache.get(cache_key)
+    if content_data is not None:
+        return content_data, True
+
+    content_data = _extract_content(document)
+    if 'error' not in content_data and not content_data.get('truncated'):
+        extraction_cache.set(cache_key, content_data)
+    return content_data, False
+
+
+def _extract_content(document):
+    """
+    Selecciona el parser adecuado según el tipo de archivo y extrae el contenido
+
+    Si el parser tiene versión incremental, sus bloques se consumen según
+    llegan y solo se guarda una muestra acotada del texto y de los párrafos
+    (DOCUMENT_STREAM_MAX_TEXT_CHARS y DOCUMENT_STREAM_MAX_PARAGRAPHS) junto
+    con los recuentos totales.
+
+    Args:
+        document: Instancia de Document
+
+    Returns:
+        dict: Datos extraídos por el parser
+    """
+    # El registro importa el módulo del parser solo la primera vez que se usa
+    blocks = stream_document(document.file_type, document.file)
+    if blocks is None:
+        return parse_document(document.file_type, document.file)
+    return collect_blocks(
+        blocks,
+        max_text_chars=getattr(settings, 'DOCUMENT_STREAM_MAX_TEXT_CHARS', MAX_TEXT_CHARS),
+        max_paragraphs=getattr(settings, 'DOCUMENT_STREAM_MAX_PARAGRAPHS', MAX_PARAGRAPHS)
+    )
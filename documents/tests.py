@@ -0,0 +1,264 @@
+import io
+from unittest import mock
+
+import docx
+
+import numpy as np
+import pandas as pd
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from django_rest_role_jwt.task_metrics import ProcessCounters
+from documents.cache import METRIC_EVENTS, ExtractionCache, get_extraction_cache_metrics
+from documents.parsers.blocks import collect_blocks
+from documents.parsers.excel_parser import build_chart_series, downsample_indices
+from documents.parsers.limits import ExtractionLimits
+from documents.parsers.registry import _pdf_workers, stream_document
+from documents.parsers.text_parser import ParagraphSplitter, extract_text_from_txt, stream_txt
+from documents.parsers.word_parser import extract_text_from_docx
+
+LOCAL_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def reference_lttb(x, y, threshold):
+    """Implementación directa de LTTB (Steinarsson, 2013), punto a punto"""
+    n = len(y)
+    every = (n - 2) / (threshold - 2)
+    selected = [0]
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = sum(x[end:next_end]) / (next_end - end)
+        avg_y = sum(y[end:next_end]) / (next_end - end)
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    selected.append(n - 1)
+    return selected
+
+
+class DownsampleTest(SimpleTestCase):
+    """ Test module for chart series downsampling """
+
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        self.x = np.arange(1000, dtype=float)
+        self.y = np.cumsum(rng.normal(size=1000))
+
+    def test_lttb_matches_reference(self):
+        """Test that the vectorized LTTB selects the same points as the reference"""
+        for threshold in (3, 10, 97, 500):
+            with self.subTest(threshold=threshold):
+                indices = downsample_indices(self.x, self.y, threshold)
+                self.assertEqual(indices.tolist(), reference_lttb(self.x, self.y, threshold))
+
+    def test_lttb_keeps_endpoints_and_peaks(self):
+        """Test that the first, last and extreme points survive"""
+        y = np.zeros(1000)
+        y[345] = 50.0
+        y[678] = -50.0
+        indices = downsample_indices(self.x, y, 20)
+        self.assertEqual(len(indices), 20)
+        self.assertTrue(np.all(np.diff(indices) > 0))
+        for index in (0, 345, 678, 999):
+            self.assertIn(index, indices)
+
+    def test_minmax_keeps_bucket_extremes(self):
+        """Test that each bucket contributes its minimum and maximum"""
+        indices = downsample_indices(self.x, self.y, 100, method='minmax')
+        self.assertLessEqual(len(indices), 100)
+        self.assertTrue(np.all(np.diff(indices) > 0))
+        self.assertIn(int(np.argmin(self.y)), indices)
+        self.assertIn(int(np.argmax(self.y)), indices)
+
+    def test_nulls_and_small_series(self):
+        """Test that null points are dropped and short series are kept whole"""
+        y = self.y[:10].copy()
+        y[3] = np.nan
+        x = self.x[:10].copy()
+        x[7] = np.nan
+        self.assertEqual(downsample_indices(x, y, 20).tolist(), [0, 1, 2, 4, 5, 6, 8, 9])
+
+        self.y[::2] = np.nan
+        indices = downsample_indices(self.x, self.y, 50)
+        self.assertEqual(len(indices), 50)
+        self.assertTrue(np.all(indices % 2 == 1))
+
+    def test_unknown_method(self):
+        """Test that an unsupported method raises ValueError"""
+        with self.assertRaises(ValueError):
+            downsample_indices(self.x, self.y, 10, method='average')
+
+    def test_chart_series(self):
+        """Test the sampling metadata and the aligned axes of each series"""
+        df = pd.DataFrame({'mes': np.arange(1000), 'ventas': self.y, 'coste': self.y * 2})
+        series = build_chart_series(df, 'Hoja1', max_points=50)
+        self.assertEqual([s['title'] for s in series], ['ventas vs mes', 'coste vs mes'])
+        for s in series:
+            self.assertEqual(s['sampling'], {'method': 'lttb', 'points': 50, 'original_points': 1000})
+            self.assertEqual(len(s['x_axis']['data']), 50)
+            self.assertEqual(len(s['y_axis']['data']), 50)
+            self.assertEqual(s['x_axis']['data'][0], 0)
+            self.assertEqual(s['x_axis']['data'][-1], 999)
+
+        full = build_chart_series(df, 'Hoja1', max_points=50, full_resolution=True)
+        self.assertEqual(full[0]['sampling']['method'], None)
+        self.assertEqual(len(full[0]['y_axis']['data']), 1000)
+
+    def test_full_resolution_axis_is_shared(self):
+        """Test that full series reference one sheet-level X axis"""
+        df = pd.DataFrame({'mes': np.arange(10), 'ventas': self.y[:10], 'coste': self.y[:10]})
+        axes = [{'sheet': 'Otra', 'label': 'x', 'data': [0]}]
+        series = build_chart_series(df, 'Hoja1', full_resolution=True, axes=axes)
+        self.assertEqual(len(axes), 2)
+        self.assertEqual(axes[1], {'sheet': 'Hoja1', 'label': 'mes', 'data': list(range(10))})
+        self.assertEqual([s['x_axis'] for s in series], [{'label': 'mes', 'axis': 1}] * 2)
+
+
+@mock.patch('documents.parsers.registry.os.cpu_count', return_value=16)
+@override_settings(CELERY_QUEUE_CONFIG={'documents': {'concurrency': 2}})
+class PdfWorkersTest(SimpleTestCase):
+    """ Test module for the PDF pool size """
+
+    def test_cpus_are_shared_between_tasks(self, cpu_count):
+        """Test that each concurrent documents task gets its share of the CPUs"""
+        with self.settings(PDF_PARSER_WORKERS=None):
+            self.assertEqual(_pdf_workers(), 8)
+        with self.settings(PDF_PARSER_WORKERS=64):
+            self.assertEqual(_pdf_workers(), 8)
+        with self.settings(PDF_PARSER_WORKERS=3):
+            self.assertEqual(_pdf_workers(), 3)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class ExtractionCacheTest(SimpleTestCase):
+    """ Test module for the two-level extraction cache """
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch('documents.cache._metrics',
+                             ProcessCounters('test:extraction', METRIC_EVENTS, flush_interval=3600))
+        self.metrics = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_local_hit_does_not_touch_the_shared_cache(self):
+        """Test that an in-process hit needs no shared cache round trip"""
+        extraction_cache = ExtractionCache()
+        key = extraction_cache.make_key('TXT', 'abc')
+        extraction_cache.set(key, {'text': 'hola'})
+        with mock.patch('documents.cache.cache') as shared, \
+                mock.patch('django_rest_role_jwt.task_metrics.cache') as metrics_cache:
+            self.assertEqual(extraction_cache.make_key('TXT', 'abc'), key)
+            self.assertEqual(extraction_cache.get(key), {'text': 'hola'})
+        self.assertEqual(shared.mock_calls, [])
+        self.assertEqual(metrics_cache.mock_calls, [])
+
+    def test_shared_hit_and_invalidation(self):
+        """Test that other processes reuse entries until the generation changes"""
+        writer, reader = ExtractionCache(), ExtractionCache(generation_ttl=0)
+        key = writer.make_key('TXT', 'abc')
+        writer.set(key, {'text': 'hola'})
+        self.assertEqual(reader.get(reader.make_key('TXT', 'abc')), {'text': 'hola'})
+
+        writer.invalidate('TXT')
+        self.assertNotEqual(writer.make_key('TXT', 'abc'), key)
+        self.assertNotEqual(reader.make_key('TXT', 'abc'), key)
+        self.assertIsNone(reader.get(reader.make_key('TXT', 'abc')))
+
+    def test_metrics_are_published_per_process(self):
+        """Test that counters are summed once each process flushes them"""
+        extraction_cache = ExtractionCache()
+        key = extraction_cache.make_key('TXT', 'abc')
+        extraction_cache.get(key)
+        extraction_cache.set(key, {'text': 'hola'})
+        extraction_cache.get(key)
+        self.assertEqual(get_extraction_cache_metrics()['misses'], 0)
+
+        self.metrics.flush()
+        metrics = get_extraction_cache_metrics()
+        self.assertEqual((metrics['hits'], metrics['misses']), (1, 1))
+        self.assertEqual(metrics['hit_rate'], 0.5)
+
+
+class StreamDocxTest(SimpleTestCase):
+    """ Test module for the incremental DOCX extraction """
+
+    def setUp(self):
+        document = docx.Document()
+        document.core_properties.title = 'Contrato'
+        document.add_heading('Cláusulas', level=1)
+        for i in range(20):
+            document.add_paragraph(f'Cláusula {i}')
+        document.add_table(rows=2, cols=2)
+        buffer = io.BytesIO()
+        document.save(buffer)
+        self.content = buffer.getvalue()
+
+    def test_matches_full_parser(self):
+        """Test that collecting every block gives the full parser's result"""
+        full = extract_text_from_docx(io.BytesIO(self.content))
+        streamed = collect_blocks(stream_document('DOCX', io.BytesIO(self.content)),
+                                  max_text_chars=None, max_paragraphs=None)
+        for field in ('text', 'paragraphs', 'headings', 'tables'):
+            self.assertEqual(streamed[field], full[field])
+        self.assertEqual(streamed['metadata']['title'], 'Contrato')
+        self.assertFalse(streamed['metadata']['text_sampled'])
+
+    def test_sample_is_bounded(self):
+        """Test that only a sample is kept while the counts cover the whole body"""
+        result = collect_blocks(stream_document('DOCX', io.BytesIO(self.content)),
+                                max_text_chars=30, max_paragraphs=5)
+        self.assertEqual(len(result['text']), 30)
+        self.assertEqual(len(result['paragraphs']), 5)
+        self.assertEqual(result['metadata']['paragraph_count'], 21)
+        self.assertEqual(result['metadata']['heading_count'], 1)
+        self.assertEqual(result['metadata']['table_count'], 1)
+        self.assertTrue(result['metadata']['text_sampled'])
+        self.assertNotIn('truncated', result)
+
+
+class StreamTxtTest(SimpleTestCase):
+    """ Test module for the incremental TXT extraction """
+
+    def test_matches_full_parser(self):
+        """Test that the streamed paragraphs and stats match the full parser"""
+        content = 'Hola\r\nmundo\n\n\nSegundo párrafo\n\nFin'.encode('utf-8')
+        full = extract_text_from_txt(content, chunk_size=4)
+        result = collect_blocks(stream_txt(content, chunk_size=4))
+        self.assertEqual([p['text'] for p in result['paragraphs']], full['paragraphs'])
+        self.assertEqual(result['text'], 'Hola\nmundo\n\nSegundo párrafo\n\nFin\n\n')
+        for field in ('encoding', 'byte_count', 'line_count'):
+            self.assertEqual(result['metadata'][field], full['metadata'][field])
+        self.assertEqual(result['metadata']['paragraph_count'], 3)
+
+    def test_byte_limit_does_not_cut_the_stream(self):
+        """Test that only a sample is kept of a file above max_decompressed_bytes"""
+        content = b'linea\n\n' * 1000
+        limits = ExtractionLimits(max_decompressed_bytes=100)
+        self.assertTrue(extract_text_from_txt(content, chunk_size=64, limits=limits)['truncated'])
+
+        result = collect_blocks(stream_txt(content, chunk_size=64, limits=limits),
+                                max_text_chars=70, max_paragraphs=10)
+        self.assertNotIn('truncated', result)
+        self.assertEqual(result['metadata']['paragraph_count'], 1000)
+        self.assertEqual(result['metadata']['byte_count'], len(content))
+        self.assertEqual(len(result['text']), 70)
+        self.assertEqual(len(result['paragraphs']), 10)
+
+    def test_long_paragraphs_are_split(self):
+        """Test that max_chars bounds paragraphs and unterminated lines"""
+        splitter = ParagraphSplitter(max_chars=10)
+        paragraphs = splitter.feed('abcdef\nghijkl\nxy') + splitter.feed('z' * 25) + splitter.close()
+        self.assertEqual(paragraphs, ['abcdef\nghijkl', 'xy' + 'z' * 25])
+        self.assertEqual(splitter.line_count, 3)
+
+        splitter = ParagraphSplitter(max_chars=10)
+        paragraphs = splitter.feed('a' * 12) + splitter.feed('b' * 3 + '\nc') + splitter.close()
+        self.assertEqual(paragraphs, ['a' * 12, 'bbb\nc'])
+        self.assertEqual(splitter.line_count, 2)
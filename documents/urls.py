@@ -1,10 +1,14 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import DocumentViewSet
+from .batch_views import DocumentBatchProgressView, DocumentBatchView
 
 router = DefaultRouter()
 router.register(r'documents', DocumentViewSet, basename='document')
 
 urlpatterns = [
+    path('documents/batches/', DocumentBatchView.as_view(), name='document-batches'),
+    path('documents/batches/<str:batch_id>/', DocumentBatchProgressView.as_view(),
+         name='document-batch-progress'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -0,0 +1,240 @@
+"""
+Cliente HTTP asíncrono para proveedores de modelos
+
+Las llamadas por diapositiva se lanzan a la vez con asyncio, limitadas por un
+semáforo (concurrencia máxima) y por un token bucket por proveedor (límite de
+peticiones por segundo). Cada proceso worker mantiene una única requests.Session
+con pool de conexiones por proveedor; las peticiones bloqueantes se ejecutan en
+un pool de hilos del tamaño de la concurrencia, de modo que no hace falta
+ninguna dependencia HTTP asíncrona adicional.
+
+Desde una tarea de Celery (código síncrono) se usa run_sync():
+
+    client = get_client('openai', base_url=..., headers=...)
+    results = run_sync(client.post_many('/chat/completions', payloads))
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .llm_provider import ProviderError
+
+logger = logging.getLogger(__name__)
+
+# Respuestas que se reintentan (límite de peticiones y errores transitorios)
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Limitador de peticiones por segundo compartido entre hilos y event loops
+
+    acquire() reserva un token (el saldo puede quedar negativo) y espera lo
+    necesario hasta que ese token esté disponible, de modo que las esperas de
+    peticiones concurrentes quedan escalonadas.
+
+    Args:
+        rate: Tokens por segundo
+        capacity: Ráfaga máxima
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1, rate))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Reserva un token y devuelve los segundos que hay que esperar"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    async def acquire(self):
+        wait = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+
+class AsyncProviderClient:
+    """
+    Cliente de un proveedor con pool de conexiones, concurrencia acotada,
+    límite de peticiones y reintentos con jitter
+
+    Args:
+        name: Nombre del proveedor (agrupa sesión y límite de peticiones)
+        base_url: URL base de la API
+        headers: Cabeceras comunes (autenticación...)
+        max_concurrency: Peticiones simultáneas como máximo
+        rate_per_second: Peticiones por segundo (None sin límite)
+        burst: Ráfaga máxima del token bucket
+        max_retries: Reintentos por petición
+        backoff_base: Espera base en segundos (crece exponencialmente)
+        backoff_max: Espera máxima entre reintentos
+        timeout: Timeout de cada petición en segundos
+    """
+
+    def __init__(self, name, base_url, headers=None, max_concurrency=8, rate_per_second=None,
+                 burst=None, max_retries=3, backoff_base=0.5, backoff_max=20.0, timeout=60):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.headers = headers or {}
+        self.max_concurrency = max_concurrency
+        self.bucket = TokenBucket(rate_per_second, burst) if rate_per_second else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0}
+        self._pid = None
+
+    def _resources(self):
+        """Sesión y pool de hilos del proceso actual (se recrean tras un fork)"""
+        if self._pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update(self.headers)
+            self._session = session
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                thread_name_prefix=f"llm-{self.name}")
+            self._pid = os.getpid()
+        return self._session, self._executor
+
+    async def post(self, path, payload, semaphore=None):
+        """
+        POST JSON con reintentos; devuelve el cuerpo de la respuesta decodificado
+
+        Raises:
+            ProviderError: Si la petición falla tras los reintentos o el error
+                no es transitorio
+        """
+        session, executor = self._resources()
+        semaphore = semaphore or asyncio.Semaphore(self.max_concurrency)
+        loop = asyncio.get_running_loop()
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.stats['retries'] += 1
+                await asyncio.sleep(self._backoff(attempt, last_error))
+            if self.bucket is not None:
+                await self.bucket.acquire()
+
+            async with semaphore:
+                self.stats['requests'] += 1
+                try:
+                    response = await loop.run_in_executor(
+                        executor, partial(session.post, url, json=payload, timeout=self.timeout)
+                    )
+                except requests.RequestException as e:
+                    last_error = ProviderError(f"{self.name}: {str(e)}")
+                    continue
+
+            if response.status_code in RETRY_STATUSES:
+                last_error = ProviderError(f"{self.name}: HTTP {response.status_code}")
+                last_error.retry_after = _retry_after(response)
+                continue
+            if response.status_code >= 400:
+                self.stats['failures'] += 1
+                raise ProviderError(f"{self.name}: HTTP {response.status_code} {response.text[:200]}")
+            try:
+                return response.json()
+            except ValueError as e:
+                raise ProviderError(f"{self.name}: respuesta no es JSON: {str(e)}")
+
+        self.stats['failures'] += 1
+        raise last_error
+
+    async def post_many(self, path, payloads, on_result=None, max_concurrency=None):
+        """
+        Lanza todas las peticiones a la vez respetando concurrencia y límite
+
+        Args:
+            path: Ruta relativa a base_url
+            payloads: Lista de cuerpos JSON
+            on_result: Callable opcional on_result(índice, respuesta) al terminar cada una
+            max_concurrency: Peticiones simultáneas de esta llamada (acotado
+                por el max_concurrency del cliente)
+
+        Returns:
+            list: Respuestas en el mismo orden que payloads
+        """
+        limit = self.max_concurrency
+        if max_concurrency:
+            limit = max(1, min(limit, max_concurrency))
+        semaphore = asyncio.Semaphore(limit)
+
+        async def call(index, payload):
+            result = await self.post(path, payload, semaphore)
+            if on_result is not None:
+                on_result(index, result)
+            return result
+
+        return await asyncio.gather(*(call(index, payload) for index, payload in enumerate(payloads)))
+
+    def _backoff(self, attempt, error):
+        """Espera exponencial con jitter completo; Retry-After tiene prioridad"""
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(name, **options):
+    """
+    Cliente compartido por proveedor dentro del proceso (mismo pool y límite)
+
+    Se reutiliza solo con la misma configuración: dos proveedores con la
+    misma URL pero distinta clave u opciones obtienen clientes distintos.
+    """
+    raw = json.dumps(options, sort_keys=True, default=str)
+    key = (name, hashlib.sha256(raw.encode('utf-8')).hexdigest())
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = AsyncProviderClient(name, **options)
+        return client
+
+
+def run_sync(coroutine):
+    """
+    Ejecuta una corrutina desde código síncrono (tareas de Celery, vistas)
+
+    Si el hilo ya tiene un event loop en marcha, la corrutina se ejecuta en
+    un hilo aparte con su propio loop.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
@@ -0,0 +1,149 @@
+import io
+import logging
+import wave
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Ventana usada para medir la energía al buscar silencios
+ENERGY_WINDOW_SECONDS = 0.02
+
+# Muestras leídas del archivo en cada bloque
+READ_BLOCK_FRAMES = 64 * 1024
+
+
+class AudioChunk:
+    """
+    Fragmento de audio mono PCM de 16 bits listo para transcribir
+
+    Args:
+        index: Posición del fragmento
+        start: Segundo de inicio dentro de la grabación
+        end: Segundo de fin
+        samples: Muestras int16
+        sample_rate: Frecuencia de muestreo
+    """
+
+    def __init__(self, index, start, end, samples, sample_rate):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.samples = samples
+        self.sample_rate = sample_rate
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    def to_wav(self):
+        """Codifica el fragmento como WAV (bytes)"""
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(self.samples.astype('<i2').tobytes())
+        return buffer.getvalue()
+
+
+def wav_duration(file):
+    """Duración en segundos según la cabecera WAV (sin leer las muestras)"""
+    with wave.open(file, 'rb') as wav:
+        duration = wav.getnframes() / float(wav.getframerate())
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    return duration
+
+
+def iter_wav_chunks(file, chunk_seconds=30.0, overlap_seconds=1.0, search_seconds=2.0):
+    """
+    Divide un WAV en fragmentos solapados con los cortes alineados a silencios
+
+    El archivo se lee por bloques; en memoria solo se mantiene el fragmento en
+    curso más la ventana de búsqueda. Cada corte se hace en la ventana de
+    menor energía en torno a chunk_seconds, y el fragmento siguiente empieza
+    overlap_seconds antes del corte para no perder palabras en la frontera.
+
+    Args:
+        file: Objeto archivo WAV
+        chunk_seconds: Duración objetivo de cada fragmento
+        overlap_seconds: Solapamiento entre fragmentos consecutivos
+        search_seconds: Margen a cada lado del corte objetivo para buscar silencio
+
+    Yields:
+        AudioChunk: Fragmentos mono de 16 bits en orden
+    """
+    with wave.open(file, 'rb') as wav:
+        sample_rate = wav.getframerate()
+        channels = wav.getnchannels()
+        sample_width = wav.getsampwidth()
+
+        target = int(chunk_seconds * sample_rate)
+        overlap = int(overlap_seconds * sample_rate)
+        search = int(search_seconds * sample_rate)
+        window = max(1, int(ENERGY_WINDOW_SECONDS * sample_rate))
+
+        buffer = np.empty(0, dtype=np.int16)
+        buffer_start = 0
+        index = 0
+
+        while True:
+            raw = wav.readframes(READ_BLOCK_FRAMES)
+            if raw:
+                buffer = np.concatenate([buffer, pcm_to_mono_int16(raw, sample_width, channels)])
+
+            while len(buffer) >= target + search:
+                cut = find_silence(buffer, target - search, target + search, window)
+                yield AudioChunk(index, buffer_start / sample_rate, (buffer_start + cut) / sample_rate,
+                                 buffer[:cut].copy(), sample_rate)
+                index += 1
+                next_start = max(1, cut - overlap)
+                buffer = buffer[next_start:]
+                buffer_start += next_start
+
+            if not raw:
+                break
+
+        # Último fragmento (si queda algo más que el solapamiento)
+        if len(buffer) > overlap or index == 0:
+            yield AudioChunk(index, buffer_start / sample_rate,
+                             (buffer_start + len(buffer)) / sample_rate, buffer, sample_rate)
+
+
+def find_silence(samples, low, high, window):
+    """
+    Posición de la ventana de menor energía RMS dentro de [low, high)
+
+    Returns:
+        int: Índice de muestra del centro de la ventana más silenciosa
+    """
+    low = max(window, low)
+    high = min(len(samples), high)
+    segment = samples[low:high].astype(np.float32)
+    windows = len(segment) // window
+    if windows == 0:
+        return min(high, max(low, (low + high) // 2))
+    energy = np.sqrt(np.mean(segment[:windows * window].reshape(windows, window) ** 2, axis=1))
+    return low + int(np.argmin(energy)) * window + window // 2
+
+
+def pcm_to_mono_int16(raw, sample_width, channels):
+    """Convierte PCM entrelazado (8, 16, 24 o 32 bits) en muestras mono int16"""
+    if sample_width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.int16) - 128) << 8
+    elif sample_width == 2:
+        samples = np.frombuffer(raw, dtype='<i2')
+    elif sample_width == 3:
+        data = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+        # Los 2 bytes más significativos de cada muestra de 24 bits
+        samples = (data[:, 1].astype(np.int16) | (data[:, 2].astype(np.int16) << 8))
+    elif sample_width == 4:
+        samples = (np.frombuffer(raw, dtype='<i4') >> 16).astype(np.int16)
+    else:
+        raise ValueError(f"Tamaño de muestra no soportado: {sample_width} bytes")
+
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels]
+        samples = samples.reshape(-1, channels).astype(np.int32).mean(axis=1).astype(np.int16)
+    return samples
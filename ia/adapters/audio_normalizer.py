@@ -0,0 +1,256 @@
+"""
+Normalización de grabaciones a PCM mono de 16 bits a 16 kHz
+
+El audio se procesa por bloques: se convierte a mono, se filtra (paso bajo,
+para evitar aliasing al reducir la frecuencia) y se remuestrea con NumPy,
+conservando entre bloques el estado del filtro y la posición de
+interpolación. El resultado se escribe como WAV a medida que se genera.
+
+Los WAV PCM se leen directamente; para los formatos comprimidos (MP3, Ogg,
+M4A) hace falta un decodificador, y se usa ffmpeg solo para decodificar a
+PCM si está disponible (VOICE_FFMPEG_BINARY o en el PATH).
+"""
+import logging
+import shutil
+import subprocess
+import threading
+import wave
+
+import numpy as np
+from django.conf import settings
+
+from .audio_chunker import pcm_to_mono_int16
+
+logger = logging.getLogger(__name__)
+
+TARGET_SAMPLE_RATE = 16000
+
+# Muestras de entrada procesadas por bloque
+BLOCK_FRAMES = 64 * 1024
+
+# Coeficientes del filtro paso bajo
+FILTER_TAPS = 63
+
+
+class StreamResampler:
+    """
+    Remuestreador por bloques (filtro FIR + interpolación lineal)
+
+    Args:
+        source_rate: Frecuencia de entrada
+        target_rate: Frecuencia de salida
+    """
+
+    def __init__(self, source_rate, target_rate=TARGET_SAMPLE_RATE):
+        self.source_rate = source_rate
+        self.target_rate = target_rate
+        self.step = source_rate / target_rate
+        self.taps = self._lowpass(source_rate, target_rate) if source_rate > target_rate else None
+        self._history = np.zeros(FILTER_TAPS - 1, dtype=np.float32) if self.taps is not None else None
+        self._previous = None
+        self._position = 0.0
+
+    @staticmethod
+    def _lowpass(source_rate, target_rate):
+        """Filtro sinc con ventana de Hamming, corte al 90% del nuevo Nyquist"""
+        cutoff = 0.45 * target_rate / source_rate
+        n = np.arange(FILTER_TAPS) - (FILTER_TAPS - 1) / 2
+        taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(FILTER_TAPS)
+        return (taps / taps.sum()).astype(np.float32)
+
+    def process(self, samples):
+        """
+        Remuestrea un bloque de muestras float32
+
+        Returns:
+            numpy.ndarray: Muestras de salida (pueden ser 0 en bloques muy cortos)
+        """
+        if self.source_rate == self.target_rate or not len(samples):
+            return samples
+
+        if self.taps is not None:
+            padded = np.concatenate([self._history, samples])
+            self._history = padded[-(FILTER_TAPS - 1):]
+            samples = np.convolve(padded, self.taps, mode='valid').astype(np.float32)
+
+        # El último valor del bloque anterior es el índice 0 del actual
+        if self._previous is not None:
+            samples = np.concatenate([[self._previous], samples])
+        last = len(samples) - 1
+        if last < self._position:
+            self._position -= last
+            self._previous = samples[-1]
+            return np.empty(0, dtype=np.float32)
+
+        count = int((last - self._position) // self.step) + 1
+        positions = self._position + np.arange(count) * self.step
+        output = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+        self._position = positions[-1] + self.step - last
+        self._previous = samples[-1]
+        return output
+
+
+def get_ffmpeg_binary():
+    return getattr(settings, 'VOICE_FFMPEG_BINARY', None) or shutil.which('ffmpeg')
+
+
+def can_normalize(info):
+    """Indica si la grabación se puede decodificar para normalizarla"""
+    if info.container == 'wav':
+        return info.codec in ('pcm', 'float') and info.extra.get('bits_per_sample') in (8, 16, 24, 32)
+    return get_ffmpeg_binary() is not None
+
+
+def iter_pcm_blocks(file, info):
+    """
+    Bloques de muestras mono float32 (en el rango de int16) de la grabación
+
+    Raises:
+        ValueError: Si el formato no se puede decodificar
+    """
+    if info.container == 'wav':
+        yield from _iter_wav_blocks(file, info)
+    elif get_ffmpeg_binary():
+        yield from _iter_ffmpeg_blocks(file, info)
+    else:
+        raise ValueError(f"No hay decodificador disponible para {info.container}/{info.codec}")
+
+
+def _iter_wav_blocks(file, info):
+    block_align = info.extra['block_align']
+    sample_width = block_align // info.channels
+    remaining = info.extra['data_size'] - info.extra['data_size'] % block_align
+    file.seek(info.extra['data_offset'])
+    while remaining > 0:
+        raw = file.read(min(remaining, BLOCK_FRAMES * block_align))
+        if not raw:
+            break
+        raw = raw[:len(raw) - len(raw) % block_align]
+        remaining -= len(raw)
+        if info.codec == 'float':
+            dtype = '<f4' if sample_width == 4 else '<f8'
+            samples = np.frombuffer(raw, dtype=dtype).reshape(-1, info.channels).mean(axis=1)
+            yield (np.clip(samples, -1.0, 1.0) * 32767).astype(np.float32)
+        else:
+            yield pcm_to_mono_int16(raw, sample_width, info.channels).astype(np.float32)
+
+
+def _iter_ffmpeg_blocks(file, info):
+    """Decodifica con ffmpeg a PCM de 16 bits con los canales y frecuencia originales"""
+    command = [
+        get_ffmpeg_binary(), '-nostdin', '-loglevel', 'error', '-i', 'pipe:0',
+        '-f', 's16le', '-acodec', 'pcm_s16le',
+        '-ac', str(info.channels), '-ar', str(info.sample_rate), 'pipe:1'
+    ]
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE)
+
+    def feed():
+        try:
+            file.seek(0)
+            for chunk in iter(lambda: file.read(BLOCK_FRAMES), b''):
+                process.stdin.write(chunk)
+        except (BrokenPipeError, ValueError):
+            pass
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    frame_bytes = 2 * info.channels
+    try:
+        while True:
+            raw = process.stdout.read(BLOCK_FRAMES * frame_bytes)
+            if not raw:
+                break
+            raw = raw[:len(raw) - len(raw) % frame_bytes]
+            yield pcm_to_mono_int16(raw, 2, info.channels).astype(np.float32)
+    finally:
+        process.stdout.close()
+        process.kill()
+        feeder.join()
+        process.wait()
+
+    if process.returncode not in (0, -9):
+        raise ValueError(f"ffmpeg no ha podido decodificar el audio: "
+                         f"{process.stderr.read().decode('utf-8', 'replace')[:200]}")
+
+
+def normalize_audio(file, info, output, target_rate=TARGET_SAMPLE_RATE, max_seconds=None,
+                    on_block=None):
+    """
+    Escribe la grabación como WAV mono de 16 bits a target_rate
+
+    Args:
+        file: Grabación original (objeto archivo posicionable)
+        info: AudioInfo de probe_audio()
+        output: Objeto archivo donde se escribe el WAV
+        target_rate: Frecuencia de salida
+        max_seconds: Si se indica, se descarta el audio posterior
+        on_block: Callable opcional que recibe los segundos escritos tras
+            cada bloque (p. ej. para renovar el lease del worker)
+
+    Returns:
+        float: Segundos escritos
+    """
+    resampler = StreamResampler(info.sample_rate, target_rate)
+    limit = int(max_seconds * info.sample_rate) if max_seconds else None
+    consumed = 0
+    written = 0
+
+    with wave.open(output, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(target_rate)
+
+        blocks = iter_pcm_blocks(file, info)
+        try:
+            for samples in blocks:
+                if limit is not None:
+                    samples = samples[:limit - consumed]
+                consumed += len(samples)
+                resampled = resampler.process(samples)
+                wav.writeframes(np.clip(np.rint(resampled), -32768, 32767).astype('<i2').tobytes())
+                written += len(resampled)
+                if on_block is not None:
+                    on_block(written / target_rate)
+                if limit is not None and consumed >= limit:
+                    break
+        finally:
+            blocks.close()
+
+    output.seek(0)
+    return written / target_rate
+
+
+class AudioTooLongError(ValueError):
+    """La grabación supera VOICE_MAX_DURATION_SECONDS y no se puede recortar"""
+
+
+def duration_limit(info, policy=None):
+    """
+    Aplica el límite de duración configurado a una grabación
+
+    Con VOICE_DURATION_POLICY = 'trim' las grabaciones largas se recortan al
+    normalizarlas; con 'reject' (o si no se pueden decodificar) se rechazan.
+
+    Returns:
+        float o None: Segundos a los que hay que recortar (None si no hace falta)
+
+    Raises:
+        AudioTooLongError: Si la grabación se rechaza
+    """
+    max_seconds = getattr(settings, 'VOICE_MAX_DURATION_SECONDS', None)
+    if not max_seconds or info.duration <= max_seconds:
+        return None
+
+    policy = policy or getattr(settings, 'VOICE_DURATION_POLICY', 'reject')
+    if policy == 'trim' and can_normalize(info):
+        logger.info(f"Grabación de {info.duration:.0f} s recortada a {max_seconds} s")
+        return max_seconds
+    raise AudioTooLongError(
+        f"La grabación dura {info.duration:.0f} s y el máximo es {max_seconds} s"
+    )
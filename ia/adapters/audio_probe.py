@@ -0,0 +1,339 @@
+"""
+Identificación de grabaciones a partir de las cabeceras
+
+probe_audio() determina el contenedor, el códec, la frecuencia de muestreo,
+los canales y la duración leyendo solo las cabeceras (y, en Ogg, la última
+página), sin decodificar el audio. Formatos reconocidos: WAV (RIFF), MP3
+(MPEG audio con o sin ID3v2), Ogg (Vorbis y Opus) y M4A/MP4.
+"""
+import os
+import struct
+
+# Bytes leídos al principio del archivo para identificarlo
+HEADER_BYTES = 64 * 1024
+
+# Tamaño máximo de una página Ogg (para localizar la última)
+OGG_MAX_PAGE = 65307
+
+# Caja moov más grande que se lee en memoria
+MP4_MAX_MOOV = 16 * 1024 * 1024
+
+WAVE_FORMATS = {1: 'pcm', 3: 'float', 6: 'alaw', 7: 'mulaw', 0x11: 'ima_adpcm', 0x55: 'mp3'}
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+_MP3_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 2.5: (11025, 12000, 8000)}
+
+
+class AudioProbeError(ValueError):
+    """El archivo no es un audio reconocible o su cabecera está dañada"""
+
+
+class AudioInfo:
+    """
+    Datos de una grabación obtenidos de sus cabeceras
+
+    Args:
+        container: 'wav', 'mp3', 'ogg' o 'mp4'
+        codec: Códec del audio ('pcm', 'mp3', 'vorbis', 'opus', 'mp4a'...)
+        sample_rate: Frecuencia de muestreo
+        channels: Número de canales
+        duration: Duración en segundos
+        extra: Datos propios del contenedor (en WAV, posición y tamaño de las muestras)
+    """
+
+    def __init__(self, container, codec, sample_rate, channels, duration, **extra):
+        self.container = container
+        self.codec = codec
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.duration = duration
+        self.extra = extra
+
+    @property
+    def is_pcm_wav(self):
+        return self.container == 'wav' and self.codec in ('pcm', 'float')
+
+    def to_dict(self):
+        return {
+            'container': self.container,
+            'codec': self.codec,
+            'sample_rate': self.sample_rate,
+            'channels': self.channels,
+            'duration': self.duration
+        }
+
+    def __repr__(self):
+        return (f"<AudioInfo {self.container}/{self.codec} {self.sample_rate} Hz "
+                f"{self.channels} ch {self.duration:.2f} s>")
+
+
+def probe_audio(file):
+    """
+    Identifica una grabación sin decodificarla
+
+    Args:
+        file: Objeto archivo binario posicionable (se deja al principio)
+
+    Returns:
+        AudioInfo: Datos de la grabación
+
+    Raises:
+        AudioProbeError: Si el formato no se reconoce o la cabecera es inválida
+    """
+    size = _file_size(file)
+    file.seek(0)
+    head = file.read(HEADER_BYTES)
+    try:
+        if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+            return _probe_wav(file, size)
+        if head[:4] == b'OggS':
+            return _probe_ogg(file, head, size)
+        if head[4:8] == b'ftyp':
+            return _probe_mp4(file, size)
+        if head[:3] == b'ID3' or _parse_mp3_header(head[:4].ljust(4, b'\0')) is not None:
+            return _probe_mp3(file, head, size)
+    except (struct.error, IndexError, ZeroDivisionError) as e:
+        raise AudioProbeError(f"Cabecera de audio dañada: {str(e)}")
+    finally:
+        file.seek(0)
+    raise AudioProbeError("Formato de audio no reconocido")
+
+
+def _file_size(file):
+    if hasattr(file, 'size') and file.size is not None:
+        return file.size
+    file.seek(0, os.SEEK_END)
+    return file.tell()
+
+
+def _probe_wav(file, size):
+    """Recorre los chunks RIFF saltando los datos"""
+    file.seek(12)
+    fmt = None
+    while True:
+        header = file.read(8)
+        if len(header) < 8:
+            break
+        chunk_id, chunk_size = struct.unpack('<4sI', header)
+        if chunk_id == b'fmt ':
+            fmt = file.read(chunk_size)
+            if chunk_size % 2:
+                file.seek(1, os.SEEK_CUR)
+            continue
+        if chunk_id == b'data':
+            if fmt is None:
+                raise AudioProbeError("WAV sin chunk fmt antes de los datos")
+            data_offset = file.tell()
+            # Grabaciones en curso pueden declarar 0 o 0xFFFFFFFF como tamaño
+            data_size = min(chunk_size, size - data_offset) if chunk_size else size - data_offset
+            return _wav_info(fmt, data_offset, data_size)
+        file.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+    raise AudioProbeError("WAV sin chunk data")
+
+
+def _wav_info(fmt, data_offset, data_size):
+    format_tag, channels, sample_rate, byte_rate, block_align, bits = struct.unpack('<HHIIHH', fmt[:16])
+    if format_tag == WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+        # Los dos primeros bytes del GUID del subformato son el formato real
+        format_tag = struct.unpack('<H', fmt[24:26])[0]
+    if not channels or not sample_rate or not block_align:
+        raise AudioProbeError("Cabecera WAV inválida")
+    codec = WAVE_FORMATS.get(format_tag, f"0x{format_tag:04x}")
+    duration = (data_size // block_align) / sample_rate if codec in ('pcm', 'float') \
+        else data_size / byte_rate
+    return AudioInfo('wav', codec, sample_rate, channels, duration, bits_per_sample=bits,
+                     block_align=block_align, data_offset=data_offset, data_size=data_size)
+
+
+def _find_mp3_frame(data, start):
+    """Posición de la primera cabecera de trama MPEG válida a partir de start"""
+    position = data.find(b'\xff', start)
+    while 0 <= position < len(data) - 4:
+        frame = _parse_mp3_header(data[position:position + 4])
+        if frame is not None:
+            return position, frame
+        position = data.find(b'\xff', position + 1)
+    return None
+
+
+def _parse_mp3_header(header):
+    b0, b1, b2, b3 = header[0], header[1], header[2], header[3]
+    if b0 != 0xFF or b1 & 0xE0 != 0xE0:
+        return None
+    version = {3: 1, 2: 2, 0: 2.5}.get((b1 >> 3) & 3)
+    layer = {3: 1, 2: 2, 1: 3}.get((b1 >> 1) & 3)
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 3
+    if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    table = (1 if version == 1 else 2, layer)
+    samples = 384 if layer == 1 else (1152 if layer == 2 or version == 1 else 576)
+    return {
+        'version': version,
+        'layer': layer,
+        'bitrate': _MP3_BITRATES[table][bitrate_index] * 1000,
+        'sample_rate': _MP3_SAMPLE_RATES[version][rate_index],
+        'channels': 1 if b3 >> 6 == 3 else 2,
+        'samples_per_frame': samples
+    }
+
+
+def _probe_mp3(file, head, size):
+    tag_end = 0
+    if head[:3] == b'ID3':
+        # Tamaño "syncsafe" de 28 bits, más el pie opcional; las etiquetas
+        # con carátula pueden ocupar más que la cabecera leída
+        tag_size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+        tag_end = 10 + tag_size + (10 if head[5] & 0x10 else 0)
+        file.seek(tag_end)
+        head = file.read(HEADER_BYTES)
+
+    found = _find_mp3_frame(head, 0)
+    if found is None:
+        raise AudioProbeError("No se encuentra ninguna trama MPEG")
+    position, frame = found
+
+    # Cabecera VBR (Xing/Info o VBRI) con el número de tramas
+    frames = None
+    if frame['version'] == 1:
+        side_info = 17 if frame['channels'] == 1 else 32
+    else:
+        side_info = 9 if frame['channels'] == 1 else 17
+    xing = position + 4 + side_info
+    if head[xing:xing + 4] in (b'Xing', b'Info'):
+        flags = struct.unpack('>I', head[xing + 4:xing + 8])[0]
+        if flags & 1:
+            frames = struct.unpack('>I', head[xing + 8:xing + 12])[0]
+    elif head[position + 36:position + 40] == b'VBRI':
+        frames = struct.unpack('>I', head[position + 50:position + 54])[0]
+
+    if frames:
+        duration = frames * frame['samples_per_frame'] / frame['sample_rate']
+    else:
+        # Sin cabecera VBR se asume tasa constante
+        duration = (size - tag_end - position) * 8 / frame['bitrate']
+    codec = 'mp3' if frame['layer'] == 3 else f"mp{frame['layer']}"
+    return AudioInfo('mp3', codec, frame['sample_rate'], frame['channels'], duration,
+                     bitrate=frame['bitrate'], vbr=bool(frames))
+
+
+def _probe_ogg(file, head, size):
+    segments = head[26]
+    packet = head[27 + segments:27 + segments + 64]
+    if packet[:7] == b'\x01vorbis':
+        codec = 'vorbis'
+        channels = packet[11]
+        sample_rate = struct.unpack('<I', packet[12:16])[0]
+        pre_skip = 0
+        granule_rate = sample_rate
+    elif packet[:8] == b'OpusHead':
+        codec = 'opus'
+        channels = packet[9]
+        pre_skip = struct.unpack('<H', packet[10:12])[0]
+        # Opus siempre cuenta las posiciones a 48 kHz
+        sample_rate = granule_rate = 48000
+    else:
+        raise AudioProbeError("Códec Ogg no soportado")
+
+    # La posición (granule) de la última página indica el total de muestras
+    file.seek(max(0, size - OGG_MAX_PAGE))
+    tail = file.read(OGG_MAX_PAGE)
+    last_page = tail.rfind(b'OggS')
+    if last_page < 0:
+        raise AudioProbeError("No se encuentra la última página Ogg")
+    granule = struct.unpack('<q', tail[last_page + 6:last_page + 14])[0]
+    duration = max(0, granule - pre_skip) / granule_rate
+    return AudioInfo('ogg', codec, sample_rate, channels, duration)
+
+
+def _iter_boxes(data, offset=0, end=None):
+    """Recorre las cajas MP4 contenidas en data[offset:end]"""
+    end = len(data) if end is None else end
+    while offset + 8 <= end:
+        box_size, box_type = struct.unpack('>I4s', data[offset:offset + 8])
+        header = 8
+        if box_size == 1:
+            box_size = struct.unpack('>Q', data[offset + 8:offset + 16])[0]
+            header = 16
+        elif box_size == 0:
+            box_size = end - offset
+        if box_size < header:
+            raise AudioProbeError("Caja MP4 inválida")
+        yield box_type, offset + header, min(offset + box_size, end)
+        offset += box_size
+
+
+def _find_box(data, path, offset=0, end=None):
+    """Primera caja que sigue la ruta dada (p. ej. [b'mdia', b'mdhd'])"""
+    for box_type, start, stop in _iter_boxes(data, offset, end):
+        if box_type == path[0]:
+            if len(path) == 1:
+                return start, stop
+            found = _find_box(data, path[1:], start, stop)
+            if found is not None:
+                return found
+    return None
+
+
+def _read_moov(file, size):
+    """Localiza la caja moov saltando el resto de cajas de primer nivel"""
+    offset = 0
+    while offset + 8 <= size:
+        file.seek(offset)
+        header = file.read(16)
+        box_size, box_type = struct.unpack('>I4s', header[:8])
+        header_size = 8
+        if box_size == 1:
+            box_size = struct.unpack('>Q', header[8:16])[0]
+            header_size = 16
+        elif box_size == 0:
+            box_size = size - offset
+        if box_size < header_size:
+            raise AudioProbeError("Caja MP4 inválida")
+        if box_type == b'moov':
+            if box_size > MP4_MAX_MOOV:
+                raise AudioProbeError("Caja moov demasiado grande")
+            file.seek(offset + header_size)
+            return file.read(box_size - header_size)
+        offset += box_size
+    raise AudioProbeError("MP4 sin caja moov")
+
+
+def _media_header(data, start):
+    """(timescale, duración) de una caja mvhd o mdhd"""
+    if data[start] == 1:
+        return struct.unpack('>IQ', data[start + 20:start + 32])
+    return struct.unpack('>II', data[start + 12:start + 20])
+
+
+def _probe_mp4(file, size):
+    moov = _read_moov(file, size)
+
+    for box_type, start, stop in _iter_boxes(moov):
+        if box_type != b'trak':
+            continue
+        hdlr = _find_box(moov, [b'mdia', b'hdlr'], start, stop)
+        if hdlr is None or moov[hdlr[0] + 8:hdlr[0] + 12] != b'soun':
+            continue
+
+        mdhd = _find_box(moov, [b'mdia', b'mdhd'], start, stop)
+        stsd = _find_box(moov, [b'mdia', b'minf', b'stbl', b'stsd'], start, stop)
+        if mdhd is None or stsd is None:
+            raise AudioProbeError("Pista de audio MP4 incompleta")
+        timescale, duration = _media_header(moov, mdhd[0])
+        # stsd: versión/flags (4) + número de entradas (4) + primera entrada
+        entry = stsd[0] + 8
+        codec = moov[entry + 4:entry + 8].decode('latin-1').strip()
+        channels = struct.unpack('>H', moov[entry + 24:entry + 26])[0]
+        sample_rate = struct.unpack('>I', moov[entry + 32:entry + 36])[0] >> 16
+        return AudioInfo('mp4', codec, sample_rate or timescale, channels, duration / timescale)
+
+    raise AudioProbeError("MP4 sin pista de audio")
@@ -0,0 +1,62 @@
+import json
+
+from django.conf import settings
+
+from .async_client import get_client, run_sync
+from .llm_provider import BaseProvider, ProviderError
+
+
+class ChatCompletionsProvider(BaseProvider):
+    """
+    Proveedor HTTP compatible con la API de chat completions
+
+    Opciones (settings.AI_PROVIDER_OPTIONS):
+        base_url: URL base de la API
+        api_key: Clave (por defecto, settings.OPENAI_API_KEY)
+        model: Modelo a usar
+        max_concurrency, rate_per_second, burst, max_retries, timeout:
+            ver AsyncProviderClient
+        temperature: Temperatura de muestreo
+    """
+
+    def __init__(self, base_url='https://api.openai.com/v1', api_key=None, model='gpt-4o-mini',
+                 temperature=0.2, **options):
+        super().__init__(**options)
+        self.model_id = model
+        self.temperature = temperature
+        api_key = api_key or getattr(settings, 'OPENAI_API_KEY', None)
+        headers = {'Authorization': f"Bearer {api_key}"} if api_key else {}
+        self.client = get_client(f"chat:{base_url}", base_url=base_url, headers=headers, **options)
+
+    def complete(self, prompt, *, task, **params):
+        return self.complete_many([prompt], task=task, **params)[0]
+
+    def complete_many(self, prompts, *, task, max_concurrency=None, on_result=None, **params):
+        payloads = [self._payload(prompt, params) for prompt in prompts]
+
+        def handle(index, response):
+            if on_result is not None:
+                on_result(index, _message_text(response))
+
+        responses = run_sync(self.client.post_many('/chat/completions', payloads, on_result=handle,
+                                                    max_concurrency=max_concurrency))
+        return [_message_text(response) for response in responses]
+
+    def _payload(self, prompt, params):
+        return {
+            'model': self.model_id,
+            'temperature': params.get('temperature', self.temperature),
+            'response_format': {'type': 'json_object'},
+            'messages': [
+                {'role': 'system', 'content': 'Responde solo con un objeto JSON válido.'},
+                {'role': 'user', 'content': prompt}
+            ]
+        }
+
+
+def _message_text(response):
+    try:
+        content = response['choices'][0]['message']['content']
+    except (KeyError, IndexError, TypeError):
+        raise ProviderError(f"Respuesta inesperada del proveedor: {json.dumps(response)[:200]}")
+    return content
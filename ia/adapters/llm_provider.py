@@ -0,0 +1,200 @@
+import hashlib
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderError(Exception):
+    """Error al llamar al proveedor del modelo (se puede reintentar)"""
+
+
+class BaseProvider:
+    """
+    Interfaz de un proveedor de modelos de lenguaje
+
+    Las subclases implementan complete(); el parámetro task ('outline' o
+    'slide') indica qué se está pidiendo para que los proveedores que lo
+    necesiten (como el stub) puedan adaptar la respuesta. Las respuestas de
+    ambos tipos de tarea son JSON.
+    """
+    model_id = 'base'
+
+    def __init__(self, **options):
+        self.options = options
+
+    def complete(self, prompt, *, task, **params):
+        """
+        Devuelve el texto generado para un prompt
+
+        Raises:
+            ProviderError: Si la llamada falla
+        """
+        raise NotImplementedError
+
+    def complete_many(self, prompts, *, task, max_concurrency=4, on_result=None, **params):
+        """
+        Genera varias respuestas de forma concurrente
+
+        La implementación base usa un pool de hilos sobre complete(); los
+        proveedores HTTP la sustituyen por el cliente asíncrono.
+
+        Args:
+            prompts: Lista de prompts
+            task: Tipo de tarea
+            max_concurrency: Llamadas simultáneas como máximo
+            on_result: Callable opcional on_result(índice, texto) al terminar cada una
+
+        Returns:
+            list: Textos generados en el mismo orden que prompts
+        """
+        def call(index):
+            text = self.complete(prompts[index], task=task, **params)
+            if on_result is not None:
+                on_result(index, text)
+            return text
+
+        if not prompts:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(prompts)))) as executor:
+            return list(executor.map(call, range(len(prompts))))
+
+
+class StubProvider(BaseProvider):
+    """
+    Proveedor local y determinista para desarrollo, pruebas y benchmarks
+
+    La respuesta depende solo del prompt, así que dos llamadas iguales
+    devuelven lo mismo. latency simula el tiempo de respuesta de un
+    proveedor real (segundos por llamada).
+    """
+    model_id = 'stub-1'
+
+    TEMPLATES = ('title_content', 'title_two_columns', 'title_image', 'chart')
+
+    def __init__(self, latency=0.0, **options):
+        super().__init__(**options)
+        self.latency = latency
+
+    def complete(self, prompt, *, task, **params):
+        if self.latency:
+            time.sleep(self.latency)
+
+        seed = int(hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:8], 16)
+        topic = _topic(prompt)
+
+        if task == 'outline':
+            count = params.get('max_slides') or 5
+            slides = [{'title': topic, 'template_type': 'title', 'summary': topic}]
+            for index in range(1, count):
+                template = self.TEMPLATES[(seed + index) % len(self.TEMPLATES)]
+                slides.append({
+                    'title': f"{topic}: parte {index}",
+                    'template_type': template,
+                    'summary': f"Punto {index} sobre {topic}"
+                })
+            return json.dumps({'title': topic, 'slides': slides})
+
+        if task == 'slide':
+            points = [f"Idea {i + 1} ({(seed >> i) % 97})" for i in range(3)]
+            return json.dumps({
+                'text': f"Contenido generado para: {topic}",
+                'points': points,
+                'columns': [points[:2], points[2:]],
+                'chart': {'labels': ['A', 'B', 'C'], 'values': [seed % 10, seed % 7, seed % 5]}
+            })
+
+        raise ProviderError(f"Tarea desconocida: {task}")
+
+
+class CachingProvider(BaseProvider):
+    """
+    Envuelve un proveedor y reutiliza respuestas de ia.cache.ResponseCache
+
+    Args:
+        provider: Proveedor real
+        response_cache: Instancia de ResponseCache
+        document_digest: Hash del contenido del documento adjunto (forma
+            parte del ámbito de la caché)
+        owner_id: Usuario que hace la solicitud (forma parte del ámbito)
+        validate: Callable opcional; las respuestas para las que devuelve
+            False no se guardan (para no repetir respuestas inválidas al reintentar)
+    """
+
+    def __init__(self, provider, response_cache, document_digest=None, validate=None,
+                 owner_id=None):
+        super().__init__()
+        self.provider = provider
+        self.cache = response_cache
+        self.document_digest = document_digest
+        self.owner_id = owner_id
+        self.validate = validate
+        self.model_id = provider.model_id
+
+    def _store(self, prompt, scope, response, similarity_text=None):
+        if self.validate is None or self.validate(response):
+            self.cache.set(prompt, scope, response, similarity_text)
+
+    def _scope(self, task, params):
+        return self.cache.make_scope(self.model_id, params, self.document_digest, task,
+                                     self.owner_id)
+
+    def complete(self, prompt, *, task, similarity_text=None, **params):
+        scope = self._scope(task, params)
+        response = self.cache.get(prompt, scope, similarity_text)
+        if response is None:
+            response = self.provider.complete(prompt, task=task, **params)
+            self._store(prompt, scope, response, similarity_text)
+        return response
+
+    def complete_many(self, prompts, *, task, max_concurrency=4, on_result=None, **params):
+        scope = self._scope(task, params)
+        results = [self.cache.get(prompt, scope) for prompt in prompts]
+        misses = [index for index, response in enumerate(results) if response is None]
+
+        if on_result is not None:
+            for index, response in enumerate(results):
+                if response is not None:
+                    on_result(index, response)
+
+        def store(position, response):
+            index = misses[position]
+            self._store(prompts[index], scope, response)
+            if on_result is not None:
+                on_result(index, response)
+
+        if misses:
+            generated = self.provider.complete_many(
+                [prompts[index] for index in misses], task=task,
+                max_concurrency=max_concurrency, on_result=store, **params
+            )
+            for index, response in zip(misses, generated):
+                results[index] = response
+        return results
+
+
+def _topic(prompt):
+    """Primera línea no vacía del prompt, acortada"""
+    for line in prompt.splitlines():
+        line = line.strip()
+        if line:
+            return line[:80]
+    return 'Presentación'
+
+
+def get_provider():
+    """
+    Instancia el proveedor configurado en settings.AI_PROVIDER
+
+    AI_PROVIDER es la ruta 'modulo.Clase' y AI_PROVIDER_OPTIONS los kwargs
+    del constructor. Por defecto se usa StubProvider.
+    """
+    path = getattr(settings, 'AI_PROVIDER', 'ia.adapters.llm_provider.StubProvider')
+    module_path, _, class_name = path.rpartition('.')
+    provider_class = getattr(import_module(module_path), class_name)
+    return provider_class(**getattr(settings, 'AI_PROVIDER_OPTIONS', {}))
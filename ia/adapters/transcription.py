@@ -0,0 +1,204 @@
+import logging
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from importlib import import_module
+
+from django.conf import settings
+
+from .audio_chunker import iter_wav_chunks, wav_duration
+
+logger = logging.getLogger(__name__)
+
+
+def simulated_transcription(file_name):
+    """Texto de ejemplo según el nombre del archivo (modo simulado)"""
+    file_name = os.path.basename(file_name).lower()
+
+    if "presentacion" in file_name or "presentación" in file_name:
+        return "Crea una presentación sobre estrategias de marketing digital con enfoque en redes sociales para 2025. Incluye estadísticas recientes y tendencias emergentes."
+    elif "informe" in file_name:
+        return "Genera una presentación para el informe trimestral de ventas con gráficos comparativos entre los últimos tres trimestres."
+    else:
+        return "Crea una presentación de 10 diapositivas sobre inteligencia artificial y su impacto en los negocios modernos."
+
+
+class BaseTranscriptionBackend:
+    """
+    Interfaz de un servicio de transcripción por fragmentos
+
+    transcribe() recibe un AudioChunk y devuelve su texto.
+    """
+
+    def __init__(self, **options):
+        self.options = options
+
+    def transcribe(self, chunk, *, language, source_name, total_duration):
+        raise NotImplementedError
+
+
+class StubTranscriptionBackend(BaseTranscriptionBackend):
+    """
+    Backend local y determinista
+
+    Reparte el texto simulado de la grabación uniformemente a lo largo de su
+    duración y devuelve las palabras que caen dentro de cada fragmento (las
+    del solapamiento aparecen en los dos fragmentos, como en un servicio real).
+    """
+
+    def transcribe(self, chunk, *, language, source_name, total_duration):
+        words = simulated_transcription(source_name).split()
+        if not total_duration:
+            return ' '.join(words)
+        step = total_duration / len(words)
+        return ' '.join(
+            word for position, word in enumerate(words)
+            if chunk.start <= (position + 0.5) * step < chunk.end
+        )
+
+
+class WhisperAPIBackend(BaseTranscriptionBackend):
+    """Transcripción con la API de OpenAI (audio/transcriptions), un fragmento por llamada"""
+
+    def __init__(self, base_url='https://api.openai.com/v1', api_key=None, model='whisper-1',
+                 timeout=120, **options):
+        super().__init__(**options)
+        import requests
+
+        self.url = f"{base_url.rstrip('/')}/audio/transcriptions"
+        self.model = model
+        self.timeout = timeout
+        self.session = requests.Session()
+        api_key = api_key or getattr(settings, 'OPENAI_API_KEY', None)
+        if api_key:
+            self.session.headers['Authorization'] = f"Bearer {api_key}"
+
+    def transcribe(self, chunk, *, language, source_name, total_duration):
+        response = self.session.post(
+            self.url,
+            data={'model': self.model, 'language': language or ''},
+            files={'file': (f"chunk-{chunk.index}.wav", chunk.to_wav(), 'audio/wav')},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json().get('text', '')
+
+
+def get_transcription_backend():
+    """
+    Instancia el backend de settings.VOICE_TRANSCRIPTION_BACKEND
+
+    Por defecto se usa StubTranscriptionBackend.
+    """
+    path = getattr(settings, 'VOICE_TRANSCRIPTION_BACKEND',
+                   'ia.adapters.transcription.StubTranscriptionBackend')
+    module_path, _, class_name = path.rpartition('.')
+    backend_class = getattr(import_module(module_path), class_name)
+    return backend_class(**getattr(settings, 'VOICE_TRANSCRIPTION_OPTIONS', {}))
+
+
+def _normalize_word(word):
+    return re.sub(r'[^\w]', '', word.lower())
+
+
+def stitch_transcripts(texts, max_overlap_words=15):
+    """
+    Une las transcripciones de fragmentos solapados
+
+    Para cada fragmento se busca el mayor número de palabras (hasta
+    max_overlap_words) en que el final del texto acumulado coincide con el
+    principio del fragmento, ignorando mayúsculas y puntuación, y se eliminan.
+
+    Args:
+        texts: Transcripciones en orden
+
+    Returns:
+        str: Texto unido
+    """
+    words = []
+    for text in texts:
+        incoming = (text or '').split()
+        if not incoming:
+            continue
+        tail = [_normalize_word(word) for word in words[-max_overlap_words:]]
+        head = [_normalize_word(word) for word in incoming[:max_overlap_words]]
+        overlap = 0
+        for size in range(min(len(tail), len(head)), 0, -1):
+            if tail[-size:] == head[:size]:
+                overlap = size
+                break
+        words.extend(incoming[overlap:])
+    return ' '.join(words)
+
+
+class StreamingTranscriber:
+    """
+    Transcribe una grabación WAV por fragmentos en paralelo
+
+    Los fragmentos se generan mientras se lee el archivo y se envían al
+    backend a medida que están listos (con un máximo de fragmentos en vuelo).
+    Cada vez que se completa un prefijo contiguo de fragmentos se llama a
+    on_progress con el texto unido hasta ese punto.
+
+    Args:
+        backend: Backend de transcripción (por defecto, get_transcription_backend())
+        max_workers: Fragmentos transcritos a la vez
+        chunk_seconds, overlap_seconds, search_seconds: Ver iter_wav_chunks
+    """
+
+    def __init__(self, backend=None, max_workers=None, chunk_seconds=None,
+                 overlap_seconds=None, search_seconds=None):
+        self.backend = backend or get_transcription_backend()
+        self.max_workers = max_workers or getattr(settings, 'VOICE_MAX_CONCURRENCY', 4)
+        self.chunk_seconds = chunk_seconds or getattr(settings, 'VOICE_CHUNK_SECONDS', 30)
+        self.overlap_seconds = overlap_seconds if overlap_seconds is not None else \
+            getattr(settings, 'VOICE_CHUNK_OVERLAP_SECONDS', 1.0)
+        self.search_seconds = search_seconds if search_seconds is not None else \
+            getattr(settings, 'VOICE_SILENCE_SEARCH_SECONDS', 2.0)
+
+    def transcribe(self, file, *, language=None, source_name='', on_progress=None):
+        """
+        Args:
+            file: Objeto archivo WAV posicionable
+            language: Idioma de la grabación
+            source_name: Nombre del archivo original
+            on_progress: Callable opcional on_progress(texto_parcial, completados,
+                enviados) llamado desde el hilo que invoca transcribe()
+
+        Returns:
+            str: Transcripción completa
+        """
+        total_duration = wav_duration(file)
+        results = {}
+        progress = {'reported': 0, 'submitted': 0}
+        # Fragmentos en vuelo como máximo: acota la memoria en grabaciones largas
+        max_pending = self.max_workers * 2
+
+        def collect(done):
+            for future in done:
+                results[pending.pop(future)] = future.result()
+            contiguous = progress['reported']
+            while contiguous in results:
+                contiguous += 1
+            if on_progress is not None and contiguous > progress['reported']:
+                progress['reported'] = contiguous
+                partial = stitch_transcripts(results[i] for i in range(contiguous))
+                on_progress(partial, contiguous, progress['submitted'])
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {}
+            for chunk in iter_wav_chunks(file, self.chunk_seconds, self.overlap_seconds,
+                                         self.search_seconds):
+                future = executor.submit(self.backend.transcribe, chunk, language=language,
+                                         source_name=source_name, total_duration=total_duration)
+                pending[future] = chunk.index
+                progress['submitted'] += 1
+                if len(pending) >= max_pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+
+        return stitch_transcripts(results[i] for i in range(len(results)))
@@ -1,4 +1,3 @@
-import os
 import tempfile
 import logging
 import json
@@ -6,6 +5,11 @@ import requests
 import base64
 from django.conf import settings
 
+from .. import voice_status
+from .audio_normalizer import can_normalize, duration_limit, normalize_audio
+from .audio_probe import probe_audio
+from .transcription import StreamingTranscriber, simulated_transcription
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,36 +27,57 @@ class SpeechToTextProcessor:
     def process(self):
         """
         Procesa el audio y devuelve la transcripción
+
+        Returns:
+            str o None: Transcripción, o None si ha fallado o si la entrada
+                ya estaba completada (self.skipped)
+
+        Raises:
+            voice_status.LeaseHeld: Si otro worker la está procesando
         """
-        # Marcar como en procesamiento
-        self.voice_input.status = 'PROCESSING'
-        self.voice_input.save()
+        self.skipped = False
+
+        # Marcar como en procesamiento (solo si ningún otro worker la tiene)
+        if not voice_status.start(self.voice_input):
+            logger.info(f"Entrada de voz {self.voice_input.pk} ya completada")
+            self.skipped = True
+            return None
 
         try:
             # Obtener el audio
             audio_file = self.voice_input.audio_file
-
-            # Determinar el método de procesamiento según el tipo de archivo
-            file_ext = os.path.splitext(audio_file.name)[1].lower()
-
-            if file_ext in ['.mp3', '.wav', '.ogg', '.m4a']:
-                # Usar servicio de transcripción
-                transcription = self._transcribe_audio()
-            else:
-                raise ValueError(f"Formato de audio no soportado: {file_ext}")
-
-            # Actualizar el modelo con la transcripción
-            self.voice_input.transcription = transcription
-            self.voice_input.status = 'COMPLETED'
-            self.voice_input.save()
+            audio_file.open('rb')
+
+            try:
+                # Identificar formato y duración por las cabeceras
+                info = probe_audio(audio_file)
+                max_seconds = duration_limit(info)
+                duration = info.duration
+
+                if getattr(settings, 'VOICE_STREAMING_TRANSCRIPTION', True) and can_normalize(info):
+                    # Normalizar a WAV mono 16 kHz y transcribir por fragmentos
+                    with tempfile.TemporaryFile() as normalized:
+                        duration = normalize_audio(
+                            audio_file, info, normalized,
+                            target_rate=getattr(settings, 'VOICE_TARGET_SAMPLE_RATE', 16000),
+                            max_seconds=max_seconds,
+                            on_block=voice_status.lease_renewer(self.voice_input)
+                        )
+                        transcription = self._transcribe_streaming(normalized)
+                else:
+                    # Usar servicio de transcripción
+                    transcription = self._transcribe_audio()
+            finally:
+                audio_file.close()
+
+            # Guardar la transcripción, la duración y el estado en una sola escritura
+            voice_status.complete(self.voice_input, transcription, duration=duration)
 
             return transcription
 
         except Exception as e:
             logger.error(f"Error procesando audio: {str(e)}")
-            self.voice_input.status = 'FAILED'
-            self.voice_input.error_message = str(e)
-            self.voice_input.save()
+            voice_status.fail(self.voice_input.pk, str(e), self.voice_input.user_id)
             return None
 
     def _transcribe_audio(self):
@@ -90,13 +115,30 @@ class SpeechToTextProcessor:
         """
 
         # Para simular, devolvemos un texto de ejemplo basado en el nombre del archivo
-        file_name = os.path.basename(self.voice_input.audio_file.name).lower()
+        return simulated_transcription(self.voice_input.audio_file.name)
+
+        # En un caso real, se devolvería la transcripción real del servicio
 
-        if "presentacion" in file_name or "presentación" in file_name:
-            return "Crea una presentación sobre estrategias de marketing digital con enfoque en redes sociales para 2025. Incluye estadísticas recientes y tendencias emergentes."
-        elif "informe" in file_name:
-            return "Genera una presentación para el informe trimestral de ventas con gráficos comparativos entre los últimos tres trimestres."
-        else:
-            return "Crea una presentación de 10 diapositivas sobre inteligencia artificial y su impacto en los negocios modernos."
+    def _transcribe_streaming(self, normalized):
+        """
+        Transcribe el audio normalizado por fragmentos solapados en paralelo
+
+        El archivo se lee por bloques y cada vez que se completa un tramo
+        inicial de fragmentos se guarda la transcripción parcial, para que el
+        cliente vea el progreso.
 
-        # En un caso real, se devolvería la transcripción real del servicio
\ No newline at end of file
+        Args:
+            normalized: WAV mono de 16 bits generado por normalize_audio()
+        """
+        voice_input = self.voice_input
+
+        def on_progress(partial, done, submitted):
+            logger.debug(f"Entrada de voz {voice_input.pk}: {done} fragmentos transcritos")
+            voice_status.report_progress(voice_input, partial, done, submitted)
+
+        return StreamingTranscriber().transcribe(
+            normalized,
+            language=voice_input.language,
+            source_name=voice_input.audio_file.name,
+            on_progress=on_progress
+        )
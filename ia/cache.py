@@ -0,0 +1,264 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from django.conf import settings
+
+from django_rest_role_jwt.task_metrics import ProcessCounters
+
+logger = logging.getLogger(__name__)
+
+# Parámetros de MinHash/LSH: 16 bandas de 4 filas detectan con alta
+# probabilidad pares con similitud de Jaccard >= 0.8
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+SHINGLE_SIZE = 3
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+METRICS_KEY = 'ia:response_cache:metrics'
+METRIC_EVENTS = ('hits', 'near_hits', 'misses')
+
+# Aciertos y fallos de todos los procesos (se publican cada pocos segundos)
+_metrics = ProcessCounters(METRICS_KEY, METRIC_EVENTS)
+
+
+def normalize_prompt(text):
+    """Normaliza un prompt: Unicode NFKC, minúsculas y espacios colapsados"""
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Conjunto de n-gramas de palabras del texto normalizado"""
+    words = re.findall(r'\w+', normalize_prompt(text))
+    if len(words) <= size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _permutations():
+    """Coeficientes (a, b) fijos de las permutaciones a·x + b mod p"""
+    seed = hashlib.sha256(b'ia-response-cache').digest()
+    coefficients = []
+    for index in range(MINHASH_PERMUTATIONS):
+        raw = hashlib.sha256(seed + index.to_bytes(2, 'big')).digest()
+        a = int.from_bytes(raw[:8], 'big') % (_MERSENNE_PRIME - 1) + 1
+        b = int.from_bytes(raw[8:16], 'big') % _MERSENNE_PRIME
+        coefficients.append((a, b))
+    return coefficients
+
+
+_PERMUTATIONS = _permutations()
+
+
+def minhash(shingle_set):
+    """Firma MinHash de un conjunto de shingles (tupla de MINHASH_PERMUTATIONS enteros)"""
+    if not shingle_set:
+        return None
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for shingle in shingle_set
+    ]
+    return tuple(
+        min(((a * value + b) % _MERSENNE_PRIME) & _MAX_HASH for value in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def estimate_similarity(signature, other):
+    """Similitud de Jaccard estimada a partir de dos firmas MinHash"""
+    return sum(1 for x, y in zip(signature, other) if x == y) / len(signature)
+
+
+class ResponseCache:
+    """
+    Caché en proceso de respuestas del modelo con TTL y expulsión LRU
+
+    La clave exacta combina el prompt normalizado, el hash del contenido del
+    documento adjunto, el modelo y los parámetros. Opcionalmente, si no hay
+    coincidencia exacta, se busca una entrada casi idéntica (MinHash + LSH)
+    dentro del mismo ámbito (modelo, parámetros, documento, tarea y usuario).
+
+    Args:
+        max_entries: Entradas como máximo
+        ttl: Segundos de validez de cada entrada
+        similarity: Similitud mínima para reutilizar una respuesta casi
+            idéntica (None desactiva la búsqueda aproximada)
+    """
+
+    def __init__(self, max_entries=1024, ttl=24 * 60 * 60, similarity=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self._entries = OrderedDict()
+        self._bands = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_scope(model_id, params=None, document_digest=None, task=None, owner_id=None):
+        """
+        Ámbito dentro del cual dos respuestas son intercambiables
+
+        Incluye al usuario: una respuesta generada para un usuario (que puede
+        contener datos de sus documentos o de su prompt) no se sirve a otro.
+        """
+        raw = json.dumps([model_id, params or {}, document_digest, task, owner_id],
+                         sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]
+
+    @staticmethod
+    def make_key(prompt, scope):
+        digest = hashlib.sha256(normalize_prompt(prompt).encode('utf-8')).hexdigest()
+        return f"{scope}:{digest}"
+
+    def get(self, prompt, scope, similarity_text=None):
+        """
+        Busca una respuesta para el prompt
+
+        Args:
+            prompt: Prompt enviado al modelo
+            scope: Ámbito devuelto por make_scope
+            similarity_text: Texto usado para la búsqueda aproximada (por
+                defecto, el propio prompt)
+
+        Returns:
+            str o None: Respuesta almacenada
+        """
+        key = self.make_key(prompt, scope)
+        with self._lock:
+            response = self._lookup(key)
+            if response is not None:
+                self.hits += 1
+                event = 'hits'
+            elif self.similarity:
+                response = self._lookup_similar(scope, similarity_text or prompt)
+                if response is not None:
+                    self.near_hits += 1
+                    event = 'near_hits'
+            if response is None:
+                self.misses += 1
+                event = 'misses'
+        _record_metric(event)
+        return response
+
+    def set(self, prompt, scope, response, similarity_text=None):
+        """Almacena una respuesta, expulsando las entradas menos usadas si hace falta"""
+        key = self.make_key(prompt, scope)
+        signature = minhash(shingles(similarity_text or prompt)) if self.similarity else None
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (response, time.monotonic() + self.ttl, scope, signature)
+            for band_key in self._band_keys(scope, signature):
+                self._bands.setdefault(band_key, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+            self._bands.clear()
+            return removed
+
+    def stats(self):
+        """Contadores de uso de la caché en este proceso"""
+        with self._lock:
+            lookups = self.hits + self.near_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'near_hits': self.near_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': (self.hits + self.near_hits) / lookups if lookups else 0.0
+            }
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] < time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _lookup_similar(self, scope, text):
+        signature = minhash(shingles(text))
+        candidates = set()
+        for band_key in self._band_keys(scope, signature):
+            candidates |= self._bands.get(band_key, set())
+
+        best_key, best_score = None, self.similarity
+        for key in candidates:
+            entry = self._entries.get(key)
+            if entry is None or entry[3] is None:
+                continue
+            score = estimate_similarity(signature, entry[3])
+            if score >= best_score:
+                best_key, best_score = key, score
+        return self._lookup(best_key) if best_key else None
+
+    def _band_keys(self, scope, signature):
+        if signature is None:
+            return []
+        rows = MINHASH_PERMUTATIONS // LSH_BANDS
+        return [
+            (scope, band, signature[band * rows:(band + 1) * rows])
+            for band in range(LSH_BANDS)
+        ]
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for band_key in self._band_keys(entry[2], entry[3]):
+            keys = self._bands.get(band_key)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._bands[band_key]
+
+
+def _record_metric(event):
+    """Cuenta el evento en el proceso (se publica periódicamente)"""
+    _metrics.incr(event)
+
+
+def get_response_cache_metrics():
+    """
+    Aciertos, aciertos aproximados y fallos acumulados por todos los procesos
+
+    Cada proceso publica sus contadores cada pocos segundos, así que los
+    eventos más recientes pueden no estar incluidos todavía.
+
+    Returns:
+        dict: Contadores y tasa de acierto
+    """
+    counters = _metrics.totals()
+    lookups = sum(counters.values())
+    counters['hit_rate'] = (counters['hits'] + counters['near_hits']) / lookups if lookups else 0.0
+    return counters
+
+
+response_cache = ResponseCache(
+    max_entries=getattr(settings, 'AI_RESPONSE_CACHE_MAX_ENTRIES', 1024),
+    ttl=getattr(settings, 'AI_RESPONSE_CACHE_TTL', 24 * 60 * 60),
+    similarity=getattr(settings, 'AI_RESPONSE_CACHE_SIMILARITY', None)
+)
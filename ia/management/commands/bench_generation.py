@@ -0,0 +1,80 @@
+import time
+import uuid
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+
+from ia.adapters.llm_provider import StubProvider
+from ia.pipeline import GenerationPipeline
+
+
+class MemoryCheckpoints:
+    """
+    Checkpoints en memoria para medir el pipeline sin caché compartida
+
+    Args:
+        keep: Conservar los checkpoints al terminar (para medir la reanudación)
+    """
+
+    def __init__(self, keep=False):
+        self.keep = keep
+        self.data = {}
+
+    def get(self, stage):
+        return self.data.get(stage)
+
+    def save(self, stage, value):
+        self.data[stage] = value
+
+    def update(self, stage, key, value):
+        self.data.setdefault(stage, {})[key] = value
+
+    def clear(self):
+        if not self.keep:
+            self.data = {}
+
+
+class BenchPipeline(GenerationPipeline):
+    """Pipeline completo salvo la escritura de la presentación en la base de datos"""
+
+    def write(self, outline, slides):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide las etapas del pipeline de generación con el proveedor stub '
+        '(sin red ni base de datos), en serie y en paralelo'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--latency', type=float, default=0.2,
+                            help='Segundos simulados por llamada al modelo')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Llamadas simultáneas en la etapa de diapositivas')
+        parser.add_argument('--prompt', default='Estrategias de marketing digital para 2025')
+
+    def handle(self, *args, **options):
+        provider = StubProvider(latency=options['latency'])
+        request = SimpleNamespace(id=uuid.uuid4(), prompt=SimpleNamespace(text=options['prompt']),
+                                  document=None)
+
+        for workers in (1, options['workers']):
+            pipeline = BenchPipeline(request, provider=provider,
+                                     checkpoints=MemoryCheckpoints(), max_workers=workers)
+            start = time.perf_counter()
+            pipeline.run()
+            total = time.perf_counter() - start
+
+            stages = '  '.join(f"{name} {seconds:.3f}s" for name, seconds in pipeline.timings.items())
+            self.stdout.write(f"workers={workers:<3} total {total:.3f}s  ({stages})")
+
+        # Reanudación: con todas las etapas en el checkpoint no se llama al modelo
+        checkpoints = MemoryCheckpoints(keep=True)
+        BenchPipeline(request, provider=provider, checkpoints=checkpoints,
+                      max_workers=options['workers']).run()
+        start = time.perf_counter()
+        BenchPipeline(request, provider=provider, checkpoints=checkpoints).run()
+        self.stdout.write(self.style.SUCCESS(
+            f"Reanudación desde checkpoint: {time.perf_counter() - start:.3f}s"
+        ))
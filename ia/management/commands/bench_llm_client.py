@@ -0,0 +1,94 @@
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+from ia.adapters.async_client import AsyncProviderClient, run_sync
+
+
+def make_handler(latency, error_every):
+    """Servidor simulado de chat completions con latencia fija y 429 periódicos"""
+    counter = {'value': 0}
+    lock = threading.Lock()
+
+    class MockHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            self.rfile.read(length)
+            with lock:
+                counter['value'] += 1
+                current = counter['value']
+            time.sleep(latency)
+
+            if error_every and current % error_every == 0:
+                body = b'{"error": "rate limited"}'
+                self.send_response(429)
+                self.send_header('Retry-After', '0.05')
+            else:
+                body = json.dumps({
+                    'choices': [{'message': {'content': json.dumps({'text': f"respuesta {current}"})}}]
+                }).encode('utf-8')
+                self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return MockHandler
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el cliente asíncrono de proveedores contra un servidor HTTP local '
+        'simulado: llamadas en serie frente a concurrentes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20, help='Llamadas por medida')
+        parser.add_argument('--latency', type=float, default=0.2, help='Latencia simulada (s)')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--rate', type=float, default=None,
+                            help='Límite de peticiones por segundo (token bucket)')
+        parser.add_argument('--error-every', type=int, default=0,
+                            help='Responder 429 a una de cada N peticiones')
+
+    def handle(self, *args, **options):
+        server = ThreadingHTTPServer(('127.0.0.1', 0),
+                                     make_handler(options['latency'], options['error_every']))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        payloads = [{'prompt': f"diapositiva {i}"} for i in range(options['requests'])]
+
+        try:
+            for concurrency in (1, options['concurrency']):
+                client = AsyncProviderClient(
+                    f"bench-{concurrency}", base_url, max_concurrency=concurrency,
+                    rate_per_second=options['rate'], backoff_base=0.05
+                )
+                latencies = []
+                started = {}
+
+                def on_result(index, response):
+                    latencies.append(time.perf_counter() - started['at'])
+
+                started['at'] = time.perf_counter()
+                run_sync(client.post_many('/chat/completions', payloads, on_result=on_result))
+                total = time.perf_counter() - started['at']
+
+                self.stdout.write(
+                    f"concurrencia={concurrency:<3} total {total:6.2f}s  "
+                    f"p50 {statistics.median(latencies):6.2f}s  "
+                    f"máx {max(latencies):6.2f}s  "
+                    f"peticiones {client.stats['requests']}  reintentos {client.stats['retries']}"
+                )
+        finally:
+            server.shutdown()
@@ -0,0 +1,309 @@
+"""
+Pipeline de generación de presentaciones con IA
+
+Etapas:
+    1. context: prompt más el contenido del documento adjunto (DocumentAnalysis)
+    2. outline: esquema de diapositivas generado por el modelo
+    3. slides: contenido de cada diapositiva, en paralelo
+    4. mapping: adaptación del contenido a la estructura de SLIDE_TEMPLATES
+    5. write: creación de la presentación y escritura de las diapositivas en bloque
+
+Cada etapa guarda su resultado en un checkpoint (caché compartida). Si la tarea
+se reintenta, las etapas ya completadas (y las diapositivas ya generadas) se
+reutilizan en lugar de volver a llamar al modelo.
+"""
+import hashlib
+import importlib
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from presentations.models import Presentation, Slide
+from .adapters.llm_provider import CachingProvider, ProviderError, get_provider
+from .cache import response_cache
+from .models import AIGenerationRequest
+
+logger = logging.getLogger(__name__)
+
+template_service = importlib.import_module('presentations.services.template-service')
+
+STAGES = ('context', 'outline', 'slides', 'mapping', 'write')
+
+
+class CheckpointStore:
+    """
+    Resultados intermedios de una solicitud de generación en la caché compartida
+
+    El reintento de una tarea puede ejecutarse en otro worker, así que los
+    checkpoints solo sirven con una caché que vean todos los procesos; el
+    arranque avisa si la caché por defecto es local (ver
+    django_rest_role_jwt.shared_cache). Caducan tras AI_CHECKPOINT_TIMEOUT y
+    se borran al terminar la generación.
+    """
+
+    def __init__(self, generation_request_id):
+        self.key = f"ia:generation:{generation_request_id}:checkpoint"
+        self.timeout = getattr(settings, 'AI_CHECKPOINT_TIMEOUT', 24 * 60 * 60)
+        self._lock = threading.Lock()
+        self.data = cache.get(self.key) or {}
+
+    def get(self, stage):
+        return self.data.get(stage)
+
+    def save(self, stage, value):
+        with self._lock:
+            self.data[stage] = value
+            cache.set(self.key, self.data, self.timeout)
+
+    def update(self, stage, key, value):
+        """Añade un elemento a un checkpoint parcial (seguro entre hilos)"""
+        with self._lock:
+            partial = dict(self.data.get(stage) or {})
+            partial[key] = value
+            self.data[stage] = partial
+            cache.set(self.key, self.data, self.timeout)
+
+    def clear(self):
+        cache.delete(self.key)
+
+
+class GenerationPipeline:
+    """
+    Ejecuta (o reanuda) la generación de una presentación
+
+    Args:
+        generation_request: Instancia de AIGenerationRequest
+        provider: Proveedor del modelo (por defecto, get_provider() con la
+            caché de respuestas)
+        checkpoints: Almacén de checkpoints (por defecto, CheckpointStore)
+        max_workers: Llamadas simultáneas al modelo en la etapa slides
+    """
+
+    def __init__(self, generation_request, provider=None, checkpoints=None, max_workers=None):
+        self.request = generation_request
+        self.provider = provider or CachingProvider(get_provider(), response_cache,
+                                                    validate=_is_json_object,
+                                                    owner_id=generation_request.user_id)
+        self.checkpoints = checkpoints or CheckpointStore(generation_request.id)
+        self.max_workers = max_workers or getattr(settings, 'AI_MAX_CONCURRENCY', 4)
+        self.timings = {}
+
+    def run(self):
+        """
+        Ejecuta las etapas pendientes
+
+        Returns:
+            Presentation: Presentación generada
+        """
+        context = self._stage('context', self.build_context)
+        if isinstance(self.provider, CachingProvider) and context['document']:
+            self.provider.document_digest = context['document']['digest']
+        outline = self._stage('outline', lambda: self.generate_outline(context))
+        contents = self._stage('slides', lambda: self.generate_slides(context, outline))
+        slides = self._stage('mapping', lambda: self.map_templates(outline, contents))
+
+        presentation = self.write(outline, slides)
+        self.checkpoints.clear()
+        return presentation
+
+    def _stage(self, name, func):
+        value = self.checkpoints.get(name)
+        if value is not None:
+            logger.info(f"Generación {self.request.id}: etapa '{name}' reanudada desde checkpoint")
+            return value
+
+        start = time.perf_counter()
+        value = func()
+        self.timings[name] = round(time.perf_counter() - start, 3)
+        self.checkpoints.save(name, value)
+        return value
+
+    def build_context(self):
+        """Texto del prompt y, si hay documento, su contenido extraído"""
+        context = {'prompt': self.request.prompt.text, 'document': None}
+
+        document = self.request.document
+        analysis = getattr(document, 'analysis', None) if document else None
+        if analysis is not None and analysis.content_text:
+            max_chars = getattr(settings, 'AI_CONTEXT_MAX_CHARS', 12000)
+            structure = analysis.content_structure or {}
+            context['document'] = {
+                'digest': hashlib.sha256(analysis.content_text.encode('utf-8')).hexdigest(),
+                'title': document.title,
+                'headings': [heading.get('text') for heading in structure.get('headings', [])][:50],
+                'text': analysis.content_text[:max_chars]
+            }
+        return context
+
+    def generate_outline(self, context):
+        """Pide al modelo el esquema de la presentación"""
+        max_slides = getattr(settings, 'AI_MAX_SLIDES', 10)
+        prompt = _outline_prompt(context, max_slides)
+        # La búsqueda aproximada compara solo la petición del usuario, no el documento
+        outline = _parse_json(self.provider.complete(
+            prompt, task='outline', max_slides=max_slides, **self._similarity(context['prompt'])
+        ))
+
+        slides = [slide for slide in outline.get('slides', []) if isinstance(slide, dict)]
+        if not slides:
+            raise ProviderError("El esquema generado no contiene diapositivas")
+        return {
+            'title': str(outline.get('title') or slides[0].get('title') or 'Presentación')[:200],
+            'slides': slides[:max_slides]
+        }
+
+    def _similarity(self, text):
+        return {'similarity_text': text} if isinstance(self.provider, CachingProvider) else {}
+
+    def generate_slides(self, context, outline):
+        """
+        Genera el contenido de cada diapositiva en paralelo
+
+        Las diapositivas ya generadas en un intento anterior se reutilizan; cada
+        una se guarda en el checkpoint parcial en cuanto termina.
+        """
+        partial = self.checkpoints.get('slides_partial') or {}
+        pending = [index for index in range(len(outline['slides'])) if str(index) not in partial]
+
+        def save(position, text):
+            self.checkpoints.update('slides_partial', str(pending[position]), _parse_json(text))
+
+        if pending:
+            self.provider.complete_many(
+                [_slide_prompt(context, outline, index) for index in pending],
+                task='slide', max_concurrency=self.max_workers, on_result=save
+            )
+
+        partial = self.checkpoints.get('slides_partial')
+        return [partial[str(index)] for index in range(len(outline['slides']))]
+
+    def map_templates(self, outline, contents):
+        """Asigna a cada diapositiva una plantilla y adapta su contenido a la estructura"""
+        slides = []
+        for index, (item, content) in enumerate(zip(outline['slides'], contents)):
+            template_type = _choose_template(index, item, content)
+            structure = template_service.get_template_by_name(template_type)['structure']
+            slides.append({
+                'title': str(item.get('title') or '')[:200],
+                'template_type': template_type,
+                'content': _fill_structure(structure, item, content)
+            })
+        return slides
+
+    def write(self, outline, slides):
+        """Crea la presentación y sus diapositivas en una sola transacción"""
+        with transaction.atomic():
+            generation = AIGenerationRequest.objects.select_for_update().get(pk=self.request.pk)
+            if generation.result_presentation_id:
+                # Un intento anterior ya llegó a escribir: no duplicar la presentación
+                return generation.result_presentation
+
+            presentation = Presentation.objects.create(
+                title=outline['title'],
+                owner=generation.user,
+                original_document=generation.document,
+                theme=template_service.make_theme_reference(template_service.DEFAULT_THEME_ID)
+            )
+            Slide.objects.bulk_create([
+                Slide(presentation=presentation, order=order, **slide)
+                for order, slide in enumerate(slides)
+            ])
+
+            generation.result_presentation = presentation
+            generation.status = 'COMPLETED'
+            generation.completed_at = timezone.now()
+            generation.error_message = ''
+            generation.save(update_fields=['result_presentation', 'status', 'completed_at',
+                                           'error_message'])
+        return presentation
+
+
+def _outline_prompt(context, max_slides):
+    parts = [
+        context['prompt'],
+        '',
+        f"Devuelve un JSON {{\"title\": ..., \"slides\": [{{\"title\", \"template_type\", "
+        f"\"summary\"}}]}} con un máximo de {max_slides} diapositivas. "
+        f"Plantillas disponibles: {', '.join(template_service.TEMPLATE_VERSIONS)}."
+    ]
+    document = context.get('document')
+    if document:
+        parts += ['', f"Documento de referencia: {document['title']}"]
+        if document['headings']:
+            parts.append('Secciones: ' + '; '.join(filter(None, document['headings'])))
+        parts += ['', document['text']]
+    return '\n'.join(parts)
+
+
+def _slide_prompt(context, outline, index):
+    item = outline['slides'][index]
+    return '\n'.join([
+        item.get('title') or outline['title'],
+        '',
+        f"Presentación: {outline['title']}",
+        f"Diapositiva {index + 1} de {len(outline['slides'])}: {item.get('summary', '')}",
+        f"Solicitud original: {context['prompt']}",
+        '',
+        'Devuelve un JSON con "text", "points", y opcionalmente "columns" y "chart".'
+    ])
+
+
+def _parse_json(text):
+    """Extrae el objeto JSON de la respuesta del modelo"""
+    try:
+        start, end = text.index('{'), text.rindex('}') + 1
+        value = json.loads(text[start:end])
+    except ValueError as e:
+        raise ProviderError(f"Respuesta del modelo no válida: {str(e)}")
+    if not isinstance(value, dict):
+        raise ProviderError("La respuesta del modelo no es un objeto JSON")
+    return value
+
+
+def _is_json_object(text):
+    try:
+        _parse_json(text)
+    except ProviderError:
+        return False
+    return True
+
+
+def _choose_template(index, item, content):
+    template_type = item.get('template_type')
+    if template_type in template_service.TEMPLATE_VERSIONS:
+        return template_type
+    if index == 0:
+        return 'title'
+    if content.get('chart'):
+        return 'chart'
+    if content.get('columns'):
+        return 'title_two_columns'
+    return 'title_content'
+
+
+def _fill_structure(structure, item, content):
+    """Contenido con las mismas claves que la estructura de la plantilla"""
+    points = content.get('points') or []
+    columns = content.get('columns') or [points[:len(points) // 2], points[len(points) // 2:]]
+    body = content.get('text') or ''
+    if points:
+        body = '\n'.join([body] + [f"• {point}" for point in points]).strip()
+
+    values = {
+        'title': item.get('title') or '',
+        'subtitle': item.get('summary') or content.get('text') or '',
+        'content': body,
+        'column_left': '\n'.join(map(str, columns[0])) if columns else '',
+        'column_right': '\n'.join(map(str, columns[1])) if len(columns) > 1 else '',
+        'image': content.get('image') or '',
+        'caption': content.get('text') or '',
+        'chart': content.get('chart') or {},
+        'description': content.get('text') or '',
+    }
+    return {key: values.get(key, '') for key in structure}
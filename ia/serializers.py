@@ -1,5 +1,9 @@
+from django.conf import settings
+from django.db import transaction
 from rest_framework import serializers
 from .models import AIPrompt, VoiceInput, AIGenerationRequest
+from .adapters.audio_normalizer import AudioTooLongError, duration_limit
+from .adapters.audio_probe import AudioProbeError, probe_audio
 
 
 class AIPromptSerializer(serializers.ModelSerializer):
@@ -19,6 +23,23 @@ class VoiceInputSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'duration', 'status', 'created_at',
                             'transcription', 'error_message', 'audio_url']
 
+    def validate_audio_file(self, value):
+        """
+        Comprueba el formato real y la duración leyendo solo las cabeceras
+        """
+        max_bytes = getattr(settings, 'VOICE_UPLOAD_MAX_BYTES', None)
+        if max_bytes and value.size > max_bytes:
+            raise serializers.ValidationError(
+                f"El archivo supera el tamaño máximo de {max_bytes // (1024 * 1024)} MB"
+            )
+        try:
+            duration_limit(probe_audio(value))
+        except AudioProbeError as e:
+            raise serializers.ValidationError(f"Audio no válido: {str(e)}")
+        except AudioTooLongError as e:
+            raise serializers.ValidationError(str(e))
+        return value
+
     def get_audio_url(self, obj):
         request = self.context.get('request')
         if obj.audio_file and hasattr(obj.audio_file, 'url') and request:
@@ -81,7 +102,13 @@ class AIGenerationRequestSerializer(serializers.ModelSerializer):
             **validated_data
         )
 
-        # Aquí se podría iniciar el proceso de generación con Celery
-        # Por ejemplo: generate_presentation.delay(str(request.id))
+        # Encolar la generación cuando la solicitud esté guardada
+        from django_rest_role_jwt.celery import enqueue_for_user
+        from .tasks import generate_presentation_from_prompt
+
+        request_id = str(request.id)
+        transaction.on_commit(
+            lambda: enqueue_for_user(generate_presentation_from_prompt, user, request_id)
+        )
 
         return request
\ No newline at end of file
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.http import Http404
+from rest_framework import permissions
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from api.permissions import IsAdmin
+from . import voice_status
+
+
+class VoiceInputStatusView(APIView):
+    """
+    Estado y transcripción parcial de una entrada de voz, servidos desde caché
+
+    GET /voice-inputs/<pk>/status/?since=<version>&wait=<segundos>
+
+    Sin since responde al momento. Con since la petición espera (hasta wait
+    segundos, acotado por VOICE_STATUS_MAX_WAIT) a que haya una versión
+    posterior, de modo que el cliente puede encadenar peticiones en lugar de
+    consultar el viewset voice-inputs periódicamente.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        since = self._int_param(request, 'since')
+        wait = self._int_param(request, 'wait') or 0
+        wait = min(wait, getattr(settings, 'VOICE_STATUS_MAX_WAIT', 10))
+
+        # Comprobar permisos antes de quedarse esperando
+        entry = voice_status.get_status(pk)
+        if entry is None or not self._can_view(request, entry):
+            raise Http404
+
+        if since is not None and wait:
+            entry = voice_status.wait_for_status(pk, since=since, timeout=wait) or entry
+
+        data = dict(entry)
+        data.pop('user_id', None)
+        return Response(data)
+
+    def _can_view(self, request, entry):
+        return entry['user_id'] == request.user.pk or IsAdmin().has_permission(request, self)
+
+    @staticmethod
+    def _int_param(request, name):
+        value = request.query_params.get(name)
+        if value in (None, ''):
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            raise ValidationError({name: ['Debe ser un número entero.']})
@@ -1,16 +1,22 @@
 from celery import shared_task
 import logging
 from .models import VoiceInput, AIPrompt, AIGenerationRequest
+from .adapters.llm_provider import ProviderError
 from .adapters.voice_processor import SpeechToTextProcessor
+from . import voice_status
 
 logger = logging.getLogger(__name__)
 
 
-@shared_task
-def process_voice_input(voice_input_id):
+@shared_task(bind=True, max_retries=6)
+def process_voice_input(self, voice_input_id):
     """
     Procesa una entrada de voz para convertirla en texto
 
+    Si otro worker tiene el lease de la entrada (p. ej. una reentrega tras la
+    caída del worker que la procesaba), la tarea se reprograma para cuando
+    venza el lease en lugar de descartarse.
+
     Args:
         voice_input_id: ID de la entrada de voz a procesar
 
@@ -24,6 +30,13 @@ def process_voice_input(voice_input_id):
         processor = SpeechToTextProcessor(voice_input)
         transcription = processor.process()
 
+        if processor.skipped:
+            return {
+                'status': 'skipped',
+                'voice_input_id': str(voice_input.id),
+                'message': 'La entrada de voz ya está completada'
+            }
+
         if not transcription:
             return {
                 'status': 'error',
@@ -44,6 +57,15 @@ def process_voice_input(voice_input_id):
             'transcription': transcription
         }
 
+    except voice_status.LeaseHeld as e:
+        if self.request.retries < self.max_retries:
+            logger.info(f"{str(e)}, reintentando en {e.remaining} s")
+            raise self.retry(countdown=e.remaining)
+        return {
+            'status': 'skipped',
+            'voice_input_id': str(voice_input_id),
+            'message': 'La entrada de voz sigue en proceso en otro worker'
+        }
     except VoiceInput.DoesNotExist:
         logger.error(f"Entrada de voz con ID {voice_input_id} no encontrada")
         return {
@@ -53,13 +75,10 @@ def process_voice_input(voice_input_id):
     except Exception as e:
         logger.error(f"Error procesando entrada de voz {voice_input_id}: {str(e)}")
 
-        # Si la entrada de voz existe, actualizar su estado
+        # Si la entrada de voz existe y no se completó, marcarla como fallida
         try:
-            voice_input = VoiceInput.objects.get(id=voice_input_id)
-            voice_input.status = 'FAILED'
-            voice_input.error_message = str(e)
-            voice_input.save()
-        except:
+            voice_status.fail(voice_input_id, str(e))
+        except Exception:
             pass
 
         return {
@@ -68,23 +87,67 @@ def process_voice_input(voice_input_id):
         }
 
 
-@shared_task
-def generate_presentation_from_prompt(generation_request_id):
+@shared_task(bind=True, max_retries=3)
+def generate_presentation_from_prompt(self, generation_request_id):
     """
     Genera una presentación a partir de un prompt
 
+    Ejecuta GenerationPipeline. Los errores del proveedor se reintentan con
+    espera creciente y el pipeline se reanuda desde su último checkpoint.
+
     Args:
         generation_request_id: ID de la solicitud de generación
 
     Returns:
         dict: Resultado de la generación
     """
-    # Esta tarea es bastante compleja y depende de otros componentes del sistema
-    # Aquí se implementaría la lógica para generar la presentación con IA
-    # Esto podría incluir:
-    # 1. Llamadas a APIs de IA (OpenAI, etc.)
-    # 2. Procesamiento de la respuesta para estructurar las diapositivas
-    # 3. Creación de la presentación en la base de datos
-
-    # Por simplicidad, no implementamos la lógica completa aquí
-    pass
\ No newline at end of file
+    from .pipeline import GenerationPipeline
+
+    try:
+        generation_request = AIGenerationRequest.objects.select_related(
+            'prompt', 'document', 'user'
+        ).get(id=generation_request_id)
+    except AIGenerationRequest.DoesNotExist:
+        logger.error(f"Solicitud de generación con ID {generation_request_id} no encontrada")
+        return {
+            'status': 'error',
+            'message': f"Solicitud de generación con ID {generation_request_id} no encontrada"
+        }
+
+    if generation_request.status == 'COMPLETED' and generation_request.result_presentation_id:
+        return {
+            'status': 'success',
+            'generation_request_id': str(generation_request.id),
+            'presentation_id': str(generation_request.result_presentation_id)
+        }
+
+    AIGenerationRequest.objects.filter(id=generation_request.id).update(status='PROCESSING')
+
+    pipeline = GenerationPipeline(generation_request)
+    try:
+        presentation = pipeline.run()
+    except ProviderError as e:
+        if self.request.retries < self.max_retries:
+            logger.warning(f"Error del proveedor en la generación {generation_request_id}, reintentando: {str(e)}")
+            raise self.retry(exc=e, countdown=2 ** self.request.retries * 5)
+        return _fail_generation(generation_request, e)
+    except Exception as e:
+        logger.error(f"Error generando presentación {generation_request_id}: {str(e)}")
+        return _fail_generation(generation_request, e)
+
+    return {
+        'status': 'success',
+        'generation_request_id': str(generation_request.id),
+        'presentation_id': str(presentation.id),
+        'timings': pipeline.timings
+    }
+
+
+def _fail_generation(generation_request, error):
+    AIGenerationRequest.objects.filter(id=generation_request.id).update(
+        status='FAILED', error_message=str(error)
+    )
+    return {
+        'status': 'error',
+        'message': f"Error generando presentación: {str(error)}"
+    }
@@ -0,0 +1,350 @@
+import io
+import struct
+import wave
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+
+from django_rest_role_jwt.task_metrics import ProcessCounters
+from ia.adapters.async_client import TokenBucket
+from ia.adapters.audio_chunker import iter_wav_chunks
+from ia.adapters.audio_normalizer import StreamResampler, normalize_audio
+from ia.adapters.audio_probe import AudioProbeError, probe_audio
+from ia.adapters.transcription import stitch_transcripts
+from ia.cache import (METRIC_EVENTS, ResponseCache, estimate_similarity, get_response_cache_metrics,
+                      minhash, normalize_prompt, shingles)
+
+LOCAL_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def make_wav(samples, sample_rate, channels=1, sample_width=2):
+    """WAV en memoria con las muestras int16 (entrelazadas si hay varios canales)"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(sample_width)
+        wav.setframerate(sample_rate)
+        wav.writeframes(np.asarray(samples, dtype='<i2').tobytes())
+    buffer.seek(0)
+    return buffer
+
+
+def tone(seconds, sample_rate, frequency=50, amplitude=10000):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.int16)
+
+
+class TokenBucketTest(SimpleTestCase):
+    """ Test module for the per-provider rate limiter """
+
+    def setUp(self):
+        patcher = mock.patch('ia.adapters.async_client.time.monotonic', return_value=100.0)
+        self.clock = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_up_to_capacity(self):
+        """Test that a full bucket serves its capacity without waiting"""
+        bucket = TokenBucket(rate=10, capacity=3)
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0.0, 0.0, 0.0])
+
+    def test_waits_are_staggered(self):
+        """Test that concurrent reservations wait one token interval more each"""
+        bucket = TokenBucket(rate=10, capacity=1)
+        waits = [bucket.reserve() for _ in range(4)]
+        for wait, expected in zip(waits, [0.0, 0.1, 0.2, 0.3]):
+            self.assertAlmostEqual(wait, expected)
+
+    def test_refill_is_capped(self):
+        """Test that tokens refill with time but never above the capacity"""
+        bucket = TokenBucket(rate=2, capacity=2)
+        bucket.reserve()
+        bucket.reserve()
+        self.assertAlmostEqual(bucket.reserve(), 0.5)
+
+        self.clock.return_value = 160.0
+        self.assertEqual([bucket.reserve() for _ in range(2)], [0.0, 0.0])
+        self.assertAlmostEqual(bucket.reserve(), 0.5)
+
+    def test_default_capacity(self):
+        """Test that the burst defaults to one second of tokens (at least one)"""
+        self.assertEqual(TokenBucket(rate=5).capacity, 5.0)
+        self.assertEqual(TokenBucket(rate=0.5).capacity, 1.0)
+
+
+class MinHashTest(SimpleTestCase):
+    """ Test module for prompt normalization and MinHash signatures """
+
+    def test_normalize_prompt(self):
+        """Test that case, Unicode forms and whitespace are normalized"""
+        self.assertEqual(normalize_prompt('  Crea\tuna  PRESENTACIÓN\n'), 'crea una presentación')
+        self.assertEqual(normalize_prompt('ﬁn'), 'fin')
+        self.assertEqual(normalize_prompt(None), '')
+
+    def test_shingles(self):
+        """Test word trigrams, short texts and empty texts"""
+        self.assertEqual(shingles('Uno, dos, tres, cuatro'), {'uno dos tres', 'dos tres cuatro'})
+        self.assertEqual(shingles('uno dos'), {'uno dos'})
+        self.assertEqual(shingles('  '), set())
+
+    def test_signature(self):
+        """Test that signatures are deterministic and estimate Jaccard similarity"""
+        text = 'crea una presentación sobre energías renovables para un público general'
+        signature = minhash(shingles(text))
+        self.assertEqual(signature, minhash(shingles(text.upper())))
+        self.assertEqual(estimate_similarity(signature, signature), 1.0)
+        self.assertIsNone(minhash(set()))
+
+        near = minhash(shingles(text + ' y técnico'))
+        other = minhash(shingles('resumen trimestral de ventas de la región norte con gráficos'))
+        self.assertGreater(estimate_similarity(signature, near), 0.6)
+        self.assertLess(estimate_similarity(signature, other), 0.2)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class ResponseCacheTest(SimpleTestCase):
+    """ Test module for the in-process model response cache """
+
+    PROMPT = 'crea una presentación sobre energías renovables para un público general'
+
+    def setUp(self):
+        self.scope = ResponseCache.make_scope('model', {'temperature': 0}, owner_id=1)
+
+    def test_exact_hit_on_normalized_prompt(self):
+        """Test that prompts differing only in case and spacing hit"""
+        response_cache = ResponseCache()
+        response_cache.set(self.PROMPT, self.scope, 'respuesta')
+        self.assertEqual(response_cache.get('  ' + self.PROMPT.upper(), self.scope), 'respuesta')
+        self.assertIsNone(response_cache.get('otro prompt', self.scope))
+        self.assertEqual(response_cache.stats()['hits'], 1)
+        self.assertEqual(response_cache.stats()['misses'], 1)
+
+    def test_scope_isolation(self):
+        """Test that responses are not shared across models, tasks or users"""
+        response_cache = ResponseCache(similarity=0.5)
+        response_cache.set(self.PROMPT, self.scope, 'respuesta')
+        for scope in (ResponseCache.make_scope('model', {'temperature': 0}, owner_id=2),
+                      ResponseCache.make_scope('model', {'temperature': 1}, owner_id=1),
+                      ResponseCache.make_scope('model', {'temperature': 0}, task='outline', owner_id=1),
+                      ResponseCache.make_scope('other', {'temperature': 0}, owner_id=1)):
+            with self.subTest(scope=scope):
+                self.assertNotEqual(scope, self.scope)
+                self.assertIsNone(response_cache.get(self.PROMPT, scope))
+
+    def test_near_hit_is_opt_in(self):
+        """Test that near-duplicate prompts only hit when similarity is set"""
+        variant = self.PROMPT + ' y técnico'
+        exact_only = ResponseCache()
+        exact_only.set(self.PROMPT, self.scope, 'respuesta')
+        self.assertIsNone(exact_only.get(variant, self.scope))
+
+        fuzzy = ResponseCache(similarity=0.6)
+        fuzzy.set(self.PROMPT, self.scope, 'respuesta')
+        self.assertEqual(fuzzy.get(variant, self.scope), 'respuesta')
+        self.assertIsNone(fuzzy.get('resumen trimestral de ventas de la región norte', self.scope))
+        self.assertEqual(fuzzy.stats()['near_hits'], 1)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted"""
+        response_cache = ResponseCache(max_entries=2)
+        response_cache.set('a', self.scope, 1)
+        response_cache.set('b', self.scope, 2)
+        response_cache.get('a', self.scope)
+        response_cache.set('c', self.scope, 3)
+        self.assertEqual(response_cache.get('a', self.scope), 1)
+        self.assertIsNone(response_cache.get('b', self.scope))
+        self.assertEqual(response_cache.stats()['evictions'], 1)
+
+    def test_expiration(self):
+        """Test that entries expire after the TTL"""
+        response_cache = ResponseCache(ttl=60, similarity=0.6)
+        with mock.patch('ia.cache.time.monotonic', return_value=1000.0) as clock:
+            response_cache.set(self.PROMPT, self.scope, 'respuesta')
+            clock.return_value = 1059.0
+            self.assertEqual(response_cache.get(self.PROMPT, self.scope), 'respuesta')
+            clock.return_value = 1061.0
+            self.assertIsNone(response_cache.get(self.PROMPT, self.scope))
+        self.assertEqual(response_cache.stats()['expirations'], 1)
+        self.assertEqual(response_cache.stats()['entries'], 0)
+
+    def test_lookups_do_not_touch_the_shared_cache(self):
+        """Test that hit and miss counters are kept in the process until flushed"""
+        counters = ProcessCounters('test:responses', METRIC_EVENTS, flush_interval=3600)
+        response_cache = ResponseCache()
+        response_cache.set(self.PROMPT, self.scope, 'respuesta')
+        with mock.patch('ia.cache._metrics', counters), \
+                mock.patch('django_rest_role_jwt.task_metrics.cache') as shared:
+            response_cache.get(self.PROMPT, self.scope)
+            response_cache.get('otro prompt', self.scope)
+        self.assertEqual(shared.mock_calls, [])
+
+        counters.flush()
+        with mock.patch('ia.cache._metrics', counters):
+            metrics = get_response_cache_metrics()
+        self.assertEqual((metrics['hits'], metrics['misses'], metrics['hit_rate']), (1, 1, 0.5))
+
+
+class StitchTranscriptsTest(SimpleTestCase):
+    """ Test module for joining the transcripts of overlapping chunks """
+
+    def test_overlap_is_removed(self):
+        """Test that repeated words at the boundary are kept once"""
+        self.assertEqual(
+            stitch_transcripts(['hola a todos, bienvenidos', 'Bienvenidos a la reunión.']),
+            'hola a todos, bienvenidos a la reunión.'
+        )
+        self.assertEqual(
+            stitch_transcripts(['uno dos tres', 'dos tres cuatro', 'cuatro cinco']),
+            'uno dos tres cuatro cinco'
+        )
+
+    def test_without_overlap(self):
+        """Test that unrelated chunks and empty chunks are simply joined"""
+        self.assertEqual(stitch_transcripts(['uno dos', '', None, 'tres']), 'uno dos tres')
+        self.assertEqual(stitch_transcripts([]), '')
+
+    def test_overlap_limit(self):
+        """Test that overlaps longer than max_overlap_words are not detected"""
+        self.assertEqual(stitch_transcripts(['a b c', 'a b c d'], max_overlap_words=2), 'a b c a b c d')
+        self.assertEqual(stitch_transcripts(['a b c', 'a b c d'], max_overlap_words=3), 'a b c d')
+
+
+class WavChunksTest(SimpleTestCase):
+    """ Test module for splitting recordings at silences """
+
+    RATE = 1000
+
+    def test_cuts_at_silence_with_overlap(self):
+        """Test that chunks are cut at the quietest window and overlap"""
+        samples = tone(10, self.RATE)
+        samples[2700:2800] = 0
+        chunks = list(iter_wav_chunks(make_wav(samples, self.RATE), chunk_seconds=3,
+                                      overlap_seconds=0.5, search_seconds=0.5))
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual([chunk.index for chunk in chunks], list(range(len(chunks))))
+        self.assertTrue(2.7 <= chunks[0].end <= 2.8)
+        self.assertEqual(chunks[0].start, 0)
+        self.assertEqual(chunks[-1].end, 10)
+        for previous, chunk in zip(chunks, chunks[1:]):
+            self.assertAlmostEqual(previous.end - chunk.start, 0.5)
+        for chunk in chunks:
+            self.assertEqual(len(chunk.samples), round(chunk.duration * self.RATE))
+            self.assertLessEqual(chunk.duration, 3.5)
+
+    def test_short_recording(self):
+        """Test that a recording shorter than a chunk yields a single chunk"""
+        chunks = list(iter_wav_chunks(make_wav(tone(1, self.RATE), self.RATE), chunk_seconds=3))
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual((chunks[0].start, chunks[0].end), (0, 1))
+
+        chunk_wav = wave.open(io.BytesIO(chunks[0].to_wav()))
+        self.assertEqual((chunk_wav.getnchannels(), chunk_wav.getframerate(), chunk_wav.getnframes()),
+                         (1, self.RATE, self.RATE))
+
+    def test_stereo_is_mixed_down(self):
+        """Test that interleaved stereo samples are averaged to mono"""
+        left = np.full(self.RATE, 1000, dtype=np.int16)
+        right = np.full(self.RATE, 3000, dtype=np.int16)
+        interleaved = np.column_stack([left, right]).ravel()
+        chunks = list(iter_wav_chunks(make_wav(interleaved, self.RATE, channels=2), chunk_seconds=3))
+        self.assertTrue(np.all(chunks[0].samples == 2000))
+
+
+def ogg_page(granule, payload, header_type=0):
+    """Página Ogg con un único segmento (sin CRC: probe_audio no lo comprueba)"""
+    return (b'OggS' + bytes([0, header_type]) + struct.pack('<qIII', granule, 1, 0, 0)
+            + bytes([1, len(payload)]) + payload)
+
+
+class ProbeAudioTest(SimpleTestCase):
+    """ Test module for identifying recordings from their headers """
+
+    def test_wav(self):
+        """Test PCM WAV, including chunks before the samples"""
+        wav = make_wav(tone(2, 8000), 8000)
+        info = probe_audio(wav)
+        self.assertEqual((info.container, info.codec, info.sample_rate, info.channels),
+                         ('wav', 'pcm', 8000, 1))
+        self.assertAlmostEqual(info.duration, 2.0)
+        self.assertEqual(info.extra['data_size'], 2 * 2 * 8000)
+        self.assertEqual(wav.tell(), 0)
+
+        # Chunk LIST de longitud impar entre fmt y data
+        raw = wav.getvalue()
+        extra = b'LIST' + struct.pack('<I', 3) + b'abc\0'
+        raw = raw[:36] + extra + raw[36:]
+        raw = raw[:4] + struct.pack('<I', len(raw) - 8) + raw[8:]
+        info = probe_audio(io.BytesIO(raw))
+        self.assertAlmostEqual(info.duration, 2.0)
+        self.assertEqual(info.extra['data_offset'], 44 + len(extra))
+
+    def test_mp3_constant_bitrate(self):
+        """Test that the duration of a CBR MP3 is derived from the file size"""
+        frame = b'\xff\xfb\x90\x00'.ljust(417, b'\0')  # MPEG-1 capa III, 128 kbps, 44.1 kHz
+        info = probe_audio(io.BytesIO(frame * 100))
+        self.assertEqual((info.container, info.codec, info.sample_rate, info.channels),
+                         ('mp3', 'mp3', 44100, 2))
+        self.assertAlmostEqual(info.duration, 100 * 417 * 8 / 128000)
+        self.assertFalse(info.extra['vbr'])
+
+    def test_ogg_opus(self):
+        """Test that the last granule position minus pre-skip gives the duration"""
+        head = b'OpusHead' + bytes([1, 2]) + struct.pack('<HIhB', 312, 44100, 0, 0)
+        data = ogg_page(0, head, header_type=2) + b'\0' * 1000 + ogg_page(2 * 48000 + 312, b'\0', 4)
+        info = probe_audio(io.BytesIO(data))
+        self.assertEqual((info.container, info.codec, info.sample_rate, info.channels),
+                         ('ogg', 'opus', 48000, 2))
+        self.assertAlmostEqual(info.duration, 2.0)
+
+    def test_unrecognized(self):
+        """Test that unknown or damaged files raise AudioProbeError"""
+        for data in (b'', b'not audio at all', b'RIFF\0\0\0\0WAVEdata\0\0\0\0'):
+            with self.subTest(data=data):
+                with self.assertRaises(AudioProbeError):
+                    probe_audio(io.BytesIO(data))
+
+
+class StreamResamplerTest(SimpleTestCase):
+    """ Test module for block-wise resampling to 16 kHz """
+
+    @staticmethod
+    def _resample(samples, source_rate, block):
+        resampler = StreamResampler(source_rate)
+        return np.concatenate([resampler.process(samples[i:i + block])
+                               for i in range(0, len(samples), block)])
+
+    def test_output_length_and_blocks(self):
+        """Test that the output rate is right and independent of the block size"""
+        samples = tone(1, 44100, frequency=440).astype(np.float32)
+        whole = self._resample(samples, 44100, len(samples))
+        self.assertLessEqual(abs(len(whole) - 16000), 1)
+        for block in (7, 1000, 4096):
+            with self.subTest(block=block):
+                np.testing.assert_allclose(self._resample(samples, 44100, block), whole, atol=0.5)
+
+    def test_lowpass(self):
+        """Test that tones above the new Nyquist are removed instead of aliased"""
+        low = self._resample(tone(1, 48000, frequency=1000).astype(np.float32), 48000, 4096)
+        high = self._resample(tone(1, 48000, frequency=12000).astype(np.float32), 48000, 4096)
+        self.assertGreater(np.abs(low[100:]).max(), 9000)
+        self.assertLess(np.abs(high[100:]).max(), 500)
+
+    def test_same_rate(self):
+        """Test that audio already at the target rate is returned unchanged"""
+        samples = tone(0.1, 16000).astype(np.float32)
+        np.testing.assert_array_equal(StreamResampler(16000).process(samples), samples)
+
+    def test_normalize_trims(self):
+        """Test that normalize_audio writes mono 16 kHz and reports the trimmed length"""
+        stereo = np.column_stack([tone(3, 22050), tone(3, 22050)]).ravel()
+        source = make_wav(stereo, 22050, channels=2)
+        output = io.BytesIO()
+        on_block = mock.Mock()
+        seconds = normalize_audio(source, probe_audio(source), output, max_seconds=1.5,
+                                  on_block=on_block)
+        self.assertAlmostEqual(seconds, 1.5, places=2)
+        self.assertEqual(on_block.call_args, mock.call(seconds))
+        with wave.open(output) as wav:
+            self.assertEqual((wav.getnchannels(), wav.getframerate()), (1, 16000))
+            self.assertAlmostEqual(wav.getnframes() / 16000, seconds)
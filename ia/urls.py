@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import VoiceInputViewSet, AIPromptViewSet, AIGenerationRequestViewSet
+from .status_views import VoiceInputStatusView
 
 router = DefaultRouter()
 router.register(r'voice-inputs', VoiceInputViewSet, basename='voice-input')
@@ -8,5 +9,7 @@ router.register(r'prompts', AIPromptViewSet, basename='prompt')
 router.register(r'generation-requests', AIGenerationRequestViewSet, basename='generation-request')
 
 urlpatterns = [
+    path('voice-inputs/<uuid:pk>/status/', VoiceInputStatusView.as_view(),
+         name='voice-input-status'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -0,0 +1,254 @@
+"""
+Estado de procesamiento de las entradas de voz
+
+Las transiciones de estado se escriben con UPDATE dirigidos (solo las
+columnas que cambian) y condicionados al estado actual, de modo que dos
+workers no pueden procesar la misma grabación ni un FAILED tardío pisar un
+COMPLETED. Cada cambio se publica además en la caché compartida, que es lo
+que consultan los clientes (con long-poll) en lugar de la base de datos.
+
+El worker que procesa una entrada mantiene un lease en la caché compartida
+(VOICE_PROCESSING_LEASE segundos, renovado durante la normalización y con
+cada progreso). Si el worker muere, la entrada se queda en PROCESSING; la
+reentrega de la tarea (acks_late) encuentra el lease tomado (LeaseHeld) y se
+reprograma para cuando venza, momento en que vuelve a reclamarla.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import VoiceInput
+
+PROCESSING = 'PROCESSING'
+COMPLETED = 'COMPLETED'
+FAILED = 'FAILED'
+FINAL_STATUSES = (COMPLETED, FAILED)
+
+# Intervalo entre lecturas de la caché durante un long-poll
+POLL_INTERVAL = 0.5
+
+# Segundos mínimos entre renovaciones del lease desde lease_renewer()
+LEASE_RENEW_INTERVAL = 30
+
+
+class LeaseHeld(Exception):
+    """Otro worker (vivo o no) tiene el lease de la entrada de voz"""
+
+    def __init__(self, voice_input_id, remaining):
+        super().__init__(f"La entrada de voz {voice_input_id} está en proceso "
+                         f"(lease vigente {remaining} s)")
+        self.voice_input_id = voice_input_id
+        self.remaining = remaining
+
+
+def _status_key(voice_input_id):
+    return f"ia:voice:{voice_input_id}:status"
+
+
+def _lease_key(voice_input_id):
+    return f"ia:voice:{voice_input_id}:lease"
+
+
+def _lease_timeout():
+    return getattr(settings, 'VOICE_PROCESSING_LEASE', 10 * 60)
+
+
+def publish(voice_input_id, user_id, status, **data):
+    """
+    Publica el estado de una entrada de voz en la caché
+
+    Cada publicación lleva una versión creciente para que los clientes puedan
+    esperar a la siguiente con wait_for_status().
+
+    Args:
+        voice_input_id: ID de la entrada de voz
+        user_id: ID del propietario (para comprobar permisos sin consultar la BD)
+        status: Estado actual
+        **data: transcription, error_message, done, total...
+    """
+    key = _status_key(voice_input_id)
+    previous = cache.get(key) or {}
+    entry = {
+        'id': str(voice_input_id),
+        'user_id': user_id,
+        'status': status,
+        'transcription': previous.get('transcription') if status == PROCESSING else None,
+        'error_message': None,
+        'done': previous.get('done', 0) if status == PROCESSING else None,
+        'total': previous.get('total') if status == PROCESSING else None,
+    }
+    entry.update(data)
+    entry['version'] = max(int(time.time() * 1000), previous.get('version', 0) + 1)
+    cache.set(key, entry, getattr(settings, 'VOICE_STATUS_TIMEOUT', 60 * 60))
+    return entry
+
+
+def start(voice_input):
+    """
+    Marca la entrada como PROCESSING si nadie la está procesando ya
+
+    Primero se toma el lease (cache.add es atómico: solo un worker lo
+    consigue mientras esté vigente) y después se reclama la fila. Una fila en
+    PROCESSING sin lease vigente es de un worker que ha muerto y se reclama.
+
+    Returns:
+        bool: False si ya estaba completada
+
+    Raises:
+        LeaseHeld: Si otro worker tiene el lease; remaining indica los
+            segundos que le quedan para vencer si no se renueva
+    """
+    lease_key = _lease_key(voice_input.pk)
+    timeout = _lease_timeout()
+    if not cache.add(lease_key, time.time() + timeout, timeout):
+        expires = cache.get(lease_key)
+        remaining = math.ceil(expires - time.time()) if expires is not None else 0
+        raise LeaseHeld(voice_input.pk, max(1, remaining))
+
+    claimed = VoiceInput.objects.filter(pk=voice_input.pk).exclude(
+        status=COMPLETED
+    ).update(status=PROCESSING)
+    if not claimed:
+        cache.delete(lease_key)
+        return False
+
+    voice_input.status = PROCESSING
+    publish(voice_input.pk, voice_input.user_id, PROCESSING, transcription='', done=0)
+    return True
+
+
+def renew_lease(voice_input):
+    """
+    Renueva el lease del worker que procesa la entrada
+
+    Solo se renueva un lease vigente (cache.touch): si ya ha vencido no se
+    vuelve a crear, porque otro worker puede haber reclamado la entrada.
+    """
+    lease_key = _lease_key(voice_input.pk)
+    timeout = _lease_timeout()
+    if cache.touch(lease_key, timeout):
+        # El valor guarda el vencimiento para que LeaseHeld lo pueda calcular
+        cache.set(lease_key, time.time() + timeout, timeout)
+
+
+def lease_renewer(voice_input, interval=LEASE_RENEW_INTERVAL):
+    """
+    Devuelve un callable que renueva el lease como mucho cada interval segundos
+
+    Pensado para pasos largos sin progreso publicable (normalize_audio).
+    """
+    renewed_at = time.monotonic()
+
+    def renew(*args):
+        nonlocal renewed_at
+        now = time.monotonic()
+        if now - renewed_at >= interval:
+            renew_lease(voice_input)
+            renewed_at = now
+
+    return renew
+
+
+def report_progress(voice_input, transcription, done, total):
+    """
+    Guarda la transcripción parcial mientras la entrada siga en proceso
+
+    También renueva el lease del worker.
+    """
+    VoiceInput.objects.filter(pk=voice_input.pk, status=PROCESSING).update(
+        transcription=transcription
+    )
+    renew_lease(voice_input)
+    publish(voice_input.pk, voice_input.user_id, PROCESSING,
+            transcription=transcription, done=done, total=total)
+
+
+def complete(voice_input, transcription, **fields):
+    """
+    Pasa la entrada de PROCESSING a COMPLETED con su transcripción
+
+    Args:
+        **fields: Otras columnas que se guardan en la misma escritura (duration)
+
+    Returns:
+        bool: False si la entrada ya no estaba en proceso
+    """
+    updated = VoiceInput.objects.filter(pk=voice_input.pk, status=PROCESSING).update(
+        status=COMPLETED, transcription=transcription, **fields
+    )
+    cache.delete(_lease_key(voice_input.pk))
+    if updated:
+        voice_input.status = COMPLETED
+        voice_input.transcription = transcription
+        for name, value in fields.items():
+            setattr(voice_input, name, value)
+        publish(voice_input.pk, voice_input.user_id, COMPLETED, transcription=transcription)
+    return bool(updated)
+
+
+def fail(voice_input_id, error_message, user_id=None):
+    """
+    Marca la entrada como FAILED salvo que ya esté completada
+
+    Returns:
+        bool: True si se ha cambiado el estado
+    """
+    updated = VoiceInput.objects.filter(pk=voice_input_id).exclude(status=COMPLETED).update(
+        status=FAILED, error_message=error_message
+    )
+    cache.delete(_lease_key(voice_input_id))
+    if updated:
+        if user_id is None:
+            user_id = VoiceInput.objects.filter(pk=voice_input_id).values_list(
+                'user_id', flat=True).first()
+        publish(voice_input_id, user_id, FAILED, error_message=error_message)
+    return bool(updated)
+
+
+def get_status(voice_input_id):
+    """
+    Estado actual de una entrada de voz
+
+    Se lee de la caché; si no está (entrada antigua o clave desalojada) se
+    consulta una vez la base de datos y se vuelve a publicar.
+
+    Returns:
+        dict o None: Estado publicado, o None si la entrada no existe
+    """
+    entry = cache.get(_status_key(voice_input_id))
+    if entry is not None:
+        return entry
+
+    row = VoiceInput.objects.filter(pk=voice_input_id).values(
+        'user_id', 'status', 'transcription', 'error_message'
+    ).first()
+    if row is None:
+        return None
+    user_id = row.pop('user_id')
+    return publish(voice_input_id, user_id, row.pop('status'), **row)
+
+
+def wait_for_status(voice_input_id, since=None, timeout=0):
+    """
+    Long-poll: espera hasta que haya una versión posterior a since
+
+    La espera ocupa el hilo (síncrono) del worker que atiende la petición
+    durante hasta timeout segundos; VOICE_STATUS_MAX_WAIT la acota.
+
+    Args:
+        voice_input_id: ID de la entrada de voz
+        since: Última versión conocida por el cliente
+        timeout: Segundos de espera como máximo (0 devuelve al momento)
+
+    Returns:
+        dict o None: Estado actual (puede ser el mismo si vence el timeout)
+    """
+    entry = get_status(voice_input_id)
+    deadline = time.monotonic() + timeout
+    while (entry is not None and since is not None and entry['version'] <= since
+           and entry['status'] not in FINAL_STATUSES and time.monotonic() < deadline):
+        time.sleep(POLL_INTERVAL)
+        entry = get_status(voice_input_id)
+    return entry
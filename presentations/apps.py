@@ -0,0 +1,25 @@
+from django.apps import AppConfig
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+
+class PresentationsConfig(AppConfig):
+    name = 'presentations'
+
+    def ready(self):
+        # Invalidar la caché de representaciones y programar la miniatura al
+        # escribir presentaciones o diapositivas. Sin módulo de modelos no hay
+        # nada que conectar (y la importación haría fallar el arranque)
+        if self.models_module is None:
+            return
+
+        from .models import Presentation, Slide
+        from .signals import (collaborators_changed, owner_changed, presentation_changed,
+                              presentation_saved, slide_changed)
+
+        post_save.connect(presentation_saved, sender=Presentation)
+        post_delete.connect(presentation_changed, sender=Presentation)
+        post_save.connect(slide_changed, sender=Slide)
+        post_delete.connect(slide_changed, sender=Slide)
+        m2m_changed.connect(collaborators_changed, sender=Presentation.collaborators.through)
+        post_save.connect(owner_changed, sender=settings.AUTH_USER_MODEL)
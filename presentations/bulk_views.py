@@ -0,0 +1,108 @@
+import importlib
+
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from rest_framework import permissions, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from api.permissions import IsAdmin
+from django_rest_role_jwt.celery import enqueue_for_user
+
+# Los módulos que dependen de los modelos se importan dentro de cada vista
+presentation_permissions = importlib.import_module('presentations.presentation-permissions')
+
+
+class SlideBulkOperationsView(APIView):
+    """
+    Aplica en una sola petición un lote de operaciones sobre las diapositivas
+
+    POST /presentations/<presentation_pk>/slides/bulk/
+        {"operations": [{"op": "reorder", "order": [...]}, ...]}
+
+    Devuelve solo las diapositivas creadas o modificadas y los identificadores
+    de las eliminadas.
+    """
+    permission_classes = [permissions.IsAuthenticated,
+                          presentation_permissions.IsOwnerOrCollaborator]
+
+    def post(self, request, presentation_pk):
+        from .models import Presentation
+        from .serializers import SlideBulkOperationsSerializer, SlideSerializer
+        from .services.slide_operations import SlideOperationError, apply_slide_operations
+
+        presentation = get_object_or_404(Presentation, pk=presentation_pk)
+        self.check_object_permissions(request, presentation)
+
+        serializer = SlideBulkOperationsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            changes = apply_slide_operations(presentation, serializer.validated_data['operations'])
+        except SlideOperationError as e:
+            raise ValidationError({'operations': {e.index: [str(e)]}})
+
+        return Response({
+            'updated': SlideSerializer(changes['updated'], many=True).data,
+            'created': SlideSerializer(changes['created'], many=True).data,
+            'deleted': [str(pk) for pk in changes['deleted']]
+        }, status=status.HTTP_200_OK)
+
+
+class BulkThemeApplyView(APIView):
+    """
+    Aplica un tema a un conjunto filtrado de presentaciones
+
+    POST /presentations/themes/bulk/
+        {"theme": "creative", "filters": {"is_template": true}, "dry_run": false}
+
+    Con dry_run se devuelve al momento el número de presentaciones afectadas;
+    en otro caso se encola apply_theme_bulk y se responde 202 con el id de la
+    tarea. Los usuarios que no son Admin solo pueden modificar sus propias
+    presentaciones.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        from .serializers import BulkThemeApplySerializer
+        from .tasks import apply_theme_bulk, register_theme_task
+        template_service = importlib.import_module('presentations.services.template-service')
+
+        serializer = BulkThemeApplySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        filters = dict(data['filters'])
+        if not IsAdmin().has_permission(request, self):
+            filters['owner'] = request.user.pk
+
+        if data['dry_run']:
+            queryset = template_service.filter_presentations(filters)
+            return Response(template_service.apply_theme_to_queryset(
+                queryset, data['theme'], dry_run=True
+            ))
+
+        task = enqueue_for_user(apply_theme_bulk, request.user, data['theme'], filters,
+                                overrides=data['overrides'], user_id=request.user.pk)
+        register_theme_task(task.id, request.user.pk)
+        return Response({'task_id': task.id, 'status': 'queued'},
+                        status=status.HTTP_202_ACCEPTED)
+
+
+class BulkThemeProgressView(APIView):
+    """Progreso de una aplicación de tema en bloque (solo para quien la lanzó o un Admin)"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, task_id):
+        from .tasks import get_theme_progress
+
+        progress = get_theme_progress(task_id)
+        if progress is None or not self._can_view(request, progress):
+            raise Http404
+
+        progress.pop('user_id', None)
+        return Response(progress)
+
+    def _can_view(self, request, progress):
+        return progress['user_id'] == request.user.pk or IsAdmin().has_permission(request, self)
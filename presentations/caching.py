@@ -0,0 +1,118 @@
+"""
+Caché de la representación serializada de las presentaciones
+
+Cada presentación tiene una versión en la caché compartida. Las escrituras
+sobre la presentación o sus diapositivas la renuevan, de modo que las
+entradas antiguas dejan de leerse sin tener que borrarlas una a una. La
+clave incluye también la versión del propietario, que se renueva al cambiar
+sus datos (la representación incluye owner_details). Junto a cada
+representación se guarda su ETag (hash del contenido).
+
+Las versiones solo son coherentes si todos los procesos ven la misma caché:
+con una caché local (LocMemCache) las representaciones no se guardan y se
+serializan en cada petición.
+"""
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from django_rest_role_jwt.shared_cache import is_shared_cache
+
+
+def _version_key(presentation_id):
+    return f"presentation:{presentation_id}:version"
+
+
+def _owner_version_key(user_id):
+    return f"presentation:owner:{user_id}:version"
+
+
+def get_version(presentation_id):
+    """Versión actual de la presentación (se inicializa si no existe)"""
+    return _read_version(_version_key(presentation_id))
+
+
+def bump_version(presentation_id):
+    """Invalida las representaciones en caché de una presentación"""
+    return _renew_version(_version_key(presentation_id))
+
+
+def invalidate_presentation(presentation_id):
+    """Renueva la versión cuando la transacción actual se confirme"""
+    transaction.on_commit(lambda: bump_version(presentation_id))
+
+
+def invalidate_owner(user_id):
+    """Invalida las representaciones de todas las presentaciones de un usuario"""
+    transaction.on_commit(lambda: _renew_version(_owner_version_key(user_id)))
+
+
+def _read_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def _renew_version(key):
+    # Un valor nuevo y distinto en cada renovación en lugar de incr (que no
+    # es atómico en todos los backends): dos renovaciones simultáneas nunca
+    # dejan vigente una versión que ya había leído una representación
+    version = _new_version()
+    cache.set(key, version, None)
+    return version
+
+
+def _new_version():
+    return uuid.uuid4().hex[:16]
+
+
+def compute_etag(data):
+    """ETag fuerte a partir del contenido serializado"""
+    payload = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True, separators=(',', ':'))
+    return '"%s"' % hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def get_representation(presentation_id, variant, build, owner_id=None):
+    """
+    Devuelve (etag, data) de la representación, serializándola solo si no está en caché
+
+    Args:
+        presentation_id: Identificador de la presentación
+        variant: Distingue representaciones (serializer, host...)
+        build: Callable sin argumentos que devuelve los datos serializados
+        owner_id: Propietario de la presentación (su versión forma parte de la clave)
+
+    Returns:
+        tuple: (etag, data)
+    """
+    if not is_shared_cache():
+        data = build()
+        return compute_etag(data), data
+
+    versions = f"v{get_version(presentation_id)}"
+    if owner_id is not None:
+        versions += f".o{_read_version(_owner_version_key(owner_id))}"
+    key = f"presentation:{presentation_id}:{versions}:{variant}"
+    entry = cache.get(key)
+    if entry is None:
+        data = build()
+        entry = (compute_etag(data), data)
+        cache.set(key, entry, getattr(settings, 'PRESENTATION_CACHE_TIMEOUT', 3600))
+    return entry
+
+
+def etag_matches(etag, if_none_match):
+    """Comparación fuerte de un ETag con la cabecera If-None-Match"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    # Las etiquetas débiles (W/"...") nunca coinciden en comparación fuerte
+    return etag in (tag.strip() for tag in if_none_match.split(','))
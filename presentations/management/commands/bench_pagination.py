@@ -0,0 +1,75 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
+
+from api.models import User
+from django_rest_role_jwt.pagination import UpdatedAtKeysetPagination
+from presentations.models import Presentation
+
+
+class Command(BaseCommand):
+    help = 'Compara la latencia de páginas profundas con paginación por número y por cursor'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20000,
+                            help='Presentaciones creadas para el propietario de prueba')
+        parser.add_argument('--pages', default='1,10,100,500',
+                            help='Números de página a medir, separados por comas')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Repeticiones por medida')
+
+    def handle(self, *args, **options):
+        pages = [int(page) for page in options['pages'].split(',')]
+        self.factory = RequestFactory()
+        self.repeat = options['repeat']
+
+        # Los datos de prueba se crean dentro de una transacción que se deshace al final
+        with transaction.atomic():
+            owner = User.objects.create_user(email='bench-pagination@example.com',
+                                             password='benchmark')
+            Presentation.objects.bulk_create(
+                [Presentation(title=f"Benchmark {i}", owner=owner)
+                 for i in range(options['rows'])],
+                batch_size=1000
+            )
+            queryset = Presentation.objects.filter(owner=owner).order_by('-updated_at', '-id')
+
+            self.stdout.write(f"{'página':>8} {'offset (ms)':>12} {'cursor (ms)':>12} "
+                              f"{'cursor sin count (ms)':>22}")
+            for page in pages:
+                cursor = self._cursor_for_page(queryset, page)
+                offset_ms = self._measure(PageNumberPagination(), queryset, {'page': page})
+                keyset_ms = self._measure(UpdatedAtKeysetPagination(), queryset,
+                                          {'cursor': cursor} if cursor else {})
+                no_count_ms = self._measure(UpdatedAtKeysetPagination(), queryset,
+                                            {'cursor': cursor, 'count': 'false'} if cursor
+                                            else {'count': 'false'})
+                self.stdout.write(f"{page:>8} {offset_ms:>12.2f} {keyset_ms:>12.2f} "
+                                  f"{no_count_ms:>22.2f}")
+
+            transaction.set_rollback(True)
+
+    def _request(self, params):
+        return Request(self.factory.get('/presentations/', params))
+
+    def _cursor_for_page(self, queryset, page):
+        """Cursor equivalente a ?page=N (la última fila de la página anterior)"""
+        if page <= 1:
+            return None
+        paginator = UpdatedAtKeysetPagination()
+        offset = (page - 1) * paginator.page_size - 1
+        row = queryset.order_by(*paginator.ordering)[offset]
+        return paginator.encode_cursor(paginator.row_values(row))
+
+    def _measure(self, paginator, queryset, params):
+        samples = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            paginator.paginate_queryset(queryset, self._request(params))
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples)
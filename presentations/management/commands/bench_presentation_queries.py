@@ -0,0 +1,87 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.models import User
+from presentations.models import Presentation, Slide
+
+
+class Command(BaseCommand):
+    help = (
+        'Cuenta las consultas SQL de los endpoints de listado y detalle de '
+        'presentaciones para distintos tamaños y falla si no son constantes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1,5,20',
+                            help='Tamaños a comparar (presentaciones por página y '
+                                 'diapositivas por presentación), separados por comas')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+
+        # Los datos de prueba se crean dentro de una transacción que se deshace al final
+        with transaction.atomic(), override_settings(ROOT_URLCONF='presentations.urls'):
+            results = {
+                'list': [(size, self._measure_list(size)) for size in sizes],
+                'detail': [(size, self._measure_detail(size)) for size in sizes],
+            }
+            transaction.set_rollback(True)
+
+        failed = False
+        for endpoint, samples in results.items():
+            counts = {queries for _, queries in samples}
+            line = '  '.join(f"{size:>3} → {queries:>3}" for size, queries in samples)
+            if len(counts) == 1:
+                self.stdout.write(self.style.SUCCESS(f"{endpoint:>6}: {line}  (constante)"))
+            else:
+                failed = True
+                self.stdout.write(self.style.ERROR(f"{endpoint:>6}: {line}  (crece con el tamaño)"))
+
+        if failed:
+            raise CommandError('El número de consultas depende del tamaño de la página')
+
+    def _client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client
+
+    def _create_presentations(self, owner, count, slides_per_presentation):
+        presentations = [
+            Presentation.objects.create(title=f"Benchmark {i}", owner=owner)
+            for i in range(count)
+        ]
+        Slide.objects.bulk_create([
+            Slide(presentation=presentation, title=f"Diapositiva {order}",
+                  order=order, content={})
+            for presentation in presentations
+            for order in range(slides_per_presentation)
+        ])
+        return presentations
+
+    def _create_user(self, label, size):
+        return User.objects.create_user(
+            email=f"bench-{label}-{size}@example.com", password='benchmark'
+        )
+
+    def _measure_list(self, size):
+        """Consultas del listado con `size` presentaciones de 3 diapositivas"""
+        user = self._create_user('list', size)
+        self._create_presentations(user, size, 3)
+        return self._count_queries(self._client_for(user), reverse('presentation-list'))
+
+    def _measure_detail(self, size):
+        """Consultas del detalle de una presentación con `size` diapositivas"""
+        user = self._create_user('detail', size)
+        presentation, = self._create_presentations(user, 1, size)
+        url = reverse('presentation-detail', kwargs={'pk': presentation.pk})
+        return self._count_queries(self._client_for(user), url)
+
+    def _count_queries(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f"GET {url} devolvió {response.status_code}")
+        return len(context.captured_queries)
@@ -0,0 +1,68 @@
+import importlib
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from presentations.caching import invalidate_presentation
+from presentations.models import Presentation
+
+template_service = importlib.import_module('presentations.services.template-service')
+
+
+class Command(BaseCommand):
+    help = (
+        'Sustituye los temas copiados completos en Presentation.theme por una '
+        'referencia {id, version, overrides} al registro de temas'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Presentaciones leídas y actualizadas por lote')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Solo cuenta las presentaciones y bytes que se compactarían')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        stats = {'scanned': 0, 'compacted': 0, 'custom': 0, 'bytes_before': 0, 'bytes_after': 0}
+
+        batch = []
+        queryset = Presentation.objects.only('id', 'theme').order_by('pk')
+        for presentation in queryset.iterator(chunk_size=batch_size):
+            stats['scanned'] += 1
+            theme = presentation.theme
+            if not theme or template_service.is_theme_reference(theme):
+                continue
+
+            compacted = template_service.compact_theme(theme)
+            if compacted is theme:
+                stats['custom'] += 1
+                continue
+
+            stats['compacted'] += 1
+            stats['bytes_before'] += len(json.dumps(theme))
+            stats['bytes_after'] += len(json.dumps(compacted))
+            presentation.theme = compacted
+            batch.append(presentation)
+
+            if len(batch) >= batch_size:
+                self._flush(batch, dry_run)
+                batch = []
+
+        self._flush(batch, dry_run)
+
+        prefix = '[dry-run] ' if dry_run else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{stats['compacted']} de {stats['scanned']} presentaciones compactadas "
+            f"({stats['custom']} con tema personalizado sin cambios); "
+            f"{stats['bytes_before']} → {stats['bytes_after']} bytes"
+        ))
+
+    def _flush(self, batch, dry_run):
+        if not batch or dry_run:
+            return
+        with transaction.atomic():
+            Presentation.objects.bulk_update(batch, ['theme'])
+            for presentation in batch:
+                invalidate_presentation(presentation.pk)
@@ -0,0 +1,57 @@
+from rest_framework import status
+from rest_framework.response import Response
+
+from .caching import etag_matches, get_representation
+
+
+class EagerLoadingMixin:
+    """
+    Aplica la carga anticipada que declara el serializer de cada acción
+
+    Los serializers que definen setup_eager_loading(queryset) indican qué
+    relaciones necesitan (select_related, prefetch_related, anotaciones), de
+    modo que el número de consultas por página no depende del tamaño de página.
+    """
+    eager_loading = True
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        setup = getattr(serializer_class, 'setup_eager_loading', None)
+        if setup is not None and self.eager_loading:
+            queryset = setup(queryset)
+        return queryset
+
+
+class CachedRetrieveMixin:
+    """
+    Detalle servido desde la caché de representaciones con ETag fuerte
+
+    El objeto se obtiene sin carga anticipada (solo para comprobar permisos);
+    la serialización completa únicamente se hace cuando la versión de la
+    presentación no está en caché. Si If-None-Match coincide se responde 304
+    sin cuerpo.
+    """
+
+    def retrieve(self, request, *args, **kwargs):
+        self.eager_loading = False
+        try:
+            instance = self.get_object()
+        finally:
+            self.eager_loading = True
+
+        variant = f"{self.get_serializer_class().__name__}:{request.get_host()}"
+        etag, data = get_representation(
+            instance.pk, variant, lambda: self._serialize_for_cache(instance),
+            owner_id=instance.owner_id
+        )
+
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if etag_matches(etag, request.META.get('HTTP_IF_NONE_MATCH')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(data, headers=headers)
+
+    def _serialize_for_cache(self, instance):
+        # Recargar con las relaciones que necesita el serializer
+        instance = self.get_queryset().get(pk=instance.pk)
+        return self.get_serializer(instance).data
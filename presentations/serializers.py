@@ -1,7 +1,36 @@
+import importlib
+
+from django.db.models import Count, Prefetch
 from rest_framework import serializers
 from .models import Presentation, Slide
 from api.serializers import UserSerializer
 
+template_service = importlib.import_module('presentations.services.template-service')
+
+
+def get_slides_count(obj):
+    """
+    Número de diapositivas sin consultas extra cuando es posible
+
+    Usa la anotación 'slides_total' (listados) o las diapositivas ya
+    precargadas (detalle); solo si no hay ninguna hace un COUNT.
+    """
+    annotated = getattr(obj, 'slides_total', None)
+    if annotated is not None:
+        return annotated
+    prefetched = getattr(obj, '_prefetched_objects_cache', {}).get('slides')
+    if prefetched is not None:
+        return len(prefetched)
+    return obj.slides.count()
+
+
+def get_owner_details(obj):
+    return {
+        'id': obj.owner.id,
+        'email': obj.owner.email,
+        'full_name': obj.owner.get_full_name()
+    }
+
 
 class SlideSerializer(serializers.ModelSerializer):
     class Meta:
@@ -10,10 +39,38 @@ class SlideSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
+class ThemeField(serializers.JSONField):
+    """
+    Tema de la presentación
+
+    Se guarda como referencia {'id', 'version', 'overrides'} y se devuelve
+    resuelto. Acepta el id de un tema, una referencia o un tema completo,
+    que se compacta a referencia más diferencias.
+    """
+
+    def to_internal_value(self, data):
+        data = super().to_internal_value(data)
+        if isinstance(data, str):
+            if data not in template_service.THEME_VERSIONS:
+                raise serializers.ValidationError(f"Tema desconocido: {data}")
+            return template_service.make_theme_reference(data)
+        if template_service.is_theme_reference(data):
+            if template_service.get_theme(data['id'], data['version']) is None:
+                raise serializers.ValidationError(
+                    f"Versión de tema desconocida: {data['id']} v{data['version']}"
+                )
+            return data
+        return template_service.compact_theme(data)
+
+    def to_representation(self, value):
+        return template_service.thaw(template_service.resolve_theme(value))
+
+
 class PresentationSerializer(serializers.ModelSerializer):
     owner_details = serializers.SerializerMethodField()
     slides_count = serializers.SerializerMethodField()
     thumbnail_url = serializers.SerializerMethodField()
+    theme = ThemeField(required=False)
 
     class Meta:
         model = Presentation
@@ -23,15 +80,16 @@ class PresentationSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'owner', 'created_at', 'updated_at',
                             'thumbnail_url', 'slides_count']
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Carga el propietario con JOIN y el número de diapositivas anotado"""
+        return queryset.select_related('owner').annotate(slides_total=Count('slides', distinct=True))
+
     def get_owner_details(self, obj):
-        return {
-            'id': obj.owner.id,
-            'email': obj.owner.email,
-            'full_name': obj.owner.get_full_name()
-        }
+        return get_owner_details(obj)
 
     def get_slides_count(self, obj):
-        return obj.slides.count()
+        return get_slides_count(obj)
 
     def get_thumbnail_url(self, obj):
         request = self.context.get('request')
@@ -51,15 +109,16 @@ class PresentationListSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'owner_details', 'created_at',
                   'updated_at', 'thumbnail_url', 'slides_count']
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Carga el propietario con JOIN y el número de diapositivas anotado"""
+        return queryset.select_related('owner').annotate(slides_total=Count('slides', distinct=True))
+
     def get_owner_details(self, obj):
-        return {
-            'id': obj.owner.id,
-            'email': obj.owner.email,
-            'full_name': obj.owner.get_full_name()
-        }
+        return get_owner_details(obj)
 
     def get_slides_count(self, obj):
-        return obj.slides.count()
+        return get_slides_count(obj)
 
     def get_thumbnail_url(self, obj):
         request = self.context.get('request')
@@ -73,4 +132,52 @@ class PresentationDetailSerializer(PresentationSerializer):
     slides = SlideSerializer(many=True, read_only=True)
 
     class Meta(PresentationSerializer.Meta):
-        fields = PresentationSerializer.Meta.fields + ['slides']
\ No newline at end of file
+        fields = PresentationSerializer.Meta.fields + ['slides']
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Carga el propietario con JOIN y las diapositivas ordenadas en una consulta"""
+        return queryset.select_related('owner').prefetch_related(
+            Prefetch('slides', queryset=Slide.objects.order_by('order'))
+        )
+
+class SlideBulkOperationsSerializer(serializers.Serializer):
+    """Lote de operaciones sobre las diapositivas de una presentación"""
+    operations = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=500
+    )
+
+
+class BulkThemeFiltersSerializer(serializers.Serializer):
+    """
+    Filtros de la aplicación de tema en bloque (ver filter_presentations)
+
+    Los valores validados son tipos JSON simples, ya que se pasan a la tarea.
+    """
+    owner = serializers.IntegerField(required=False, min_value=1)
+    is_template = serializers.BooleanField(required=False)
+    is_public = serializers.BooleanField(required=False)
+    ids = serializers.ListField(child=serializers.UUIDField(format='hex_verbose'),
+                                required=False, allow_empty=False, max_length=10000)
+
+    def to_internal_value(self, data):
+        if isinstance(data, dict):
+            unknown = set(data) - set(self.fields)
+            if unknown:
+                raise serializers.ValidationError(
+                    f"Filtros no admitidos: {', '.join(sorted(unknown))}"
+                )
+        value = super().to_internal_value(data)
+        if 'ids' in value:
+            value['ids'] = [str(pk) for pk in value['ids']]
+        return value
+
+
+class BulkThemeApplySerializer(serializers.Serializer):
+    """Aplicación de un tema a un conjunto filtrado de presentaciones"""
+    theme = serializers.ChoiceField(choices=sorted(template_service.THEME_VERSIONS))
+    overrides = serializers.DictField(required=False, default=dict)
+    filters = BulkThemeFiltersSerializer(required=False, default=dict)
+    dry_run = serializers.BooleanField(required=False, default=False)
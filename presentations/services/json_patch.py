@@ -0,0 +1,184 @@
+"""
+Aplicación de parches JSON sobre el contenido de las diapositivas
+
+Soporta JSON Merge Patch (RFC 7386) y JSON Patch (RFC 6902). Ninguna de las
+funciones modifica el documento recibido: devuelven una copia con los cambios.
+"""
+import copy
+
+
+class JsonPatchError(ValueError):
+    """El parche no es válido o no se puede aplicar al documento"""
+
+
+def merge_patch(target, patch):
+    """
+    Aplica un JSON Merge Patch (RFC 7386)
+
+    Las claves con valor None se eliminan; los diccionarios se fusionan de
+    forma recursiva y cualquier otro valor reemplaza al existente.
+
+    Args:
+        target: Documento original
+        patch: Parche a aplicar
+
+    Returns:
+        Documento resultante
+    """
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+
+    result = copy.deepcopy(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = merge_patch(result.get(key), value)
+    return result
+
+
+def make_merge_patch(source, target):
+    """
+    Calcula el JSON Merge Patch que transforma source en target
+
+    Es la operación inversa de merge_patch: merge_patch(source, parche) == target
+    (salvo valores None en target, que RFC 7386 no puede representar).
+
+    Returns:
+        dict o valor: Parche mínimo ({} si no hay diferencias)
+    """
+    if not isinstance(source, dict) or not isinstance(target, dict):
+        return copy.deepcopy(target)
+
+    patch = {}
+    for key in source:
+        if key not in target:
+            patch[key] = None
+    for key, value in target.items():
+        if key not in source:
+            patch[key] = copy.deepcopy(value)
+        elif source[key] != value:
+            if isinstance(source[key], dict) and isinstance(value, dict):
+                patch[key] = make_merge_patch(source[key], value)
+            else:
+                patch[key] = copy.deepcopy(value)
+    return patch
+
+
+def apply_json_patch(document, operations):
+    """
+    Aplica una lista de operaciones JSON Patch (RFC 6902)
+
+    Args:
+        document: Documento original
+        operations: Lista de operaciones add, remove, replace, move, copy y test
+
+    Returns:
+        Documento resultante
+
+    Raises:
+        JsonPatchError: Si una operación no es válida o falla
+    """
+    if not isinstance(operations, list):
+        raise JsonPatchError("JSON Patch debe ser una lista de operaciones")
+
+    result = copy.deepcopy(document)
+    for operation in operations:
+        if not isinstance(operation, dict) or 'op' not in operation or 'path' not in operation:
+            raise JsonPatchError(f"Operación JSON Patch no válida: {operation}")
+
+        op = operation['op']
+        path = _parse_pointer(operation['path'])
+
+        if op == 'add':
+            result = _add(result, path, copy.deepcopy(_required(operation, 'value')))
+        elif op == 'remove':
+            result, _ = _remove(result, path)
+        elif op == 'replace':
+            result, _ = _remove(result, path)
+            result = _add(result, path, copy.deepcopy(_required(operation, 'value')))
+        elif op == 'move':
+            source = _parse_pointer(_required(operation, 'from'))
+            if path[:len(source)] == source and path != source:
+                raise JsonPatchError("No se puede mover un valor dentro de sí mismo")
+            result, value = _remove(result, source)
+            result = _add(result, path, value)
+        elif op == 'copy':
+            source = _parse_pointer(_required(operation, 'from'))
+            result = _add(result, path, copy.deepcopy(_get(result, source)))
+        elif op == 'test':
+            if _get(result, path) != _required(operation, 'value'):
+                raise JsonPatchError(f"La prueba falló en '{operation['path']}'")
+        else:
+            raise JsonPatchError(f"Operación JSON Patch desconocida: {op}")
+
+    return result
+
+
+def _required(operation, key):
+    if key not in operation:
+        raise JsonPatchError(f"Falta '{key}' en la operación {operation['op']}")
+    return operation[key]
+
+
+def _parse_pointer(pointer):
+    """Convierte un JSON Pointer (RFC 6901) en una lista de claves"""
+    if pointer == '':
+        return []
+    if not isinstance(pointer, str) or not pointer.startswith('/'):
+        raise JsonPatchError(f"JSON Pointer no válido: {pointer}")
+    return [part.replace('~1', '/').replace('~0', '~') for part in pointer[1:].split('/')]
+
+
+def _list_index(container, key, allow_end=False):
+    if allow_end and key == '-':
+        return len(container)
+    if not key.isdigit() or (len(key) > 1 and key.startswith('0')):
+        raise JsonPatchError(f"Índice de lista no válido: {key}")
+    index = int(key)
+    limit = len(container) if allow_end else len(container) - 1
+    if index > limit:
+        raise JsonPatchError(f"Índice fuera de rango: {key}")
+    return index
+
+
+def _get(document, path):
+    value = document
+    for key in path:
+        if isinstance(value, dict):
+            if key not in value:
+                raise JsonPatchError(f"No existe la ruta '/{'/'.join(path)}'")
+            value = value[key]
+        elif isinstance(value, list):
+            value = value[_list_index(value, key)]
+        else:
+            raise JsonPatchError(f"No existe la ruta '/{'/'.join(path)}'")
+    return value
+
+
+def _add(document, path, value):
+    if not path:
+        return value
+    parent = _get(document, path[:-1])
+    key = path[-1]
+    if isinstance(parent, dict):
+        parent[key] = value
+    elif isinstance(parent, list):
+        parent.insert(_list_index(parent, key, allow_end=True), value)
+    else:
+        raise JsonPatchError(f"No se puede añadir en '/{'/'.join(path)}'")
+    return document
+
+
+def _remove(document, path):
+    if not path:
+        return None, document
+    parent = _get(document, path[:-1])
+    key = path[-1]
+    if isinstance(parent, dict):
+        if key not in parent:
+            raise JsonPatchError(f"No existe la ruta '/{'/'.join(path)}'")
+        return document, parent.pop(key)
+    if isinstance(parent, list):
+        return document, parent.pop(_list_index(parent, key))
+    raise JsonPatchError(f"No se puede eliminar '/{'/'.join(path)}'")
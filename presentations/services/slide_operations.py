@@ -0,0 +1,187 @@
+"""
+Operaciones en lote sobre las diapositivas de una presentación
+
+Permite reordenar, insertar, eliminar y parchear diapositivas en una única
+transacción. Las diapositivas se cargan una sola vez, los cambios se aplican
+en memoria y se escriben con bulk_create / bulk_update / un único DELETE.
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from presentations.caching import invalidate_presentation
+from presentations.models import Presentation, Slide
+from .json_patch import JsonPatchError, apply_json_patch, merge_patch
+from .thumbnails import schedule_thumbnail_on_commit
+
+# Campos de Slide que una operación 'patch' puede modificar directamente
+PATCHABLE_FIELDS = ('title', 'template_type')
+
+UPDATE_FIELDS = ['order', 'title', 'template_type', 'content', 'updated_at']
+
+
+class SlideOperationError(ValueError):
+    """Una operación del lote no es válida; se deshace el lote completo"""
+
+    def __init__(self, index, message):
+        self.index = index
+        super().__init__(f"Operación {index}: {message}")
+
+
+def apply_slide_operations(presentation, operations):
+    """
+    Aplica una lista de operaciones sobre las diapositivas de una presentación
+
+    Operaciones admitidas:
+        {'op': 'reorder', 'order': [id, ...]}
+        {'op': 'insert', 'position': 2, 'slide': {'title': ..., 'content': {...}}}
+        {'op': 'delete', 'id': id}
+        {'op': 'patch', 'id': id, 'merge': {...}}  (JSON Merge Patch)
+        {'op': 'patch', 'id': id, 'patch': [...]}  (JSON Patch)
+
+    En 'reorder' las diapositivas no listadas conservan su orden relativo
+    detrás de las indicadas. Las operaciones se aplican en el orden recibido.
+    Cada diapositiva insertada o parcheada se valida con full_clean() antes
+    de continuar.
+
+    Args:
+        presentation: Instancia de Presentation
+        operations: Lista de operaciones
+
+    Returns:
+        dict: {'updated': [Slide], 'created': [Slide], 'deleted': [id]} con solo
+        las diapositivas que han cambiado
+
+    Raises:
+        SlideOperationError: Si alguna operación no es válida
+    """
+    with transaction.atomic():
+        # Bloquear la presentación serializa los lotes concurrentes del mismo editor
+        Presentation.objects.select_for_update().filter(pk=presentation.pk).first()
+        slides = list(presentation.slides.order_by('order', 'id'))
+        base_order = slides[0].order if slides else 0
+        original = {slide.pk: _snapshot(slide) for slide in slides}
+        by_id = {str(slide.pk): slide for slide in slides}
+        created, deleted = [], []
+
+        for index, operation in enumerate(operations):
+            if not isinstance(operation, dict):
+                raise SlideOperationError(index, "debe ser un objeto")
+            op = operation.get('op')
+
+            if op == 'reorder':
+                slides = _reorder(index, slides, by_id, operation.get('order'))
+
+            elif op == 'insert':
+                slide = _build_slide(index, presentation, operation.get('slide') or {})
+                position = operation.get('position', len(slides))
+                if not isinstance(position, int) or not 0 <= position <= len(slides):
+                    raise SlideOperationError(index, f"posición no válida: {position}")
+                slides.insert(position, slide)
+                created.append(slide)
+
+            elif op == 'delete':
+                slide = _lookup(index, by_id, operation.get('id'))
+                slides.remove(slide)
+                del by_id[str(slide.pk)]
+                deleted.append(slide.pk)
+
+            elif op == 'patch':
+                _patch(index, _lookup(index, by_id, operation.get('id')), operation)
+
+            else:
+                raise SlideOperationError(index, f"operación desconocida: {op}")
+
+        # Numeración compacta a partir del orden inicial
+        for position, slide in enumerate(slides, start=base_order):
+            slide.order = position
+
+        now = timezone.now()
+        updated = []
+        for slide in slides:
+            if slide.pk in original and _snapshot(slide) != original[slide.pk]:
+                slide.updated_at = now
+                updated.append(slide)
+
+        if deleted:
+            Slide.objects.filter(presentation=presentation, pk__in=deleted).delete()
+        if updated:
+            Slide.objects.bulk_update(updated, UPDATE_FIELDS)
+        if created:
+            created = Slide.objects.bulk_create(created)
+        if updated or created or deleted:
+            # bulk_update y update() no emiten señales: invalidar la caché a mano
+            Presentation.objects.filter(pk=presentation.pk).update(updated_at=now)
+            invalidate_presentation(presentation.pk)
+            schedule_thumbnail_on_commit(presentation.pk)
+
+    return {'updated': updated, 'created': created, 'deleted': deleted}
+
+
+def _snapshot(slide):
+    return (slide.order, slide.title, slide.template_type, slide.content)
+
+
+def _lookup(index, by_id, slide_id):
+    slide = by_id.get(str(slide_id))
+    if slide is None:
+        raise SlideOperationError(index, f"la diapositiva {slide_id} no existe")
+    return slide
+
+
+def _reorder(index, slides, by_id, order):
+    if not isinstance(order, list):
+        raise SlideOperationError(index, "'order' debe ser una lista de identificadores")
+    keys = [str(slide_id) for slide_id in order]
+    if len(set(keys)) != len(keys):
+        raise SlideOperationError(index, "'order' contiene identificadores repetidos")
+
+    listed = [_lookup(index, by_id, key) for key in keys]
+    listed_ids = {id(slide) for slide in listed}
+    return listed + [slide for slide in slides if id(slide) not in listed_ids]
+
+
+def _build_slide(index, presentation, data):
+    if not isinstance(data, dict):
+        raise SlideOperationError(index, "'slide' debe ser un objeto")
+    content = data.get('content', {})
+    if not isinstance(content, dict):
+        raise SlideOperationError(index, "'content' debe ser un objeto")
+    fields = {field: data[field] for field in PATCHABLE_FIELDS if field in data}
+    slide = Slide(presentation=presentation, content=content, **fields)
+    _validate(index, slide)
+    return slide
+
+
+def _patch(index, slide, operation):
+    for field in PATCHABLE_FIELDS:
+        if field in operation:
+            setattr(slide, field, operation[field])
+
+    try:
+        if 'merge' in operation:
+            slide.content = merge_patch(slide.content or {}, operation['merge'])
+        if 'patch' in operation:
+            slide.content = apply_json_patch(slide.content or {}, operation['patch'])
+    except JsonPatchError as e:
+        raise SlideOperationError(index, str(e))
+
+    if not isinstance(slide.content, dict):
+        raise SlideOperationError(index, "'content' debe ser un objeto")
+    _validate(index, slide)
+
+
+def _validate(index, slide):
+    """
+    Valida los campos de la diapositiva con las reglas del modelo
+
+    El orden se asigna al final del lote, así que ni él ni las restricciones
+    de unicidad se comprueban aquí.
+    """
+    try:
+        slide.full_clean(exclude=['order'], validate_unique=False, validate_constraints=False)
+    except ValidationError as e:
+        errors = '; '.join(
+            f"{field}: {' '.join(messages)}" for field, messages in e.message_dict.items()
+        )
+        raise SlideOperationError(index, errors)
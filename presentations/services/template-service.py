@@ -1,5 +1,13 @@
 import json
-import os
+from functools import lru_cache
+from types import MappingProxyType
+
+from django.db import transaction
+from django.utils import timezone
+
+from presentations.caching import invalidate_presentation
+from presentations.models import Presentation
+from presentations.services.json_patch import make_merge_patch, merge_patch
 
 # Definición de temas predeterminados
 DEFAULT_THEMES = {
@@ -171,25 +179,227 @@ SLIDE_TEMPLATES = {
     }
 }
 
+# Versión vigente de cada tema y plantilla. Al modificar una definición hay
+# que incrementar su versión y mover la anterior a THEME_HISTORY para que las
+# presentaciones que la referencian se sigan resolviendo igual.
+THEME_VERSIONS = {
+    "professional": 1,
+    "creative": 1,
+    "minimalist": 1
+}
+
+TEMPLATE_VERSIONS = {
+    "title": 1,
+    "title_content": 1,
+    "title_two_columns": 1,
+    "title_image": 1,
+    "chart": 1
+}
+
+# Definiciones de versiones anteriores: {(id_tema, versión): definición}
+THEME_HISTORY = {}
+
+DEFAULT_THEME_ID = "professional"
+DEFAULT_TEMPLATE_ID = "title_content"
+
+def freeze(value):
+    """Convierte un valor JSON en una estructura inmutable (mappingproxy y tuplas)"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+def thaw(value):
+    """Copia mutable y serializable a JSON de una estructura congelada"""
+    if isinstance(value, (dict, MappingProxyType)):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
+
+# Registro precompilado: {(id, versión): definición congelada}
+THEME_REGISTRY = MappingProxyType({
+    **{key: freeze(theme) for key, theme in THEME_HISTORY.items()},
+    **{(theme_id, THEME_VERSIONS[theme_id]): freeze(theme)
+       for theme_id, theme in DEFAULT_THEMES.items()}
+})
+
+TEMPLATE_REGISTRY = MappingProxyType({
+    (template_id, TEMPLATE_VERSIONS[template_id]): freeze(template)
+    for template_id, template in SLIDE_TEMPLATES.items()
+})
+
+# Vistas inmutables de la versión vigente (mismo acceso que los dicts originales)
+DEFAULT_THEMES = freeze(DEFAULT_THEMES)
+SLIDE_TEMPLATES = freeze(SLIDE_TEMPLATES)
+
+# Nombre visible del tema -> id, para reconocer temas copiados completos
+_THEME_IDS_BY_NAME = {theme["name"]: theme_id for theme_id, theme in DEFAULT_THEMES.items()}
+
 def get_available_themes():
     """Devuelve los temas disponibles"""
     return DEFAULT_THEMES
 
 def get_theme_by_name(theme_name):
     """Obtiene un tema específico por nombre"""
-    return DEFAULT_THEMES.get(theme_name, DEFAULT_THEMES["professional"])
+    return DEFAULT_THEMES.get(theme_name, DEFAULT_THEMES[DEFAULT_THEME_ID])
+
+def get_theme(theme_id, version=None):
+    """Obtiene una versión concreta de un tema (la vigente si version es None)"""
+    version = version or THEME_VERSIONS.get(theme_id)
+    return THEME_REGISTRY.get((theme_id, version))
 
 def get_slide_templates():
     """Devuelve las plantillas de diapositivas disponibles"""
     return SLIDE_TEMPLATES
 
-def get_template_by_name(template_name):
+def get_template_by_name(template_name, version=None):
     """Obtiene una plantilla específica por nombre"""
-    return SLIDE_TEMPLATES.get(template_name, SLIDE_TEMPLATES["title_content"])
-
-def apply_theme_to_presentation(presentation, theme_name):
-    """Aplica un tema a una presentación"""
-    theme = get_theme_by_name(theme_name)
-    presentation.theme = theme
-    presentation.save()
-    return presentation
\ No newline at end of file
+    version = version or TEMPLATE_VERSIONS.get(template_name)
+    template = TEMPLATE_REGISTRY.get((template_name, version))
+    if template is None:
+        return TEMPLATE_REGISTRY[(DEFAULT_TEMPLATE_ID, TEMPLATE_VERSIONS[DEFAULT_TEMPLATE_ID])]
+    return template
+
+def make_theme_reference(theme_name, overrides=None):
+    """
+    Referencia a un tema tal como se guarda en Presentation.theme
+
+    Returns:
+        dict: {'id': ..., 'version': ..., 'overrides': {...}}
+    """
+    theme_id = theme_name if theme_name in THEME_VERSIONS else DEFAULT_THEME_ID
+    return {
+        "id": theme_id,
+        "version": THEME_VERSIONS[theme_id],
+        "overrides": overrides or {}
+    }
+
+def is_theme_reference(theme):
+    return isinstance(theme, dict) and "id" in theme and "version" in theme
+
+def resolve_theme(theme):
+    """
+    Devuelve el tema completo (inmutable) de un valor de Presentation.theme
+
+    Las referencias se resuelven contra el registro y se memorizan; los temas
+    antiguos guardados completos se devuelven tal cual.
+    """
+    if not theme:
+        return get_theme_by_name(DEFAULT_THEME_ID)
+    if not is_theme_reference(theme):
+        return freeze(theme)
+    overrides = theme.get("overrides") or {}
+    key = json.dumps(overrides, sort_keys=True, separators=(",", ":")) if overrides else ""
+    return _resolve_reference(theme["id"], theme["version"], key)
+
+@lru_cache(maxsize=1024)
+def _resolve_reference(theme_id, version, overrides_key):
+    base = THEME_REGISTRY.get((theme_id, version)) or get_theme_by_name(theme_id)
+    if not overrides_key:
+        return base
+    return freeze(merge_patch(thaw(base), json.loads(overrides_key)))
+
+def compact_theme(theme):
+    """
+    Convierte un tema guardado completo en una referencia con sus diferencias
+
+    El tema base se reconoce por su nombre visible; si no coincide con ninguno
+    del registro (tema totalmente personalizado) se devuelve sin cambios.
+    """
+    if not theme or is_theme_reference(theme) or not isinstance(theme, dict):
+        return theme
+    theme_id = _THEME_IDS_BY_NAME.get(theme.get("name"))
+    if theme_id is None:
+        return theme
+    base = thaw(get_theme(theme_id))
+    return make_theme_reference(theme_id, make_merge_patch(base, theme))
+
+def apply_theme_to_presentation(presentation, theme_name, overrides=None):
+    """Aplica un tema a una presentación guardando solo la referencia y los cambios"""
+    presentation.theme = make_theme_reference(theme_name, overrides)
+    presentation.save(update_fields=["theme", "updated_at"])
+    return presentation
+
+# Filtros admitidos al aplicar un tema en bloque
+BULK_THEME_FILTERS = ("owner", "is_template", "is_public", "ids")
+
+def filter_presentations(filters, queryset=None):
+    """
+    Presentaciones afectadas por una aplicación de tema en bloque
+
+    Args:
+        filters: Dict con owner (id), is_template, is_public y/o ids
+        queryset: Queryset base (por defecto, todas las presentaciones)
+
+    Raises:
+        ValueError: Si se indica un filtro no admitido
+    """
+    unknown = set(filters or {}) - set(BULK_THEME_FILTERS)
+    if unknown:
+        raise ValueError(f"Filtros no admitidos: {', '.join(sorted(unknown))}")
+
+    queryset = Presentation.objects.all() if queryset is None else queryset
+    filters = dict(filters or {})
+    if "ids" in filters:
+        queryset = queryset.filter(pk__in=filters.pop("ids"))
+    if "owner" in filters:
+        queryset = queryset.filter(owner_id=filters.pop("owner"))
+    return queryset.filter(**filters)
+
+def apply_theme_to_queryset(queryset, theme_name, overrides=None, chunk_size=500,
+                            dry_run=False, progress=None):
+    """
+    Aplica un tema a un conjunto de presentaciones con UPDATE por bloques
+
+    Todas las presentaciones reciben la misma referencia de tema, por lo que
+    cada bloque de claves primarias se actualiza con una sola consulta.
+
+    Args:
+        queryset: Presentaciones a actualizar
+        theme_name: Id del tema
+        overrides: Cambios opcionales sobre el tema
+        chunk_size: Presentaciones actualizadas por consulta
+        dry_run: Solo contar las presentaciones afectadas
+        progress: Callable opcional progress(actualizadas, total) tras cada bloque
+
+    Returns:
+        dict: {'matched': total, 'updated': actualizadas, 'dry_run': bool}
+    """
+    total = queryset.count()
+    if dry_run:
+        return {"matched": total, "updated": 0, "dry_run": True}
+
+    # Importación local: thumbnails depende de este módulo
+    from presentations.services.thumbnails import schedule_thumbnail_on_commit
+
+    reference = make_theme_reference(theme_name, overrides)
+    pks = queryset.order_by("pk").values_list("pk", flat=True)
+    updated = 0
+    chunk = []
+
+    def flush(chunk):
+        with transaction.atomic():
+            count = Presentation.objects.filter(pk__in=chunk).update(
+                theme=reference, updated_at=timezone.now()
+            )
+            # update() no emite señales: invalidar la caché y redibujar la miniatura
+            for pk in chunk:
+                invalidate_presentation(pk)
+                schedule_thumbnail_on_commit(pk)
+        return count
+
+    for pk in pks.iterator(chunk_size=chunk_size):
+        chunk.append(pk)
+        if len(chunk) >= chunk_size:
+            updated += flush(chunk)
+            chunk = []
+            if progress:
+                progress(updated, total)
+    if chunk:
+        updated += flush(chunk)
+        if progress:
+            progress(updated, total)
+
+    return {"matched": total, "updated": updated, "dry_run": False}
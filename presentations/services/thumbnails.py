@@ -0,0 +1,285 @@
+"""
+Miniaturas de presentaciones generadas en el servidor
+
+La primera diapositiva se dibuja con Pillow a partir de la estructura de su
+plantilla (SLIDE_TEMPLATES) y del tema resuelto de la presentación. El nombre
+del archivo incluye un hash del contenido dibujado, de modo que una
+presentación sin cambios visibles nunca se vuelve a dibujar.
+"""
+import hashlib
+import importlib
+import json
+import logging
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageDraw, ImageFont
+
+from presentations.caching import invalidate_presentation
+from presentations.models import Presentation
+
+logger = logging.getLogger(__name__)
+
+template_service = importlib.import_module('presentations.services.template-service')
+
+# Incrementar al cambiar el dibujo para regenerar todas las miniaturas
+RENDERER_VERSION = 1
+
+# Tamaño de referencia de una diapositiva en el editor (los px de las plantillas)
+SLIDE_WIDTH = 1280
+SLIDE_HEIGHT = 720
+
+
+def _pending_key(presentation_id):
+    return f"presentation:{presentation_id}:thumbnail:pending"
+
+
+def schedule_thumbnail(presentation_id):
+    """
+    Programa el dibujo de la miniatura agrupando ráfagas de cambios
+
+    Solo la primera llamada dentro de la ventana encola la tarea, con un
+    retraso igual a la ventana; la tarea dibuja el estado final.
+    """
+    from presentations.tasks import render_presentation_thumbnail
+
+    delay = getattr(settings, 'THUMBNAIL_DEBOUNCE_SECONDS', 10)
+    # La clave caduca con margen por si la tarea no llega a ejecutarse
+    if cache.add(_pending_key(presentation_id), 1, delay * 6):
+        render_presentation_thumbnail.apply_async((str(presentation_id),), countdown=delay)
+        return True
+    return False
+
+
+def schedule_thumbnail_on_commit(presentation_id):
+    transaction.on_commit(lambda: schedule_thumbnail(presentation_id))
+
+
+def render_thumbnail(presentation_id):
+    """
+    Dibuja y guarda la miniatura de una presentación si su contenido ha cambiado
+
+    Returns:
+        str: 'rendered', 'unchanged' o 'missing'
+    """
+    # A partir de aquí, nuevos cambios vuelven a programar otra miniatura
+    cache.delete(_pending_key(presentation_id))
+
+    presentation = Presentation.objects.filter(pk=presentation_id).first()
+    if presentation is None:
+        return 'missing'
+
+    slide = presentation.slides.order_by('order').first()
+    theme = template_service.resolve_theme(presentation.theme)
+    size = tuple(getattr(settings, 'THUMBNAIL_SIZE', (320, 180)))
+
+    digest = thumbnail_fingerprint(presentation, slide, theme, size)
+    name = f"thumbnails/{presentation.pk}/{digest[:20]}.png"
+    old_name = presentation.thumbnail.name if presentation.thumbnail else None
+    if old_name == name:
+        return 'unchanged'
+
+    image = render_slide_image(slide, theme, presentation.title, size)
+    buffer = BytesIO()
+    image.save(buffer, format='PNG', optimize=True)
+
+    storage = presentation.thumbnail.storage
+    if not storage.exists(name):
+        name = storage.save(name, ContentFile(buffer.getvalue()))
+
+    # update() evita las señales de post_save (y volver a programar la miniatura)
+    Presentation.objects.filter(pk=presentation.pk).update(thumbnail=name)
+    invalidate_presentation(presentation.pk)
+
+    if old_name and old_name != name:
+        try:
+            storage.delete(old_name)
+        except Exception as e:
+            logger.warning(f"No se pudo borrar la miniatura anterior {old_name}: {str(e)}")
+    return 'rendered'
+
+
+def thumbnail_fingerprint(presentation, slide, theme, size):
+    """Hash de todo lo que influye en el dibujo de la miniatura"""
+    payload = {
+        'renderer': RENDERER_VERSION,
+        'size': list(size),
+        'theme': template_service.thaw(theme),
+        'title': presentation.title,
+        'slide': None if slide is None else {
+            'title': slide.title,
+            'template_type': slide.template_type,
+            'content': slide.content
+        }
+    }
+    raw = json.dumps(payload, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def render_slide_image(slide, theme, fallback_title, size):
+    """
+    Dibuja una diapositiva en una imagen RGB
+
+    Args:
+        slide: Primera diapositiva (o None para una presentación vacía)
+        theme: Tema resuelto
+        fallback_title: Texto del título si la diapositiva no tiene
+        size: (ancho, alto) de la miniatura
+
+    Returns:
+        PIL.Image.Image
+    """
+    width, height = size
+    colors = theme.get('colors', {})
+    image = Image.new('RGB', size, _color(colors.get('background'), '#FFFFFF'))
+    draw = ImageDraw.Draw(image)
+    scale = width / SLIDE_WIDTH
+    margin = int(_px(theme.get('spacing', {}).get('margin'), 24) * scale) + 2
+
+    if slide is None:
+        template = template_service.get_template_by_name('title')
+        content = {'title': fallback_title}
+    else:
+        template = template_service.get_template_by_name(slide.template_type)
+        content = dict(slide.content or {})
+        content.setdefault('title', slide.title or fallback_title)
+
+    regions = _layout(template['structure'], width, height, margin)
+    for key, element in template['structure'].items():
+        box = regions[key]
+        kind = element.get('type')
+        if kind == 'image':
+            draw.rectangle(box, outline=_color(colors.get('secondary'), '#757575'), width=1)
+        elif kind == 'chart':
+            _draw_chart(draw, box, _color(colors.get('primary'), '#1976D2'))
+        else:
+            text = _text(content.get(key))
+            if text:
+                color = colors.get('primary') if key == 'title' else colors.get('text')
+                font = _font(max(8, int(_px(element.get('fontSize'), 20) * scale)))
+                _draw_text(draw, box, text, font, _color(color, '#333333'), element.get('align'))
+
+    return image
+
+
+def _layout(structure, width, height, margin):
+    """Cajas (x0, y0, x1, y1) de cada elemento: título arriba y el resto debajo"""
+    keys = list(structure)
+    regions = {}
+    inner_width = width - 2 * margin
+    title_height = int(height * 0.25)
+
+    if keys and keys[0] == 'title' and len(keys) == 2 and structure[keys[1]].get('type') == 'text' \
+            and structure['title'].get('align') == 'center':
+        # Diapositiva de título: título y subtítulo centrados verticalmente
+        regions['title'] = (margin, int(height * 0.3), width - margin, int(height * 0.55))
+        regions[keys[1]] = (margin, int(height * 0.58), width - margin, int(height * 0.75))
+        return regions
+
+    top = margin
+    if 'title' in structure:
+        regions['title'] = (margin, top, width - margin, top + title_height)
+        top += title_height
+
+    body = [key for key in keys if key != 'title']
+    columns = [key for key in body if key.startswith('column_')]
+    if columns:
+        column_width = inner_width // len(columns)
+        for index, key in enumerate(columns):
+            x0 = margin + index * column_width
+            regions[key] = (x0, top, x0 + column_width - margin // 2, height - margin)
+        return regions
+
+    # Elementos apilados: el principal ocupa la mayor parte del alto
+    remaining = height - margin - top
+    for index, key in enumerate(body):
+        share = 0.75 if index == 0 and len(body) > 1 else 1.0 / max(1, len(body) - index)
+        box_height = int(remaining * share)
+        regions[key] = (margin, top, width - margin, top + box_height)
+        top += box_height
+        remaining -= box_height
+    return regions
+
+
+def _draw_text(draw, box, text, font, color, align):
+    x0, y0, x1, y1 = box
+    line_height = _line_height(draw, font)
+    y = y0
+    for line in _wrap(draw, text, font, x1 - x0):
+        if y + line_height > y1:
+            break
+        line_width = draw.textlength(line, font=font)
+        if align == 'center':
+            x = x0 + (x1 - x0 - line_width) / 2
+        elif align == 'right':
+            x = x1 - line_width
+        else:
+            x = x0
+        draw.text((x, y), line, font=font, fill=color)
+        y += line_height
+
+
+def _draw_chart(draw, box, color):
+    """Marcador de gráfico: barras de ejemplo"""
+    x0, y0, x1, y1 = box
+    bars = 5
+    gap = max(1, (x1 - x0) // (bars * 4))
+    bar_width = max(1, ((x1 - x0) - gap * (bars + 1)) // bars)
+    for index, ratio in enumerate((0.4, 0.7, 0.5, 0.9, 0.6)):
+        left = x0 + gap + index * (bar_width + gap)
+        draw.rectangle((left, y1 - int((y1 - y0) * ratio), left + bar_width, y1), fill=color)
+
+
+def _wrap(draw, text, font, max_width):
+    lines = []
+    for paragraph in text.splitlines() or ['']:
+        current = ''
+        for word in paragraph.split():
+            candidate = f"{current} {word}".strip()
+            if current and draw.textlength(candidate, font=font) > max_width:
+                lines.append(current)
+                current = word
+            else:
+                current = candidate
+        lines.append(current)
+    return lines
+
+
+def _line_height(draw, font):
+    left, top, right, bottom = draw.textbbox((0, 0), 'Hg', font=font)
+    return int((bottom - top) * 1.3) + 1
+
+
+def _text(value):
+    """Texto visible de un valor de Slide.content (cadena, dict o lista)"""
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return _text(value.get('text') or value.get('value') or value.get('items'))
+    if isinstance(value, (list, tuple)):
+        return '\n'.join(filter(None, (_text(item) for item in value)))
+    return str(value)
+
+
+def _font(size):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        # Pillow < 10.1 solo tiene la fuente de mapa de bits de tamaño fijo
+        return ImageFont.load_default()
+
+
+def _px(value, default):
+    try:
+        return float(str(value).replace('px', ''))
+    except (TypeError, ValueError):
+        return default
+
+
+def _color(value, default):
+    return value if isinstance(value, str) and value.startswith('#') else default
@@ -0,0 +1,37 @@
+from .caching import invalidate_owner, invalidate_presentation
+from .services.thumbnails import schedule_thumbnail_on_commit
+
+# Campos del usuario incluidos en la representación de sus presentaciones
+OWNER_FIELDS = {'email', 'first_name', 'last_name'}
+
+
+def presentation_changed(sender, instance, **kwargs):
+    invalidate_presentation(instance.pk)
+
+
+def presentation_saved(sender, instance, **kwargs):
+    invalidate_presentation(instance.pk)
+    schedule_thumbnail_on_commit(instance.pk)
+
+
+def slide_changed(sender, instance, **kwargs):
+    invalidate_presentation(instance.presentation_id)
+    schedule_thumbnail_on_commit(instance.presentation_id)
+
+
+def owner_changed(sender, instance, update_fields=None, **kwargs):
+    # Solo los campos que aparecen en owner_details (no last_login, etc.)
+    if update_fields is not None and not OWNER_FIELDS & set(update_fields):
+        return
+    invalidate_owner(instance.pk)
+
+
+def collaborators_changed(sender, instance, action, pk_set=None, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if kwargs.get('reverse'):
+        # Cambio hecho desde el lado del usuario: afecta a varias presentaciones
+        for presentation_id in pk_set or ():
+            invalidate_presentation(presentation_id)
+    else:
+        invalidate_presentation(instance.pk)
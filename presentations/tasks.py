@@ -0,0 +1,101 @@
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+import importlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Progreso de apply_theme_bulk en la caché compartida
+PROGRESS_KEY = 'presentations:theme:{task_id}'
+
+template_service = importlib.import_module('presentations.services.template-service')
+
+
+@shared_task
+def render_presentation_thumbnail(presentation_id):
+    """
+    Dibuja la miniatura de una presentación (programada con schedule_thumbnail)
+
+    Args:
+        presentation_id: ID de la presentación
+
+    Returns:
+        dict: Resultado del dibujo ('rendered', 'unchanged' o 'missing')
+    """
+    from .services.thumbnails import render_thumbnail
+
+    return {'presentation_id': presentation_id, 'status': render_thumbnail(presentation_id)}
+
+
+@shared_task(bind=True)
+def apply_theme_bulk(self, theme_name, filters, overrides=None, chunk_size=500, dry_run=False,
+                     user_id=None):
+    """
+    Aplica un tema a todas las presentaciones que cumplen los filtros
+
+    El progreso {'updated', 'total'} se publica en la caché compartida (no
+    hay backend de resultados de Celery) y se consulta con get_theme_progress.
+
+    Args:
+        theme_name: Id del tema
+        filters: Filtros admitidos por filter_presentations
+        overrides: Cambios opcionales sobre el tema
+        chunk_size: Presentaciones actualizadas por consulta
+        dry_run: Solo contar las presentaciones afectadas
+        user_id: ID del usuario que lanzó la tarea (permisos de consulta)
+
+    Returns:
+        dict: Presentaciones encontradas y actualizadas
+    """
+    task_id = self.request.id
+
+    def report(updated, total):
+        _publish_progress(task_id, user_id, 'PROGRESS', updated=updated, total=total)
+
+    try:
+        queryset = template_service.filter_presentations(filters)
+        result = template_service.apply_theme_to_queryset(
+            queryset, theme_name, overrides=overrides, chunk_size=chunk_size,
+            dry_run=dry_run, progress=report
+        )
+    except Exception as e:
+        _publish_progress(task_id, user_id, 'FAILURE', error=str(e))
+        raise
+
+    _publish_progress(task_id, user_id, 'SUCCESS', **result)
+    logger.info(f"Tema '{theme_name}' aplicado a {result['updated']} de {result['matched']} presentaciones")
+    return result
+
+
+def register_theme_task(task_id, user_id):
+    """Registra una tarea apply_theme_bulk recién encolada (si aún no ha publicado nada)"""
+    if task_id:
+        cache.add(PROGRESS_KEY.format(task_id=task_id), {'user_id': user_id, 'state': 'PENDING'},
+                  _progress_timeout())
+
+
+def get_theme_progress(task_id):
+    """
+    Estado de una tarea apply_theme_bulk
+
+    Returns:
+        dict: Estado, presentaciones actualizadas, total y user_id de quien la
+        lanzó, o None si la tarea no existe o su progreso ha caducado
+    """
+    entry = cache.get(PROGRESS_KEY.format(task_id=task_id))
+    if entry is None:
+        return None
+    progress = {'task_id': task_id, **entry}
+    progress['finished'] = entry['state'] in ('SUCCESS', 'FAILURE')
+    return progress
+
+
+def _publish_progress(task_id, user_id, state, **data):
+    if task_id:
+        cache.set(PROGRESS_KEY.format(task_id=task_id),
+                  {'user_id': user_id, 'state': state, **data}, _progress_timeout())
+
+
+def _progress_timeout():
+    return getattr(settings, 'THEME_PROGRESS_TIMEOUT', 24 * 60 * 60)
@@ -0,0 +1,140 @@
+from django.test import SimpleTestCase
+
+from presentations.services.json_patch import JsonPatchError, apply_json_patch, make_merge_patch, merge_patch
+
+
+class MergePatchTest(SimpleTestCase):
+    """ Test module for JSON Merge Patch (RFC 7386, Appendix A) """
+
+    VECTORS = [
+        ({'a': 'b'}, {'a': 'c'}, {'a': 'c'}),
+        ({'a': 'b'}, {'b': 'c'}, {'a': 'b', 'b': 'c'}),
+        ({'a': 'b'}, {'a': None}, {}),
+        ({'a': 'b', 'b': 'c'}, {'a': None}, {'b': 'c'}),
+        ({'a': ['b']}, {'a': 'c'}, {'a': 'c'}),
+        ({'a': 'c'}, {'a': ['b']}, {'a': ['b']}),
+        ({'a': {'b': 'c'}}, {'a': {'b': 'd', 'c': None}}, {'a': {'b': 'd'}}),
+        ({'a': [{'b': 'c'}]}, {'a': [1]}, {'a': [1]}),
+        (['a', 'b'], ['c', 'd'], ['c', 'd']),
+        ({'a': 'b'}, ['c'], ['c']),
+        ({'a': 'foo'}, None, None),
+        ({'a': 'foo'}, 'bar', 'bar'),
+        ({'e': None}, {'a': 1}, {'e': None, 'a': 1}),
+        ([1, 2], {'a': 'b', 'c': None}, {'a': 'b'}),
+        ({}, {'a': {'bb': {'ccc': None}}}, {'a': {'bb': {}}}),
+    ]
+
+    def test_rfc_vectors(self):
+        """Test the examples of RFC 7386"""
+        for target, patch, expected in self.VECTORS:
+            with self.subTest(target=target, patch=patch):
+                self.assertEqual(merge_patch(target, patch), expected)
+
+    def test_target_is_not_modified(self):
+        """Test that the original document is left untouched"""
+        target = {'a': {'b': 'c'}}
+        merge_patch(target, {'a': {'b': None}})
+        self.assertEqual(target, {'a': {'b': 'c'}})
+
+    def test_make_merge_patch_round_trip(self):
+        """Test that the computed patch turns source into target"""
+        source = {'a': 'b', 'c': {'d': 'e', 'f': 'g'}, 'h': [1]}
+        target = {'a': 'z', 'c': {'d': 'e'}, 'i': True}
+        patch = make_merge_patch(source, target)
+        self.assertEqual(patch, {'a': 'z', 'c': {'f': None}, 'h': None, 'i': True})
+        self.assertEqual(merge_patch(source, patch), target)
+        self.assertEqual(make_merge_patch(source, source), {})
+
+
+class JsonPatchTest(SimpleTestCase):
+    """ Test module for JSON Patch (RFC 6902, Appendix A) """
+
+    VECTORS = [
+        # A.1 - A.5: add, remove y replace
+        ({'foo': 'bar'},
+         [{'op': 'add', 'path': '/baz', 'value': 'qux'}],
+         {'baz': 'qux', 'foo': 'bar'}),
+        ({'foo': ['bar', 'baz']},
+         [{'op': 'add', 'path': '/foo/1', 'value': 'qux'}],
+         {'foo': ['bar', 'qux', 'baz']}),
+        ({'baz': 'qux', 'foo': 'bar'},
+         [{'op': 'remove', 'path': '/baz'}],
+         {'foo': 'bar'}),
+        ({'foo': ['bar', 'qux', 'baz']},
+         [{'op': 'remove', 'path': '/foo/1'}],
+         {'foo': ['bar', 'baz']}),
+        ({'baz': 'qux', 'foo': 'bar'},
+         [{'op': 'replace', 'path': '/baz', 'value': 'boo'}],
+         {'baz': 'boo', 'foo': 'bar'}),
+        # A.6 - A.7: move
+        ({'foo': {'bar': 'baz', 'waldo': 'fred'}, 'qux': {'corge': 'grault'}},
+         [{'op': 'move', 'from': '/foo/waldo', 'path': '/qux/thud'}],
+         {'foo': {'bar': 'baz'}, 'qux': {'corge': 'grault', 'thud': 'fred'}}),
+        ({'foo': ['all', 'grass', 'cows', 'eat']},
+         [{'op': 'move', 'from': '/foo/1', 'path': '/foo/3'}],
+         {'foo': ['all', 'cows', 'eat', 'grass']}),
+        # A.8: test correcto
+        ({'baz': 'qux', 'foo': ['a', 2, 'c']},
+         [{'op': 'test', 'path': '/baz', 'value': 'qux'},
+          {'op': 'test', 'path': '/foo/1', 'value': 2}],
+         {'baz': 'qux', 'foo': ['a', 2, 'c']}),
+        # A.10 - A.11: valor anidado y miembros desconocidos
+        ({'foo': 'bar'},
+         [{'op': 'add', 'path': '/child', 'value': {'grandchild': {}}}],
+         {'foo': 'bar', 'child': {'grandchild': {}}}),
+        ({'foo': 'bar'},
+         [{'op': 'add', 'path': '/baz', 'value': 'qux', 'xyz': 123}],
+         {'foo': 'bar', 'baz': 'qux'}),
+        # A.14: escapes ~0 y ~1
+        ({'/': 9, '~1': 10},
+         [{'op': 'test', 'path': '/~01', 'value': 10}],
+         {'/': 9, '~1': 10}),
+        # A.16: añadir una lista al final de otra
+        ({'foo': ['bar']},
+         [{'op': 'add', 'path': '/foo/-', 'value': ['abc', 'def']}],
+         {'foo': ['bar', ['abc', 'def']]}),
+        # copy
+        ({'foo': {'bar': 1}},
+         [{'op': 'copy', 'from': '/foo', 'path': '/baz'}],
+         {'foo': {'bar': 1}, 'baz': {'bar': 1}}),
+    ]
+
+    ERRORS = [
+        # A.9: test fallido
+        ({'baz': 'qux'}, [{'op': 'test', 'path': '/baz', 'value': 'bar'}]),
+        # A.12: añadir bajo una ruta inexistente
+        ({'foo': 'bar'}, [{'op': 'add', 'path': '/baz/bat', 'value': 'qux'}]),
+        # A.15: cadenas y números no son iguales
+        ({'/': 9, '~1': 10}, [{'op': 'test', 'path': '/~01', 'value': '10'}]),
+        ({'foo': [1]}, [{'op': 'add', 'path': '/foo/2', 'value': 2}]),
+        ({'foo': [1]}, [{'op': 'remove', 'path': '/foo/01'}]),
+        ({'foo': {'bar': 1}}, [{'op': 'move', 'from': '/foo', 'path': '/foo/bar/baz'}]),
+        ({'foo': 1}, [{'op': 'replace', 'path': '/foo'}]),
+        ({'foo': 1}, [{'op': 'increment', 'path': '/foo'}]),
+        ({'foo': 1}, [{'op': 'add', 'path': 'foo', 'value': 2}]),
+        ({'foo': 1}, {'op': 'add', 'path': '/foo', 'value': 2}),
+    ]
+
+    def test_rfc_vectors(self):
+        """Test the examples of RFC 6902"""
+        for document, operations, expected in self.VECTORS:
+            with self.subTest(operations=operations):
+                self.assertEqual(apply_json_patch(document, operations), expected)
+
+    def test_invalid_patches(self):
+        """Test that invalid or failing operations raise JsonPatchError"""
+        for document, operations in self.ERRORS:
+            with self.subTest(operations=operations):
+                with self.assertRaises(JsonPatchError):
+                    apply_json_patch(document, operations)
+
+    def test_document_is_not_modified(self):
+        """Test that the original document is left untouched, even on failure"""
+        document = {'foo': ['bar'], 'baz': 1}
+        apply_json_patch(document, [{'op': 'remove', 'path': '/foo/0'}])
+        with self.assertRaises(JsonPatchError):
+            apply_json_patch(document, [
+                {'op': 'remove', 'path': '/baz'},
+                {'op': 'test', 'path': '/foo/0', 'value': 'other'},
+            ])
+        self.assertEqual(document, {'foo': ['bar'], 'baz': 1})
@@ -2,6 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_nested.routers import NestedSimpleRouter
 from .views import PresentationViewSet, SlideViewSet
+from .bulk_views import BulkThemeApplyView, BulkThemeProgressView, SlideBulkOperationsView
 
 router = DefaultRouter()
 router.register(r'presentations', PresentationViewSet, basename='presentation')
@@ -11,6 +12,13 @@ slides_router = NestedSimpleRouter(router, r'presentations', lookup='presentatio
 slides_router.register(r'slides', SlideViewSet, basename='presentation-slides')
 
 urlpatterns = [
+    path('presentations/themes/bulk/', BulkThemeApplyView.as_view(),
+         name='presentation-themes-bulk'),
+    path('presentations/themes/bulk/<str:task_id>/', BulkThemeProgressView.as_view(),
+         name='presentation-themes-bulk-progress'),
+    # Debe ir antes de las rutas anidadas para que 'bulk' no se tome como id de diapositiva
+    path('presentations/<presentation_pk>/slides/bulk/', SlideBulkOperationsView.as_view(),
+         name='presentation-slides-bulk'),
     path('', include(router.urls)),
     path('', include(slides_router.urls)),
 ]
\ No newline at end of file